@@ -145,10 +145,25 @@
 # if __name__ == "__main__":
 #     main()
 
+import os
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 
+from src.dashboard_store import DASHBOARD_RESULTS_PATH, open_results_store
+from src.profiling import profiled
+
+RESULTS_PATH = DASHBOARD_RESULTS_PATH
+
+TABLE_COLUMNS = [
+    "Date",
+    "SKU",
+    "daily_sales",
+    "forecast_error",
+    "volatility_ratio",
+    "ghost_demand"
+]
+
 # --------------------------------------------------
 # Page Config
 # --------------------------------------------------
@@ -160,12 +175,14 @@ st.set_page_config(
 
 # --------------------------------------------------
 # Load Precomputed Ghost Demand Results
+# Per-SKU rollups and row ranges are built once per results file; filter
+# changes only look up ranges and slice the columns a panel shows.
 # --------------------------------------------------
-@st.cache_data(show_spinner=True)
-def load_data():
-    df = pd.read_csv("data/ghost_demand_results.csv")
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    return df
+@st.cache_resource(show_spinner=True)
+def load_store():
+    # GHOST_PROFILE=<trace.json> records the load like a pipeline stage
+    with profiled(os.environ.get("GHOST_PROFILE")):
+        return open_results_store(RESULTS_PATH)
 
 
 # --------------------------------------------------
@@ -180,18 +197,19 @@ def main():
 
     # ---------- Load ----------
     try:
-        df = load_data()
+        store = load_store()
     except Exception as e:
         st.error(f"Failed to load ghost demand data: {e}")
         return
 
-    if df.empty:
+    totals = store.totals()
+    if totals["ghost_cases"] == 0:
         st.warning("No ghost demand records available.")
         return
 
     # ---------- GLOBAL METRICS ----------
-    total_cases = df.shape[0]
-    total_units = int(df["daily_sales"].sum())
+    total_cases = totals["ghost_cases"]
+    total_units = totals["units"]
 
     c1, c2 = st.columns(2)
     c1.metric("🚨 Ghost Demand Cases", total_cases)
@@ -202,29 +220,22 @@ def main():
     # ---------- SIDEBAR FILTER ----------
     st.sidebar.header("Product Filters")
 
-    all_skus = sorted(df["SKU"].unique())
+    all_skus = store.skus
     selected_skus = st.sidebar.multiselect(
         "Select SKUs",
         options=all_skus,
         default=all_skus[:3]
     )
 
-    filtered_df = df[df["SKU"].isin(selected_skus)]
+    sku_counts = store.sku_summary(selected_skus)
 
-    if filtered_df.empty:
+    if sku_counts.empty:
         st.warning("No records for selected SKUs.")
         return
 
     # ---------- CHART ----------
     st.subheader("📊 Ghost Demand by SKU")
 
-    sku_counts = (
-        filtered_df.groupby("SKU")
-        .size()
-        .reset_index(name="ghost_cases")
-        .sort_values("ghost_cases", ascending=False)
-    )
-
     fig = px.bar(
         sku_counts,
         x="SKU",
@@ -251,16 +262,7 @@ def main():
     st.subheader("📄 Ghost Demand Records")
 
     st.dataframe(
-        filtered_df[
-            [
-                "Date",
-                "SKU",
-                "daily_sales",
-                "forecast_error",
-                "volatility_ratio",
-                "ghost_demand"
-            ]
-        ].head(25),
+        store.records(selected_skus, TABLE_COLUMNS, limit=25),
         use_container_width=True
     )
 
@@ -0,0 +1,64 @@
+"""
+Per-row vs. unique-value Date parsing and Status filtering.
+
+    python benchmarks/bench_cleaning.py [--rows 10000000]
+
+Writes a synthetic order export to a temp directory, reads its Date and
+Status columns once, then times both cleaning strategies on them.
+"""
+import argparse
+import os
+import tempfile
+
+from common import timed, write_orders_csv
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import (
+    DATE_FORMAT,
+    VALID_STATUS,
+    parse_dates,
+    valid_status_mask,
+)
+
+
+def per_row_dates(series: pd.Series) -> pd.Series:
+    return pd.to_datetime(
+        series.astype(str).str.strip(),
+        format=DATE_FORMAT,
+        errors="raise"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_orders_csv(os.path.join(tmp, "orders.csv"), args.rows)
+        df = pd.read_csv(path, usecols=["Date", "Status"])
+
+    status_cat = df["Status"].astype("category")
+
+    row_s, expected = timed(per_row_dates, df["Date"], repeat=args.repeat)
+    uniq_s, parsed = timed(parse_dates, df["Date"], repeat=args.repeat)
+    assert parsed.equals(expected)
+
+    isin_s, mask = timed(
+        lambda s: s.isin(VALID_STATUS).to_numpy(), df["Status"],
+        repeat=args.repeat
+    )
+    cat_s, cat_mask = timed(valid_status_mask, status_cat, repeat=args.repeat)
+    assert np.array_equal(mask, cat_mask)
+
+    print(f"rows: {len(df):,}  distinct dates: {df['Date'].nunique()}")
+    print(f"{'step':<16} {'per_row_s':>10} {'fast_s':>10} {'speedup':>8}")
+    print(f"{'date parse':<16} {row_s:10.3f} {uniq_s:10.3f} {row_s / uniq_s:7.1f}x")
+    print(f"{'status filter':<16} {isin_s:10.3f} {cat_s:10.3f} {isin_s / cat_s:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
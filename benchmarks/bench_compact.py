@@ -0,0 +1,75 @@
+"""
+Peak memory of the per-SKU stages, standard vs. compact dtypes.
+
+    python benchmarks/bench_compact.py [--skus 16000] [--days 91]
+
+Cleans a synthetic order export (~1M SKU-days at the defaults), trains
+one model, then runs run_pipeline in both modes under tracemalloc and reports
+the peak Python allocation per stage and over the whole run, scaled to
+1M SKU-days. Also checks that both modes flag the same SKU-days.
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+from common import write_synthetic_orders
+
+import pandas as pd
+
+from src.data_cleaning import load_and_prepare_data
+from src.feature_engineering import add_time_series_features
+from src.main import run_pipeline
+from src.ml_model import train_ghost_model
+from src.profiling import ProfileRun
+
+
+def measure(daily: pd.DataFrame, model, compact: bool):
+    # Per-stage peaks; the profiler resets the peak at every stage, so
+    # the whole-run peak comes from a second, unprofiled run
+    with ProfileRun(memory="tracemalloc") as run:
+        result = run_pipeline(daily, model, compact=compact)
+
+    tracemalloc.start()
+    run_pipeline(daily, model, compact=compact)
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return result, run.to_frame(), peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skus", type=int, default=16_000)
+    parser.add_argument("--days", type=int, default=91)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = os.path.join(tmp, "orders.csv")
+        write_synthetic_orders(raw, args.skus, args.days)
+        daily = load_and_prepare_data(raw)
+
+    model = train_ghost_model(add_time_series_features(daily), path=None)
+    scale = 1e6 / len(daily)
+
+    standard, standard_trace, standard_peak = measure(daily, model, compact=False)
+    compact, compact_trace, compact_peak = measure(daily, model, compact=True)
+
+    same = standard[["SKU", "Date"]].reset_index(drop=True).equals(
+        compact[["SKU", "Date"]].reset_index(drop=True)
+    )
+    assert same, "compact mode flagged different SKU-days"
+
+    stages = standard_trace[["stage", "py_peak_mb"]].merge(
+        compact_trace[["stage", "py_peak_mb"]], on="stage",
+        suffixes=("_standard", "_compact"),
+    )
+    stages.iloc[:, 1:] *= scale
+
+    print(f"daily rows={len(daily)} flagged={len(standard)} (identical in both modes)")
+    print("peak MB per 1M SKU-days")
+    print(stages.to_string(index=False, float_format="%.1f"))
+    print(f"{'whole run':>24} {standard_peak * scale:9.1f} {compact_peak * scale:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
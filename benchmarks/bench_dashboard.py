@@ -0,0 +1,68 @@
+"""
+Dashboard filter latency: full-table pandas path vs. the SKU-indexed store.
+
+    python benchmarks/bench_dashboard.py [--skus 2000] [--days 30 365 1825]
+
+For each history length, times one filter change (3 selected SKUs): the
+SKU bar-chart counts plus the 25-row record table.
+"""
+import argparse
+import tempfile
+
+from common import make_daily_df, timed
+
+from src.dashboard_store import DashboardStore, publish_results
+
+TABLE_COLUMNS = ["Date", "SKU", "daily_sales", "forecast_error", "ghost_demand"]
+
+
+def make_results(n_skus: int, n_days: int):
+    df = make_daily_df(n_skus, n_days)
+    df["SKU"] = df["SKU"].astype(str)
+    df["forecast_error"] = df["daily_sales"] - 3.0
+    df["ghost_demand"] = 1
+    return df
+
+
+def full_table(df, selected):
+    filtered = df[df["SKU"].isin(selected)]
+    counts = (
+        filtered.groupby("SKU").size()
+        .reset_index(name="ghost_cases")
+        .sort_values("ghost_cases", ascending=False)
+    )
+    return counts, filtered[TABLE_COLUMNS].head(25)
+
+
+def indexed(store, selected):
+    return store.sku_summary(selected), store.records(selected, TABLE_COLUMNS, limit=25)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skus", type=int, default=2_000)
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365, 1825])
+    args = parser.parse_args()
+
+    print(f"{'days':>6} {'rows':>10} {'publish_s':>10} {'full_ms':>9} {'store_ms':>9}")
+    for n_days in args.days:
+        df = make_results(args.skus, n_days)
+        selected = sorted(df["SKU"].unique())[:3]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            publish_s, directory = timed(publish_results, df, directory=f"{tmp}/store")
+            store = DashboardStore(directory)
+            indexed(store, selected)  # open the mapped columns once
+
+            full_s, (counts, table) = timed(full_table, df, selected, repeat=5)
+            store_s, (s_counts, s_table) = timed(indexed, store, selected, repeat=5)
+
+        assert counts["ghost_cases"].tolist() == s_counts["ghost_cases"].tolist()
+        assert (table.to_numpy() == s_table.to_numpy()).all()
+
+        print(f"{n_days:>6} {len(df):>10} {publish_s:10.2f} "
+              f"{full_s * 1000:9.2f} {store_s * 1000:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
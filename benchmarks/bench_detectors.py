@@ -0,0 +1,93 @@
+"""
+IsolationForest vs. the per-SKU MAD detector on the same features.
+
+    python benchmarks/bench_detectors.py [--skus 20000] [--days 60]
+        [--spikes 0.005] [--batches 1 100 10000]
+
+Injects multiplicative demand spikes into a share (--spikes) of the
+synthetic SKU-days, fits both detectors on the feature frame and
+reports fit time, detect_ghost_demand throughput, per-call predict
+latency, and how the two agree: flag overlap, rank correlation of their
+scores and the share of injected spikes each one flags.
+"""
+import argparse
+import tempfile
+
+from common import latency, make_daily_df, timed
+
+import numpy as np
+import pandas as pd
+
+from src.detectors import ForestDetector, MadDetector
+from src.feature_engineering import add_time_series_features
+from src.flat_forest import FlatForest
+from src.ml_model import FEATURES, detect_ghost_demand
+
+
+def spiked_daily(n_skus: int, n_days: int, share: float, seed: int = 7):
+    """make_daily_df with `share` of its rows multiplied 4-10x; returns (df, spiked mask)."""
+    rng = np.random.default_rng(seed)
+    daily = make_daily_df(n_skus, n_days)
+    daily["SKU"] = daily["SKU"].astype(str)
+    spiked = rng.random(len(daily)) < share
+    sales = daily["daily_sales"].to_numpy(copy=True)
+    sales[spiked] = (sales[spiked] + 1) * rng.integers(4, 11, spiked.sum())
+    daily["daily_sales"] = sales
+    return daily, spiked
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skus", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--spikes", type=float, default=0.005)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 100, 10_000])
+    args = parser.parse_args()
+
+    daily, spiked = spiked_daily(args.skus, args.days, args.spikes)
+    features = add_time_series_features(daily)
+    complete = features[FEATURES].notna().all(axis=1).to_numpy()
+    rows = features[complete]
+    print(f"rows={len(features)} complete={len(rows)} injected spikes={spiked.sum()}")
+
+    fit_forest_s, forest = timed(ForestDetector(n_jobs=1).fit, features)
+    fit_mad_s, mad = timed(MadDetector().fit, features)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        FlatForest.from_sklearn(forest.model, FEATURES).save(tmp)
+        flat = ForestDetector(FlatForest.load(tmp))
+
+        detectors = {"forest": forest, "flat_forest": flat, "mad": mad}
+        fit_s = {"forest": fit_forest_s, "flat_forest": fit_forest_s, "mad": fit_mad_s}
+
+        print(f"\n{'detector':>12} {'fit_s':>7} {'detect_s':>9} {'rows/s':>11} "
+              + " ".join(f"{f'p50/p99 ms @{b}':>22}" for b in args.batches))
+        flagged = {}
+        for name, detector in detectors.items():
+            detect_s, flagged[name] = timed(detect_ghost_demand, features, detector)
+            cells = []
+            for batch in args.batches:
+                p50, p99 = latency(detector.predict, rows.iloc[:batch])
+                cells.append(f"{p50 * 1e3:>10.3f}/{p99 * 1e3:<11.3f}")
+            print(f"{name:>12} {fit_s[name]:>7.2f} {detect_s:>9.2f} "
+                  f"{len(features) / detect_s:>11,.0f} " + " ".join(cells))
+
+    forest_rows = set(flagged["forest"].index)
+    mad_rows = set(flagged["mad"].index)
+    both = len(forest_rows & mad_rows)
+    spike_rows = set(features.index[spiked[features.index]])
+    rank_corr = pd.Series(forest.score(rows)).rank().corr(pd.Series(mad.score(rows)).rank())
+
+    print(f"\nflagged: forest={len(forest_rows)} mad={len(mad_rows)} both={both} "
+          f"jaccard={both / max(len(forest_rows | mad_rows), 1):.3f}")
+    print(f"mad vs forest: precision={both / max(len(mad_rows), 1):.3f} "
+          f"recall={both / max(len(forest_rows), 1):.3f}  "
+          f"score rank correlation={rank_corr:.3f}")
+    print(f"injected spikes flagged: forest={len(forest_rows & spike_rows) / max(len(spike_rows), 1):.3f} "
+          f"mad={len(mad_rows & spike_rows) / max(len(spike_rows), 1):.3f}")
+    print(f"flat forest identical to sklearn: "
+          f"{flagged['flat_forest'].index.equals(flagged['forest'].index)}")
+
+
+if __name__ == "__main__":
+    main()
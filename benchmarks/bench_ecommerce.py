@@ -0,0 +1,84 @@
+"""
+Integer hash-join ingest vs. chained pd.merge for the Ecommerce Order Dataset.
+
+    python benchmarks/bench_ecommerce.py [--orders 100000 1000000]
+        [--dataset "data/Ecommerce Order Dataset"]
+
+The baseline reads the five tables one after another and chains
+pd.merge on the string IDs (Products deduplicated first, or every
+duplicate row would multiply the items); it is timed with the default C
+CSV parser and with pyarrow's, to separate parsing from joining. All
+build the paid-only, state-filtered daily_df and must agree.
+"""
+import argparse
+import os
+import tempfile
+
+from common import timed, write_ecommerce_tables
+
+import pandas as pd
+
+from src.ecommerce_orders import ECOMMERCE_DIR, SPLITS, TABLES, build_daily_demand
+
+STATES = ["SP", "RJ", "MG"]
+
+
+def chained_merge(directory: str, engine: str = "c") -> pd.DataFrame:
+    def read(name):
+        parts = [
+            pd.read_csv(os.path.join(directory, split, TABLES[name][0]), engine=engine)
+            for split in SPLITS
+            if os.path.exists(os.path.join(directory, split, TABLES[name][0]))
+        ]
+        return pd.concat(parts, ignore_index=True)
+
+    df = (
+        read("items")
+        .merge(read("orders"), on="order_id")
+        .merge(read("products").drop_duplicates("product_id"), on="product_id")
+        .merge(read("payments")[["order_id"]].drop_duplicates(), on="order_id")
+        .merge(read("customers"), on="customer_id")
+    )
+    df = df[df["customer_state"].isin(STATES)]
+    df["Date"] = pd.to_datetime(df["order_purchase_timestamp"]).dt.normalize()
+    return (
+        df.groupby(["Date", "product_id"], as_index=False)
+        .size()
+        .rename(columns={"product_id": "SKU", "size": "daily_sales"})
+        .sort_values(["SKU", "Date"])
+        .reset_index(drop=True)
+    )
+
+
+def compare(label: str, directory: str, repeat: int) -> None:
+    merge_s, expected = timed(chained_merge, directory, repeat=repeat)
+    arrow_s, from_arrow = timed(chained_merge, directory, "pyarrow", repeat=repeat)
+    join_s, result = timed(
+        build_daily_demand, directory, states=STATES, paid_only=True, repeat=repeat
+    )
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(result, from_arrow, check_dtype=False)
+    print(f"{label:>16} {len(result):>10} {merge_s:>9.2f} {arrow_s:>11.2f} "
+          f"{join_s:>9.2f} {merge_s / join_s:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dataset", default=ECOMMERCE_DIR)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'orders':>16} {'sku_days':>10} {'merge_s':>9} {'merge_pa_s':>11} "
+          f"{'join_s':>9} {'speedup':>9}")
+    if os.path.isdir(args.dataset):
+        compare("dataset", args.dataset, args.repeat)
+
+    for n_orders in args.orders:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_ecommerce_tables(tmp, n_orders)
+            compare(str(n_orders), tmp, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
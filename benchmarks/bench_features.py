@@ -0,0 +1,75 @@
+"""
+Vectorized vs. lambda-transform feature engineering.
+
+    python benchmarks/bench_features.py [--sizes 10000 100000 1000000] [--days 14]
+
+The lambda baseline calls Python once per SKU, so it is skipped above
+--baseline-limit SKUs.
+"""
+import argparse
+
+from common import make_daily_df, timed
+
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering import add_time_series_features
+
+
+def lambda_baseline(df: pd.DataFrame) -> pd.DataFrame:
+    # Pre-vectorization implementation, kept here for comparison only
+    df = df.sort_values(["SKU", "Date"]).copy()
+
+    df["rolling_mean_7"] = (
+        df.groupby("SKU")["daily_sales"]
+        .transform(lambda x: x.rolling(7).mean())
+    )
+    df["rolling_std_7"] = (
+        df.groupby("SKU")["daily_sales"]
+        .transform(lambda x: x.rolling(7).std())
+    )
+    df["demand_change"] = df.groupby("SKU")["daily_sales"].pct_change()
+    df["volatility_ratio"] = (
+        df["rolling_std_7"] / (df["rolling_mean_7"] + 1e-6)
+    )
+    df["forecast_error"] = (
+        df["daily_sales"] - df.groupby("SKU")["daily_sales"].shift(1)
+    )
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--baseline-limit", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'skus':>10} {'rows':>11} {'lambda_s':>10} {'vector_s':>10} "
+          f"{'multi_s':>10} {'speedup':>8}")
+
+    for n_skus in args.sizes:
+        df = make_daily_df(n_skus, args.days)
+
+        vec_s, vec = timed(add_time_series_features, df)
+        multi_s, _ = timed(add_time_series_features, df, windows=(7, 14, 28))
+
+        if n_skus <= args.baseline_limit:
+            base_s, base = timed(lambda_baseline, df)
+            pd.testing.assert_frame_equal(
+                base, vec, check_exact=True
+            )
+            speedup = f"{base_s / vec_s:7.1f}x"
+            base_col = f"{base_s:10.2f}"
+        else:
+            speedup = f"{'-':>8}"
+            base_col = f"{'skipped':>10}"
+
+        print(f"{n_skus:>10} {len(df):>11} {base_col} {vec_s:10.2f} "
+              f"{multi_s:10.2f} {speedup}")
+
+
+if __name__ == "__main__":
+    np.seterr(all="ignore")
+    main()
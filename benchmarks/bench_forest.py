@@ -0,0 +1,54 @@
+"""
+sklearn IsolationForest.predict vs. the flat array-backed scorer.
+
+    python benchmarks/bench_forest.py [--batches 1 100 100000]
+
+Fits the production configuration (300 trees) on synthetic features,
+exports it, reloads it memory-mapped and reports per-call latency.
+"""
+import argparse
+import tempfile
+
+from common import latency, make_daily_df
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from src.feature_engineering import add_time_series_features
+from src.flat_forest import FlatForest
+from src.ml_model import FEATURES
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 100, 100_000])
+    args = parser.parse_args()
+
+    n_skus = max(2_000, max(args.batches) // 20)
+    df = add_time_series_features(make_daily_df(n_skus, 30)).dropna(subset=FEATURES)
+    X = df[FEATURES].to_numpy(dtype=np.float32)
+
+    model = IsolationForest(
+        n_estimators=300, max_samples=256, max_features=0.8,
+        contamination=0.02, random_state=42
+    ).fit(X)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        FlatForest.from_sklearn(model, FEATURES).save(tmp)
+        flat = FlatForest.load(tmp)
+
+        print(f"{'batch':>8} {'sklearn_p50_ms':>15} {'sklearn_p99_ms':>15} "
+              f"{'flat_p50_ms':>12} {'flat_p99_ms':>12}")
+
+        for batch in args.batches:
+            Xb = X[:batch]
+            assert np.array_equal(model.predict(Xb), flat.predict(Xb))
+
+            sk50, sk99 = latency(model.predict, Xb)
+            fl50, fl99 = latency(flat.predict, Xb)
+            print(f"{batch:>8} {sk50 * 1e3:15.3f} {sk99 * 1e3:15.3f} "
+                  f"{fl50 * 1e3:12.3f} {fl99 * 1e3:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Row-loop OR-Tools model vs. array-built / closed-form optimize_production.
+
+    python benchmarks/bench_optimization.py [--sizes 1000 100000 1000000]
+
+The row-loop baseline creates one NumVar per row and writes solutions
+back with df.loc, so it is skipped above --baseline-limit rows.
+"""
+import argparse
+
+from common import timed
+
+import numpy as np
+import pandas as pd
+from ortools.linear_solver import pywraplp
+
+from src.optimization import (
+    MAX_REDUCTION_RATIO,
+    UNIT_PRODUCTION_COST,
+    UNIT_WASTE_PENALTY,
+    optimize_production,
+)
+
+
+def make_ghost_df(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rolling_mean = rng.gamma(2.0, 2.0, n_rows)
+    return pd.DataFrame({
+        "daily_sales": rng.poisson(rolling_mean * 2),
+        "rolling_mean_7": rolling_mean,
+        "forecast_error": rng.normal(2.0, 3.0, n_rows),
+    })
+
+
+def row_loop_baseline(ghost_df: pd.DataFrame) -> pd.DataFrame:
+    # Pre-dispatch implementation, kept here for comparison only
+    df = ghost_df[
+        (ghost_df["forecast_error"] > 0) & (ghost_df["rolling_mean_7"] > 0)
+    ].copy()
+
+    solver = pywraplp.Solver.CreateSolver("GLOP")
+    reduction_vars = {}
+    for idx, row in df.iterrows():
+        max_cut = max(0.0, row["forecast_error"] * MAX_REDUCTION_RATIO)
+        reduction_vars[idx] = solver.NumVar(0.0, max_cut, f"cut_{idx}")
+
+    objective = solver.Objective()
+    for var in reduction_vars.values():
+        objective.SetCoefficient(var, UNIT_PRODUCTION_COST + UNIT_WASTE_PENALTY)
+    objective.SetMaximization()
+
+    status = solver.Solve()
+
+    df["recommended_cut"] = 0.0
+    if status == pywraplp.Solver.OPTIMAL:
+        for idx, var in reduction_vars.items():
+            df.loc[idx, "recommended_cut"] = var.solution_value()
+
+    df["cost_saving"] = df["recommended_cut"] * UNIT_PRODUCTION_COST
+    df["waste_reduction_value"] = df["recommended_cut"] * UNIT_WASTE_PENALTY
+
+    ghost_df["recommended_cut"] = 0.0
+    ghost_df["cost_saving"] = 0.0
+    ghost_df["waste_reduction_value"] = 0.0
+    ghost_df.update(df[["recommended_cut", "cost_saving", "waste_reduction_value"]])
+    return ghost_df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--baseline-limit", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'row_loop_s':>11} {'ortools_s':>10} {'closed_s':>10}")
+
+    for n_rows in args.sizes:
+        df = make_ghost_df(n_rows)
+
+        closed_s, closed = timed(optimize_production, df.copy())
+        ortools_s, solved = timed(optimize_production, df.copy(), method="ortools")
+        pd.testing.assert_frame_equal(closed, solved)
+
+        if n_rows <= args.baseline_limit:
+            loop_s, loop = timed(row_loop_baseline, df.copy())
+            pd.testing.assert_frame_equal(closed, loop)
+            loop_col = f"{loop_s:11.3f}"
+        else:
+            loop_col = f"{'skipped':>11}"
+
+        print(f"{n_rows:>10} {loop_col} {ortools_s:10.3f} {closed_s:10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Scaling benchmark of the full detection pipeline on synthetic orders.
+
+    python benchmarks/bench_pipeline.py [--skus 1000 10000 100000] [--days 91]
+        [--memory tracemalloc|rss] [--output traces/bench_pipeline.csv]
+        [--baseline traces/bench_pipeline_before.csv --threshold 1.25]
+
+For each (skus, days) point, writes a deterministic order export
+(promo spikes + injected ghost demand, see write_synthetic_orders) and
+runs load_and_prepare_data -> add_time_series_features ->
+train_ghost_model -> detect_ghost_demand -> generate_explanations ->
+optimize_production -> evaluate_impact under src.profiling, recording
+wall/CPU time, memory and rows per stage.
+
+Results are one CSV/JSON row per (point, stage). With --baseline, stages
+whose wall time (above --min-seconds) or memory grew by more than
+--threshold x at the same point are listed and the exit status is 1.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from common import write_synthetic_orders
+
+import pandas as pd
+
+from src.data_cleaning import load_and_prepare_data
+from src.evaluation import evaluate_impact
+from src.explainability import generate_explanations
+from src.feature_engineering import add_time_series_features
+from src.ml_model import detect_ghost_demand, train_ghost_model
+from src.optimization import optimize_production
+from src.profiling import RSS_NOISE_MB, ProfileRun
+
+POINT = ["skus", "days"]
+
+
+def run_point(n_skus: int, n_days: int, args) -> pd.DataFrame:
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = os.path.join(tmp, "orders.csv")
+        ghosts = write_synthetic_orders(
+            raw, n_skus, n_days, mean_orders=args.mean_orders,
+            promo_rate=args.promo_rate, ghost_rate=args.ghost_rate, seed=args.seed,
+        )
+        with open(raw) as f:
+            raw_rows = sum(1 for _ in f) - 1
+
+        with ProfileRun(memory=args.memory) as run:
+            df = load_and_prepare_data(raw)
+            df = add_time_series_features(df)
+            model = train_ghost_model(df, path=None)
+            flagged = detect_ghost_demand(df, model)
+            out = generate_explanations(flagged)
+            out = optimize_production(out)
+            evaluate_impact(out)
+
+    trace = run.to_frame()
+    trace.insert(0, "days", n_days)
+    trace.insert(0, "skus", n_skus)
+    trace["raw_rows"] = raw_rows
+
+    # How many injected ghost SKU-days the detector flagged
+    hits = ghosts.merge(flagged[["SKU", "Date"]], on=["SKU", "Date"])
+    trace["ghost_recall"] = len(hits) / max(len(ghosts), 1)
+    return trace
+
+
+def check_regressions(results: pd.DataFrame, baseline: pd.DataFrame,
+                      threshold: float, min_seconds: float = 0.05) -> pd.DataFrame:
+    merged = results.merge(
+        baseline, on=POINT + ["stage"], suffixes=("", "_baseline")
+    )
+    merged["wall_ratio"] = merged["wall_s"] / merged["wall_s_baseline"]
+    if results["py_peak_mb"].notna().any():
+        merged["memory_ratio"] = merged["py_peak_mb"] / merged["py_peak_mb_baseline"]
+    else:
+        # The process peak is cumulative, so compare what each stage added
+        merged["memory_ratio"] = (
+            merged["rss_delta_mb"].clip(lower=RSS_NOISE_MB)
+            / merged["rss_delta_mb_baseline"].clip(lower=RSS_NOISE_MB)
+        )
+    # Millisecond stages are mostly timer noise
+    slower = (merged["wall_ratio"] > threshold) & (merged["wall_s"] >= min_seconds)
+    failed = slower | (merged["memory_ratio"] > threshold)
+    return merged.loc[failed, POINT + ["stage", "wall_ratio", "memory_ratio"]]
+
+
+def _read(path: str) -> pd.DataFrame:
+    return pd.read_json(path) if path.endswith(".json") else pd.read_csv(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skus", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--days", type=int, nargs="+", default=[91])
+    parser.add_argument("--mean-orders", type=float, default=2.0)
+    parser.add_argument("--promo-rate", type=float, default=0.01)
+    parser.add_argument("--ghost-rate", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--memory", choices=["tracemalloc", "rss"], default="tracemalloc")
+    parser.add_argument("--output", default="traces/bench_pipeline.csv")
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="ignore wall-time ratios of stages faster than this")
+    args = parser.parse_args()
+
+    traces = []
+    for n_days in args.days:
+        for n_skus in args.skus:
+            trace = run_point(n_skus, n_days, args)
+            traces.append(trace)
+            print(f"skus={n_skus} days={n_days} raw_rows={trace['raw_rows'].iloc[0]} "
+                  f"ghost_recall={trace['ghost_recall'].iloc[0]:.2f}")
+            print(trace[["stage", "wall_s", "cpu_s", "py_peak_mb", "rss_delta_mb",
+                         "rows_in", "rows_out"]].to_string(index=False, float_format="%.3f"))
+
+    results = pd.concat(traces, ignore_index=True)
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if args.output.endswith(".json"):
+        results.to_json(args.output, orient="records", indent=2)
+    else:
+        results.to_csv(args.output, index=False)
+
+    if args.baseline:
+        failed = check_regressions(
+            results, _read(args.baseline), args.threshold, args.min_seconds
+        )
+        if len(failed):
+            print(f"\nRegressions over {args.threshold}x:")
+            print(failed.to_string(index=False, float_format="%.2f"))
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold}x against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Cold vs. warm-started re-solves of the rolling-horizon planner.
+
+    python benchmarks/bench_planning.py [--skus 3000] [--days 10] [--workers 0]
+        [--capacity 3000] [--what-if 0.9]
+
+Plans --days consecutive horizons with one planner (warm: group models
+are kept between days) and, for each day, the same horizon with a fresh
+planner seeded with the same opening stock (cold). With --what-if, each
+day is then re-planned with capacity and budgets scaled by that factor
+(commit=False), warm and cold.
+
+Rolling to the next day rewrites one slot of every SKU block, so the
+warm basis saves some iterations but little wall time. Same-horizon
+what-ifs only move a few coupling bounds and are where reuse pays off.
+"""
+import argparse
+
+from common import make_daily_df, timed
+
+import pandas as pd
+
+from src.feature_engineering import add_time_series_features
+from src.planning import ProductionPlanner
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skus", type=int, default=3_000)
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--capacity", type=float, default=None)
+    parser.add_argument("--cold-only", action="store_true")
+    parser.add_argument("--what-if", type=float, default=None, metavar="FACTOR")
+    args = parser.parse_args()
+
+    df = add_time_series_features(make_daily_df(args.skus, args.days + 30)).dropna()
+    df["SKU"] = df["SKU"].astype(str)
+    df["category"] = "cat-" + (df["SKU"].str[-3:].astype(int) % args.categories).astype(str)
+    budgets = {
+        f"cat-{i}": 50.0 * args.skus / args.categories
+        for i in range(args.categories)
+    }
+
+    first_day = df["Date"].min()
+
+    header = (f"{'day':>4} {'groups':>7} {'reused':>7} {'warm_s':>8} {'warm_it':>9} "
+              f"{'cold_s':>8} {'cold_it':>9}")
+    if args.what_if:
+        header += f" {'wi_warm_s':>9} {'wi_warm_it':>10} {'wi_cold_s':>9} {'wi_cold_it':>10}"
+    print(header)
+
+    with ProductionPlanner(workers=args.workers, capacity=args.capacity,
+                           budgets=budgets, warm_start=not args.cold_only) as warm:
+        for day in range(args.days):
+            start = first_day + pd.Timedelta(days=day)
+
+            with ProductionPlanner(capacity=args.capacity, budgets=budgets) as cold:
+                cold.opening_inventory = warm.opening_inventory.copy()
+                cold.sku_attrs = warm.sku_attrs.copy()
+                cold_s, _ = timed(
+                    cold.plan, df, start, category_col="category", commit=False
+                )
+                cold_stats = cold.last_stats
+
+            opening = warm.opening_inventory.copy()
+            warm_s, _ = timed(warm.plan, df, start, category_col="category")
+            stats = warm.last_stats
+
+            line = (f"{day:>4} {stats['groups']:>7} {stats['warm_groups']:>7} {warm_s:8.2f} "
+                    f"{stats['iterations']:>9} {cold_s:8.2f} "
+                    f"{cold_stats['iterations']:>9}")
+            if args.what_if:
+                line += " " + what_if(warm, df, start, opening, args.what_if)
+            print(line)
+
+
+def what_if(warm: ProductionPlanner, df: pd.DataFrame, start, opening: pd.Series,
+            factor: float) -> str:
+    """
+    The day's horizon again, from the same opening stock, with capacity
+    and budgets scaled: warm vs. a fresh planner.
+    """
+    state = warm.capacity, warm.budgets, warm.opening_inventory
+    scaled_capacity = state[0] * factor if state[0] is not None else None
+    scaled_budgets = {k: v * factor for k, v in state[1].items()} if state[1] else state[1]
+
+    warm.capacity, warm.budgets, warm.opening_inventory = scaled_capacity, scaled_budgets, opening
+    try:
+        warm_s, _ = timed(warm.plan, df, start, category_col="category", commit=False)
+        warm_it = warm.last_stats["iterations"]
+    finally:
+        warm.capacity, warm.budgets, warm.opening_inventory = state
+
+    with ProductionPlanner(capacity=scaled_capacity, budgets=scaled_budgets) as cold:
+        cold.opening_inventory = opening.copy()
+        cold.sku_attrs = warm.sku_attrs.copy()
+        cold_s, _ = timed(cold.plan, df, start, category_col="category", commit=False)
+        cold_it = cold.last_stats["iterations"]
+
+    return f"{warm_s:9.2f} {warm_it:>10} {cold_s:9.2f} {cold_it:>10}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Sketch prefilter vs. exhaustive scoring on a long-tail catalogue.
+
+    python benchmarks/bench_prefilter.py [--head 5000] [--tail 200000] [--days 365]
+        [--min-units 0 50] [--min-growth 2.0] [--sample 0.05] [--chunksize 500000]
+
+A few --head SKUs sell most days; --tail SKUs sell on ~1 day in 30.
+For each --min-units threshold, times features + detection on the
+prefiltered daily_df against the exhaustive run, and compares the
+sampled recall estimate with the exact recall.
+
+The days are also written as a raw order export and read back with
+--chunksize, once feeding the sketch per chunk and once building it
+afterwards from daily_df, and end to end (ingest + prefilter +
+detection against ingest + detection).
+"""
+import os
+import tempfile
+
+import argparse
+
+from common import timed
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import DATE_FORMAT, load_and_prepare_data
+from src.feature_engineering import add_time_series_features
+from src.ml_model import detect_ghost_demand, train_ghost_model
+from src.prefilter import DemandSketch, SkuPrefilter, estimate_recall_loss
+
+
+def long_tail_daily(n_head: int, n_tail: int, n_days: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rate = np.concatenate([
+        rng.lognormal(np.log(5.0), 0.7, n_head),
+        rng.lognormal(np.log(1 / 30), 0.5, n_tail),
+    ])
+    active = rng.random((n_head + n_tail, n_days)) < 1 - np.exp(-rate[:, None])
+    sku_ids, day_ids = np.nonzero(active)
+    sales = 1 + rng.poisson(np.maximum(rate[sku_ids] - 1, 0))
+
+    names = np.array([f"SKU-{i:07d}" for i in range(n_head + n_tail)], dtype=object)
+    return pd.DataFrame({
+        "Date": pd.Timestamp("2022-01-01") + pd.to_timedelta(day_ids, unit="D"),
+        "SKU": pd.Series(names[sku_ids], dtype=str),
+        "daily_sales": sales.astype(np.int64),
+    })
+
+
+def detect(daily, model):
+    return detect_ghost_demand(add_time_series_features(daily), model)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--head", type=int, default=5_000)
+    parser.add_argument("--tail", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--min-units", type=int, nargs="+", default=[0, 50, 200])
+    parser.add_argument("--min-growth", type=float, default=None)
+    parser.add_argument("--sample", type=float, default=0.05)
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    args = parser.parse_args()
+
+    daily = long_tail_daily(args.head, args.tail, args.days)
+    model = train_ghost_model(add_time_series_features(daily), path=None)
+
+    full_s, full = timed(detect, daily, model)
+    print(f"daily rows={len(daily)} skus={daily['SKU'].nunique()} "
+          f"exhaustive: {full_s:.2f}s, {len(full)} flagged")
+
+    sketch_s, sketch = timed(lambda: _sketch(daily))
+    print(f"sketch build {sketch_s:.2f}s, {sketch.nbytes / 2 ** 20:.1f} MB")
+
+    print(f"{'min_units':>9} {'skipped':>9} {'time_s':>7} {'speedup':>8} "
+          f"{'recall':>7} {'est':>7} {'act_recall':>10} {'act_est':>8}")
+    actionable = (full["forecast_error"] > 0) & (full["rolling_mean_7"] > 0)
+    for min_units in args.min_units:
+        prefilter = SkuPrefilter(min_units=min_units, min_growth=args.min_growth)
+        kept_s, flagged = timed(lambda: detect(prefilter.apply(daily, sketch), model))
+        kept = prefilter.apply(daily, sketch)
+
+        estimate = estimate_recall_loss(daily, kept, flagged, model, sample=args.sample)
+        found = full.merge(flagged[["SKU", "Date"]], on=["SKU", "Date"])
+        found_act = (found["forecast_error"] > 0) & (found["rolling_mean_7"] > 0)
+        print(f"{min_units:>9} {prefilter.report['skus_skipped']:>9} {kept_s:>7.2f} "
+              f"{full_s / kept_s:>7.1f}x {len(found) / max(len(full), 1):>7.3f} "
+              f"{estimate['est_recall_flagged']:>7.3f} "
+              f"{found_act.sum() / max(actionable.sum(), 1):>10.3f} "
+              f"{estimate['est_recall_actionable']:>8.3f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "orders.csv")
+        write_export(daily, path)
+        bench_ingest(path, args, model, full_s)
+
+
+def write_export(daily: pd.DataFrame, path: str) -> None:
+    """One order row per SKU-day, in the raw export's layout."""
+    pd.DataFrame({
+        "Date": daily["Date"].dt.strftime(DATE_FORMAT),
+        "SKU": daily["SKU"],
+        "Status": "Shipped",
+        "Qty": daily["daily_sales"],
+    }).to_csv(path, index=False)
+
+
+def bench_ingest(path: str, args, model, detect_s: float) -> None:
+    def fed():
+        sketch = DemandSketch()
+        return load_and_prepare_data(path, args.chunksize, sketch=sketch), sketch
+
+    def after():
+        daily = load_and_prepare_data(path, args.chunksize)
+        return daily, _sketch(daily)
+
+    plain_s, _ = timed(load_and_prepare_data, path, args.chunksize)
+    fed_s, (daily, sketch) = timed(fed)
+    after_s, _ = timed(after)
+    print(f"ingest (chunksize={args.chunksize}): {plain_s:.2f}s, "
+          f"feeding the sketch {fed_s:.2f}s, sketch afterwards {after_s:.2f}s")
+
+    for min_units in args.min_units:
+        prefilter = SkuPrefilter(min_units=min_units, min_growth=args.min_growth)
+        kept_s, _ = timed(lambda: detect(prefilter.apply(daily, sketch), model))
+        total = plain_s + detect_s
+        filtered = fed_s + kept_s
+        print(f"end to end, min_units={min_units}: {filtered:.2f}s vs "
+              f"{total:.2f}s exhaustive ({total / filtered:.1f}x)")
+
+
+def _sketch(daily):
+    sketch = DemandSketch()
+    sketch.update(daily)
+    return sketch
+
+
+if __name__ == "__main__":
+    main()
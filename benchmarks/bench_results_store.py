@@ -0,0 +1,73 @@
+"""
+Results store vs. the flat results CSV.
+
+    python benchmarks/bench_results_store.py [--skus 2000] [--days 365]
+
+Times writing one more day (CSV: rewrite everything; store: one
+partition + one SQL day), and reading 3 SKUs over a 30-day window
+(CSV: parse everything then filter; store: SQL index / Parquet pushdown).
+"""
+import argparse
+import os
+import tempfile
+
+from common import make_daily_df, timed
+
+import pandas as pd
+
+from src.results_store import ResultsStore
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skus", type=int, default=2_000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    df = make_daily_df(args.skus, args.days)
+    df["SKU"] = df["SKU"].astype(str)
+    df["forecast_error"] = df["daily_sales"] - 3.0
+    df["ghost_demand"] = (df["daily_sales"] > 6).astype(int)
+
+    last_day = df["Date"].max()
+    history, new_day = df[df["Date"] < last_day], df[df["Date"] == last_day]
+    skus = sorted(df["SKU"].unique())[:3]
+    start, end = last_day - pd.Timedelta(days=29), last_day
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "results.csv")
+        history.to_csv(csv_path, index=False)
+
+        with ResultsStore(os.path.join(tmp, "store")) as store:
+            load_s, _ = timed(store.write, history)
+
+            csv_write_s, _ = timed(lambda: df.to_csv(csv_path, index=False))
+            store_write_s, _ = timed(store.write, new_day)
+
+            def read_csv():
+                full = pd.read_csv(csv_path, parse_dates=["Date"])
+                return full[
+                    full["SKU"].isin(skus)
+                    & full["Date"].between(start, end)
+                    & (full["ghost_demand"] == 1)
+                ]
+
+            csv_read_s, expected = timed(read_csv)
+            sql_s, from_sql = timed(
+                store.read, skus, start, end, ghost_only=True, engine="sql"
+            )
+            parquet_s, from_parquet = timed(
+                store.read, skus, start, end, ghost_only=True, engine="parquet"
+            )
+
+    assert len(expected) == len(from_sql) == len(from_parquet)
+
+    print(f"rows={len(df)} (initial store load {load_s:.1f}s)")
+    print(f"append one day   csv rewrite {csv_write_s * 1000:9.1f} ms   "
+          f"store {store_write_s * 1000:8.1f} ms")
+    print(f"3 SKUs x 30 days csv parse   {csv_read_s * 1000:9.1f} ms   "
+          f"sql {sql_s * 1000:8.1f} ms   parquet {parquet_s * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
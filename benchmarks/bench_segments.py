@@ -0,0 +1,71 @@
+"""
+Per-segment detector family vs. one global forest.
+
+    python benchmarks/bench_segments.py [--skus 20000] [--days 60]
+        [--segments 40] [--workers 1 4] [--cache-sizes 4 64]
+
+Spreads synthetic SKUs over --segments SKU prefixes, trains the segment
+family with each --workers count, then times detect_ghost_demand through
+SegmentedDetector with each LRU --cache-sizes bound (model loads /
+evictions and peak RSS reported), against the single global forest.
+"""
+import argparse
+import resource
+import tempfile
+
+from common import make_daily_df, timed
+
+import numpy as np
+
+from src.detectors import ForestDetector
+from src.feature_engineering import add_time_series_features
+from src.ml_model import detect_ghost_demand
+from src.segments import SegmentedDetector, train_segment_models
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skus", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--segments", type=int, default=40)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--cache-sizes", type=int, nargs="+", default=[4, 64])
+    args = parser.parse_args()
+
+    daily = make_daily_df(args.skus, args.days)
+    sku_ids = daily["SKU"].cat.codes.to_numpy()
+    prefixes = np.array([f"S{i:03d}" for i in range(args.segments)], dtype=object)
+    daily["SKU"] = prefixes[sku_ids % args.segments] + "-" + daily["SKU"].astype(str)
+    features = add_time_series_features(daily)
+    print(f"rows={len(features)} segments={args.segments}")
+
+    global_fit_s, forest = timed(ForestDetector(n_jobs=1).fit, features)
+    global_s, global_flags = timed(detect_ghost_demand, features, forest)
+    print(f"global forest: fit {global_fit_s:.2f}s, detect {global_s:.2f}s, "
+          f"{len(global_flags)} flagged")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            train_s, index = timed(train_segment_models, features, directory=tmp,
+                                   workers=workers, min_rows=1_000)
+            print(f"train {len(index['segments'])} models on {workers} workers: {train_s:.2f}s")
+
+        print(f"\n{'cache':>6} {'detect_s':>9} {'loads':>6} {'evictions':>10} "
+              f"{'flagged':>8} {'peak_rss_mb':>12}")
+        for cache_size in args.cache_sizes:
+            detector = SegmentedDetector(tmp, cache_size=cache_size)
+            detect_s, flagged = timed(detect_ghost_demand, features, detector)
+            print(f"{cache_size:>6} {detect_s:>9.2f} {detector.stats['loads']:>6} "
+                  f"{detector.stats['evictions']:>10} {len(flagged):>8} "
+                  f"{peak_rss_mb():>12.0f}")
+
+        both = len(flagged.index.intersection(global_flags.index))
+        print(f"\nflagged by both the global and the segment models: {both}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Streaming detection over a replayed order event feed.
+
+    python benchmarks/bench_streaming.py [--skus 300] [--days 40]
+        [--rate 2000] [--max-wait-ms 200] [--score-every SECONDS]
+
+Writes a synthetic order export as time-ordered JSONL events, then a
+producer appends them to the tailed file at --rate events/s (0 = the
+whole file up front) while src.streaming consumes it. Reports event
+throughput, alert latency (event arrival -> alert) and checks that every
+SKU-day the batch pipeline flags was also alerted on.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from common import write_synthetic_orders
+
+import pandas as pd
+
+from src.data_cleaning import DATE_FORMAT, load_and_prepare_data
+from src.feature_engineering import add_time_series_features
+from src.ml_model import detect_ghost_demand, train_ghost_model
+from src.streaming import StreamingDetector, run_detector, tail_jsonl
+
+
+def write_events(raw: str) -> list:
+    df = pd.read_csv(raw)
+    day = pd.to_datetime(df["Date"], format=DATE_FORMAT)
+    df = df.iloc[day.argsort(kind="stable")]
+    return [json.dumps(record) + "\n" for record in df.to_dict("records")]
+
+
+async def replay(lines: list, path: str, rate: float, detector, args) -> list:
+    alerts = []
+    queue = asyncio.Queue(maxsize=args.queue_size)
+
+    with open(path, "w") as f:
+        if not rate:
+            f.writelines(lines)
+
+    source = asyncio.create_task(tail_jsonl(path, queue, follow=bool(rate),
+                                            poll_interval=0.01))
+    consumer = asyncio.create_task(run_detector(
+        detector, queue, alerts.append, max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms, score_every=args.score_every,
+    ))
+
+    if rate:
+        # Appends in 10 ms ticks at the target rate
+        start = time.perf_counter()
+        written = 0
+        with open(path, "a") as f:
+            while written < len(lines):
+                due = min(int((time.perf_counter() - start) * rate) + 1, len(lines))
+                f.writelines(lines[written:due])
+                f.flush()
+                written = due
+                await asyncio.sleep(0.01)
+        while detector.counters["events"] < len(lines):
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(args.max_wait_ms / 1000.0 + (args.score_every or 0.0))
+        source.cancel()
+        consumer.cancel()
+        await asyncio.gather(source, consumer, return_exceptions=True)
+    else:
+        await consumer
+    return alerts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skus", type=int, default=300)
+    parser.add_argument("--days", type=int, default=40)
+    parser.add_argument("--rate", type=float, default=2_000.0,
+                        help="events/s appended to the feed (0 = all at once)")
+    parser.add_argument("--max-batch", type=int, default=1_000)
+    parser.add_argument("--max-wait-ms", type=float, default=200.0)
+    parser.add_argument("--score-every", type=float, default=None)
+    parser.add_argument("--queue-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = os.path.join(tmp, "orders.csv")
+        write_synthetic_orders(raw, args.skus, args.days)
+        features = add_time_series_features(load_and_prepare_data(raw))
+        model = train_ghost_model(features, path=None)
+        flagged = detect_ghost_demand(features, model)
+        lines = write_events(raw)
+
+        detector = StreamingDetector(model)
+        start = time.perf_counter()
+        alerts = asyncio.run(
+            replay(lines, os.path.join(tmp, "events.jsonl"), args.rate, detector, args)
+        )
+        elapsed = time.perf_counter() - start
+
+    stats = detector.stats()
+    expected = set(zip(flagged["SKU"], flagged["Date"].dt.strftime("%Y-%m-%d")))
+    alerted = {(a["SKU"], a["Date"]) for a in alerts}
+
+    print(f"events={stats['events']} in {elapsed:.1f}s "
+          f"({stats['events'] / elapsed:,.0f}/s, target {args.rate or 'max'})")
+    print(f"batches={stats['batches']} scored={stats['scored']} "
+          f"late={stats['late_events']} bad={stats['bad_events']}")
+    latency = stats.get("latency_ms", {})
+    print(f"alerts={len(alerts)}  latency ms p50={latency.get('p50', 0):.0f} "
+          f"p99={latency.get('p99', 0):.0f} max={latency.get('max', 0):.0f}")
+    print(f"batch-flagged SKU-days alerted: {len(expected & alerted)}/{len(expected)}")
+
+
+if __name__ == "__main__":
+    main()
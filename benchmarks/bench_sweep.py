@@ -0,0 +1,83 @@
+"""
+Hyperparameter sweep: one fit per configuration vs. shared tree prefixes.
+
+    python benchmarks/bench_sweep.py [--skus 5000] [--days 30]
+        [--n-estimators 50 100 300] [--max-samples 128 256] [--workers 1]
+
+The naive sweep fits a fresh IsolationForest for every (n_estimators,
+max_samples, contamination, seed) configuration. run_sweep fits each
+(max_samples, seed) family once, at the largest n_estimators, and scores
+its prefixes. The benchmark also checks that a prefix flags exactly the
+rows that a freshly fitted smaller forest flags.
+"""
+import argparse
+import itertools
+
+from common import make_daily_df, timed
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from src.feature_engineering import add_time_series_features
+from src.flat_forest import FlatForest
+from src.ml_model import FEATURES, FOREST_PARAMS
+from src.sweep import SEEDS, run_sweep
+
+
+def naive_sweep(X, grid, seeds):
+    flagged = {}
+    for n, samples, contamination, seed in itertools.product(
+            grid["n_estimators"], grid["max_samples"], grid["contamination"], seeds):
+        model = IsolationForest(n_estimators=n, max_samples=samples,
+                                max_features=grid["max_features"][0],
+                                contamination=contamination, random_state=seed,
+                                n_jobs=1).fit(X)
+        flagged[n, samples, contamination, seed] = model.predict(X) == -1
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skus", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=[50, 100, 300])
+    parser.add_argument("--max-samples", type=int, nargs="+", default=[128, 256])
+    parser.add_argument("--contamination", type=float, nargs="+", default=[0.02, 0.05])
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    features = add_time_series_features(make_daily_df(args.skus, args.days))
+    X = features[FEATURES].dropna().to_numpy(dtype=np.float32)
+    grid = {
+        "n_estimators": args.n_estimators,
+        "max_samples": args.max_samples,
+        "max_features": [FOREST_PARAMS["max_features"]],
+        "contamination": args.contamination,
+    }
+    print(f"rows={len(X)} configurations="
+          f"{np.prod([len(v) for v in grid.values()]) * len(SEEDS)} (incl. seeds)")
+
+    naive_s, _ = timed(naive_sweep, X, grid, SEEDS)
+    shared_s, report = timed(run_sweep, features, grid, SEEDS, args.workers)
+    print(f"naive (one fit per configuration): {naive_s:.2f}s")
+    print(f"shared sweep (prefix reuse):       {shared_s:.2f}s  "
+          f"({naive_s / shared_s:.1f}x)")
+
+    # A prefix of the largest forest is the smaller forest
+    small, large = min(args.n_estimators), max(args.n_estimators)
+    params = {"max_samples": args.max_samples[0],
+              "max_features": FOREST_PARAMS["max_features"], "random_state": SEEDS[0]}
+    fresh = IsolationForest(n_estimators=small, n_jobs=1, **params).fit(X)
+    prefix = FlatForest.from_sklearn(
+        IsolationForest(n_estimators=large, n_jobs=1, **params).fit(X), FEATURES
+    ).prefix(small)
+    identical = np.array_equal(prefix.score_samples(X), fresh.score_samples(X))
+    print(f"prefix {small}/{large} scores identical to a fresh {small}-tree fit: {identical}")
+
+    print()
+    print(report[["n_estimators", "max_samples", "contamination", "stability",
+                  "agreement", "score_s_per_m", "frontier"]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
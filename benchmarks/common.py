@@ -0,0 +1,234 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Benchmarks are run as scripts from the repo root: `python benchmarks/<name>.py`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def make_daily_df(n_skus: int, n_days: int = 14, seed: int = 42) -> pd.DataFrame:
+    """
+    Synthetic daily_df in the shape load_and_prepare_data returns
+    (Date, SKU, daily_sales), with ~20% of SKU-days missing.
+    """
+    rng = np.random.default_rng(seed)
+
+    sku_ids = np.repeat(np.arange(n_skus), n_days)
+    day_ids = np.tile(np.arange(n_days), n_skus)
+    keep = rng.random(len(sku_ids)) > 0.2
+
+    sku_ids = sku_ids[keep]
+    day_ids = day_ids[keep]
+
+    # Categorical keeps the 1M-SKU grids inside a few GB of RAM
+    skus = pd.Categorical.from_codes(
+        sku_ids, [f"SKU-{i:07d}" for i in range(n_skus)]
+    )
+
+    return pd.DataFrame({
+        "Date": pd.Timestamp("2022-04-01") + pd.to_timedelta(day_ids, unit="D"),
+        "SKU": skus,
+        "daily_sales": rng.poisson(3, len(sku_ids)).astype(np.int64),
+    })
+
+
+def timed(fn, *args, repeat: int = 1, **kwargs):
+    """Returns (best wall seconds, last result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def latency(fn, X, budget_s: float = 2.0, max_calls: int = 1000):
+    """(p50, p99) seconds per call over up to `max_calls` calls."""
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_calls and (time.perf_counter() - start) < budget_s:
+        t0 = time.perf_counter()
+        fn(X)
+        samples.append(time.perf_counter() - t0)
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+ORDER_STATUSES = np.array([
+    "Shipped",
+    "Shipped - Delivered to Buyer",
+    "Cancelled",
+    "Delivered",
+    "Pending",
+    "Shipped - Returned to Seller",
+])
+ORDER_STATUS_WEIGHTS = [0.55, 0.2, 0.12, 0.05, 0.05, 0.03]
+
+
+def write_orders_csv(path: str, n_rows: int, n_skus: int = 5_000,
+                     n_days: int = 365, seed: int = 42,
+                     block_rows: int = 1_000_000) -> str:
+    """
+    Writes a synthetic order export with the Amazon report's ingest
+    columns (Date as %m-%d-%y, SKU, Status, Qty) in fixed-size blocks.
+    """
+    rng = np.random.default_rng(seed)
+    dates = (
+        pd.date_range("2022-01-01", periods=n_days).strftime("%m-%d-%y")
+        .to_numpy()
+    )
+    skus = np.array([f"SKU-{i:07d}" for i in range(n_skus)])
+
+    written = 0
+    header = True
+    while written < n_rows:
+        n = min(block_rows, n_rows - written)
+        block = pd.DataFrame({
+            "Date": dates[rng.integers(0, n_days, n)],
+            "SKU": skus[rng.integers(0, n_skus, n)],
+            "Status": ORDER_STATUSES[
+                rng.choice(len(ORDER_STATUSES), n, p=ORDER_STATUS_WEIGHTS)
+            ],
+            "Qty": rng.integers(0, 3, n),
+        })
+        block.to_csv(path, mode="w" if header else "a", header=header, index=False)
+        header = False
+        written += n
+
+    return path
+
+
+def write_synthetic_orders(path: str, n_skus: int, n_days: int,
+                           mean_orders: float = 2.0, promo_rate: float = 0.01,
+                           promo_days: int = 3, promo_lift: float = 4.0,
+                           ghost_rate: float = 0.005, ghost_lift: float = 8.0,
+                           seed: int = 42, skus_per_block: int = 2_000) -> pd.DataFrame:
+    """
+    Deterministic order export (Date, SKU, Status, Qty) with demand
+    structure, for scaling runs of the full pipeline.
+
+    Each SKU has a lognormal base order rate. Promotions multiply it by
+    promo_lift for promo_days consecutive days, starting on a promo_rate
+    fraction of SKU-days. Ghost demand multiplies single SKU-days by
+    ghost_lift with probability ghost_rate. Returns the injected ghost
+    SKU-days (SKU, Date).
+    """
+    rng = np.random.default_rng(seed)
+    day_index = pd.date_range("2022-01-01", periods=n_days)
+    dates = day_index.strftime("%m-%d-%y").to_numpy()
+
+    ghosts = []
+    header = True
+    for first in range(0, n_skus, skus_per_block):
+        skus = np.array([
+            f"SKU-{i:07d}" for i in range(first, min(first + skus_per_block, n_skus))
+        ])
+        n = len(skus)
+
+        rate = np.repeat(rng.lognormal(np.log(mean_orders), 0.5, (n, 1)), n_days, axis=1)
+
+        starts = rng.random((n, n_days)) < promo_rate
+        promo = starts.copy()
+        for lag in range(1, promo_days):
+            promo[:, lag:] |= starts[:, :-lag]
+        rate[promo] *= promo_lift
+
+        ghost = rng.random((n, n_days)) < ghost_rate
+        rate[ghost] *= ghost_lift
+        sku_ids, day_ids = np.nonzero(ghost)
+        ghosts.append(pd.DataFrame({"SKU": skus[sku_ids], "Date": day_index[day_ids]}))
+
+        counts = rng.poisson(rate).ravel()
+        cells = np.repeat(np.arange(n * n_days), counts)
+        n_orders = len(cells)
+
+        block = pd.DataFrame({
+            "Date": dates[cells % n_days],
+            "SKU": skus[cells // n_days],
+            "Status": ORDER_STATUSES[
+                rng.choice(len(ORDER_STATUSES), n_orders, p=ORDER_STATUS_WEIGHTS)
+            ],
+            "Qty": rng.integers(1, 4, n_orders),
+        })
+        block.to_csv(path, mode="w" if header else "a", header=header, index=False)
+        header = False
+
+    return pd.concat(ghosts, ignore_index=True)
+
+
+def _random_ids(rng, n: int, length: int = 12) -> np.ndarray:
+    alphabet = np.array(list("0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    chars = alphabet[rng.integers(0, len(alphabet), (n, length))]
+    return chars.view(f"<U{length}").ravel()
+
+
+def write_ecommerce_tables(directory: str, n_orders: int, n_products: int = 50_000,
+                           n_days: int = 365, seed: int = 42) -> str:
+    """
+    Synthetic Ecommerce Order Dataset (train/ and test/ df_*.csv) with
+    random 12-character IDs; one item, payment and customer per order,
+    and Products repeated once per item like the real files.
+    """
+    rng = np.random.default_rng(seed)
+    order_ids = _random_ids(rng, n_orders)
+    customer_ids = _random_ids(rng, n_orders)
+    product_ids = _random_ids(rng, n_products)
+    categories = np.array(["toys", "electronics", "fashion", "sports", "home"])
+    states = np.array(["SP", "RJ", "MG", "RS", "PR", "BA"])
+
+    stamps = (
+        np.datetime64("2017-01-01T00:00:00")
+        + rng.integers(0, n_days * 86_400, n_orders).astype("timedelta64[s]")
+    )
+    item_products = product_ids[rng.zipf(1.3, n_orders) % n_products]
+
+    tables = {
+        "df_Orders.csv": pd.DataFrame({
+            "order_id": order_ids,
+            "customer_id": customer_ids,
+            "order_purchase_timestamp": pd.Series(stamps).dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "order_approved_at": pd.Series(stamps).dt.strftime("%Y-%m-%d %H:%M:%S"),
+        }),
+        "df_OrderItems.csv": pd.DataFrame({
+            "order_id": order_ids,
+            "product_id": item_products,
+            "seller_id": _random_ids(rng, n_orders),
+            "price": rng.gamma(2.0, 40.0, n_orders).round(2),
+            "shipping_charges": rng.gamma(2.0, 10.0, n_orders).round(2),
+        }),
+        "df_Products.csv": pd.DataFrame({
+            "product_id": item_products,
+            "product_category_name": categories[
+                rng.integers(0, len(categories), n_orders)
+            ],
+            "product_weight_g": rng.integers(50, 5_000, n_orders).astype(float),
+        }),
+        "df_Payments.csv": pd.DataFrame({
+            "order_id": order_ids,
+            "payment_sequential": 1,
+            "payment_type": "credit_card",
+            "payment_value": rng.gamma(2.0, 50.0, n_orders).round(2),
+        }),
+        "df_Customers.csv": pd.DataFrame({
+            "customer_id": customer_ids,
+            "customer_zip_code_prefix": rng.integers(1_000, 99_999, n_orders),
+            "customer_state": states[rng.integers(0, len(states), n_orders)],
+        }),
+    }
+    # Products are a per-product attribute, so duplicates must agree
+    first = tables["df_Products.csv"].groupby("product_id")["product_category_name"]
+    tables["df_Products.csv"]["product_category_name"] = first.transform("first")
+
+    split = n_orders // 2
+    for name, table in tables.items():
+        for split_name, rows in (("train", slice(0, split)), ("test", slice(split, None))):
+            os.makedirs(os.path.join(directory, split_name), exist_ok=True)
+            table.iloc[rows].to_csv(
+                os.path.join(directory, split_name, name), index=False
+            )
+    return directory
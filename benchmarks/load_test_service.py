@@ -0,0 +1,147 @@
+"""
+Load test for the micro-batching scoring service (src/service.py).
+
+    python benchmarks/load_test_service.py [--requests 5000] [--concurrency 32]
+        [--rows 1] [--max-batch 256] [--max-wait-ms 5] [--model auto]
+    python benchmarks/load_test_service.py --url http://127.0.0.1:8765
+    python benchmarks/load_test_service.py --socket /tmp/ghost.sock
+
+Without --url / --socket a local instance is started in a subprocess on
+a free port and stopped afterwards. Each client thread keeps one
+keep-alive connection and posts --rows feature rows per request.
+Reports client-side latency percentiles, throughput and the server's
+/metrics (server latency and micro-batch sizes).
+"""
+import argparse
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from common import ROOT
+
+import numpy as np
+
+from src.ml_model import FEATURES
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str):
+        super().__init__("localhost")
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self._path)
+
+
+def _connect(url: str, socket_path: str):
+    if socket_path:
+        return _UnixHTTPConnection(socket_path)
+    parsed = urlparse(url)
+    return http.client.HTTPConnection(parsed.hostname, parsed.port)
+
+
+def _request(conn, method: str, path: str, body: bytes = None) -> dict:
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    data = json.loads(response.read())
+    if response.status != 200:
+        raise RuntimeError(f"{response.status}: {data}")
+    return data
+
+
+def _start_local(args):
+    cmd = [
+        sys.executable, "-m", "src.service", "--port", "0",
+        "--max-batch", str(args.max_batch),
+        "--max-wait-ms", str(args.max_wait_ms),
+        "--model", args.model,
+    ]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line:
+        proc.wait()
+        raise RuntimeError("Scoring service failed to start")
+    return proc, line.strip().rsplit(" ", 1)[-1]
+
+
+def _client(url, socket_path, bodies) -> list:
+    conn = _connect(url, socket_path)
+    latencies = []
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            _request(conn, "POST", "/score", body)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        conn.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--socket", default=None)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rows", type=int, default=1, help="feature rows per request")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--model", choices=["auto", "flat", "sklearn"], default="auto")
+    args = parser.parse_args()
+
+    proc = None
+    url = args.url
+    if url is None and args.socket is None:
+        proc, url = _start_local(args)
+
+    try:
+        rng = np.random.default_rng(42)
+        X = np.abs(rng.normal(3.0, 2.0, (args.requests, args.rows, len(FEATURES))))
+        bodies = [json.dumps({"rows": block.tolist()}).encode() for block in X]
+
+        # Warm-up request, also checks the service is reachable
+        conn = _connect(url, args.socket)
+        _request(conn, "POST", "/score", bodies[0])
+        conn.close()
+
+        per_client = [bodies[i::args.concurrency] for i in range(args.concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(
+                _client, [url] * args.concurrency,
+                [args.socket] * args.concurrency, per_client,
+            ))
+        elapsed = time.perf_counter() - start
+
+        latencies_ms = np.concatenate([np.asarray(r) for r in results]) * 1000.0
+
+        conn = _connect(url, args.socket)
+        server = _request(conn, "GET", "/metrics")
+        conn.close()
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    print(f"requests={args.requests} concurrency={args.concurrency} "
+          f"rows/request={args.rows}")
+    print(f"throughput      {args.requests / elapsed:10.1f} req/s "
+          f"({args.requests * args.rows / elapsed:.1f} rows/s)")
+    print(f"client latency  p50 {np.percentile(latencies_ms, 50):8.2f} ms  "
+          f"p99 {np.percentile(latencies_ms, 99):8.2f} ms")
+    print(f"server latency  p50 {server['latency_ms']['p50']:8.2f} ms  "
+          f"p99 {server['latency_ms']['p99']:8.2f} ms")
+    print(f"batch rows      p50 {server['batch_rows']['p50']:8.1f}     "
+          f"p99 {server['batch_rows']['p99']:8.1f}     "
+          f"mean {server['batch_rows']['mean']:.1f} over {server['batches']} batches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Walk-forward backtesting of detect -> optimize -> evaluate.
+
+Training / evaluation windows slide across the history. For every
+window and parameter combination (contamination, MAX_REDUCTION_RATIO
+and the cost constants), a forest is fitted on the training window and
+the test window's ghost cases are optimized and evaluated. The result
+is one row per (window, parameters) cell, with the summed blind_waste /
+optimized_waste / waste_saved.
+
+The feature matrix is computed once per daily_df and saved under
+BACKTEST_DIR; worker processes memory-map it. One task covers a window
+and a contamination, so its model is fitted once and shared by every
+optimization setting; its ghost cases are kept too. Finished cells are
+kept in results.parquet, keyed by their window, parameters and the
+source of the modules involved, so adding one parameter value only
+computes the new cells, and a new optimization value fits no model.
+
+    python -m src.backtest --contamination 0.01 0.02 --max-reduction-ratio 0.6 0.8
+"""
+import argparse
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.cache import load_frame, save_frame
+from src.data_cleaning import load_data
+from src.ecommerce_orders import ECOMMERCE_DIR, build_daily_demand
+from src.evaluation import evaluate_impact
+from src.feature_engineering import add_time_series_features
+from src.ml_model import FEATURES, detect_ghost_demand, train_ghost_model
+from src.optimization import (
+    MAX_REDUCTION_RATIO, UNIT_PRODUCTION_COST, UNIT_WASTE_PENALTY, optimize_production
+)
+from src.profiling import instrument
+
+BACKTEST_DIR = ".cache/backtest"
+
+# Grid parameters and their defaults
+PARAMS = {
+    "contamination": 0.02,
+    "max_reduction_ratio": MAX_REDUCTION_RATIO,
+    "unit_production_cost": UNIT_PRODUCTION_COST,
+    "unit_waste_penalty": UNIT_WASTE_PENALTY,
+}
+METRICS = [
+    "train_rows", "test_rows", "flagged", "actionable", "recommended_cut",
+    "blind_waste", "optimized_waste", "waste_saved", "cost_saving",
+    "waste_reduction_value",
+]
+WINDOW_COLUMNS = ["window", "train_start", "train_end", "test_start", "test_end"]
+
+# Modules whose source defines a cell's numbers
+_FEATURE_MODULES = ["src.feature_engineering"]
+_CELL_MODULES = ["src.ml_model", "src.optimization", "src.evaluation"]
+
+
+def _hash(payload) -> str:
+    data = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _code_hash(modules) -> str:
+    digest = hashlib.sha256()
+    for name in modules:
+        with open(inspect.getsourcefile(sys.modules[name]), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def walk_forward_windows(dates, train_days: int = 90, test_days: int = 28,
+                         step_days: int = None, expanding: bool = False) -> pd.DataFrame:
+    """
+    Consecutive test windows of `test_days` days, `step_days` apart
+    (default: test_days, so test windows tile the history). Each one is
+    preceded by a training window of the `train_days` days before it,
+    or of all earlier days if `expanding`.
+    """
+    dates = pd.DatetimeIndex(dates)
+    first, last = dates.min().normalize(), dates.max().normalize()
+    train, test = pd.Timedelta(days=train_days), pd.Timedelta(days=test_days)
+    step = pd.Timedelta(days=step_days or test_days)
+
+    windows = []
+    test_start = first + train
+    while test_start + test - pd.Timedelta(days=1) <= last:
+        windows.append({
+            "window": len(windows),
+            "train_start": first if expanding else test_start - train,
+            "train_end": test_start - pd.Timedelta(days=1),
+            "test_start": test_start,
+            "test_end": test_start + test - pd.Timedelta(days=1),
+        })
+        test_start += step
+    return pd.DataFrame(windows, columns=WINDOW_COLUMNS)
+
+
+def parameter_grid(**values) -> pd.DataFrame:
+    """Every combination of the given PARAMS values; others keep their defaults."""
+    unknown = set(values) - set(PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown backtest parameters: {sorted(unknown)}")
+    axes = {name: list(values.get(name) or [default]) for name, default in PARAMS.items()}
+    return pd.DataFrame(list(itertools.product(*axes.values())), columns=list(axes))
+
+
+# -------------------------------
+# Worker side
+# -------------------------------
+_worker_features = None
+
+
+def _init_worker(features_dir: str):
+    global _worker_features
+    _worker_features = load_frame(features_dir)
+
+
+def _window_rows(dates: np.ndarray, start, end) -> np.ndarray:
+    return (dates >= np.datetime64(start)) & (dates <= np.datetime64(end))
+
+
+def _detect(task: dict) -> pd.DataFrame:
+    """Ghost cases of the task's test window, None if nothing to train on."""
+    df = _worker_features
+    window = task["window"]
+    dates = df["Date"].to_numpy()
+    train = df[_window_rows(dates, window["train_start"], window["train_end"])]
+    test = df[_window_rows(dates, window["test_start"], window["test_end"])]
+    task["train_rows"], task["test_rows"] = len(train), len(test)
+
+    if not train[FEATURES].notna().all(axis=1).any():
+        return None
+    model = train_ghost_model(train, n_jobs=1, path=None,
+                              contamination=task["contamination"])
+    return detect_ghost_demand(test, model)
+
+
+def _run_task(task: dict) -> list:
+    """
+    Evaluates every setting of one (window, contamination). The model is
+    fitted once; its ghost cases are saved to task["detections"] and
+    reused when later runs add settings for the same pair.
+    """
+    path = task["detections"]
+    if os.path.exists(path):
+        flagged = pd.read_parquet(path)
+        task["train_rows"], task["test_rows"] = flagged.attrs["rows"]
+        flagged = flagged if len(flagged) else None
+    else:
+        flagged = _detect(task)
+        saved = flagged if flagged is not None else pd.DataFrame()
+        saved.attrs["rows"] = [task["train_rows"], task["test_rows"]]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        saved.to_parquet(tmp)
+        os.replace(tmp, path)
+
+    window = task["window"]
+    rows = []
+    for params in task["settings"]:
+        row = {**window, "contamination": task["contamination"], **params,
+               "train_rows": task["train_rows"], "test_rows": task["test_rows"]}
+        if flagged is None or flagged.empty:
+            row.update({metric: 0.0 for metric in METRICS[2:]})
+        else:
+            out = evaluate_impact(optimize_production(
+                flagged,
+                max_reduction_ratio=params["max_reduction_ratio"],
+                unit_production_cost=params["unit_production_cost"],
+                unit_waste_penalty=params["unit_waste_penalty"],
+            ))
+            actionable = (out["forecast_error"] > 0) & (out["rolling_mean_7"] > 0)
+            row.update({
+                "flagged": len(out),
+                "actionable": int(actionable.sum()),
+                **{metric: float(out[metric].sum()) for metric in METRICS[4:]},
+            })
+        rows.append(row)
+    return rows
+
+
+class WalkForwardBacktest:
+    """
+    Walk-forward backtest over one daily_df. run(grid) returns the
+    per-window results of every cell in windows x grid, computing only
+    the cells not already in the results table; the counts of computed
+    and reused cells are kept in self.report.
+    """
+
+    def __init__(self, daily_df: pd.DataFrame, directory: str = BACKTEST_DIR,
+                 train_days: int = 90, test_days: int = 28, step_days: int = None,
+                 expanding: bool = False, workers: int = 1):
+        self.workers = workers
+        self.windows = walk_forward_windows(
+            daily_df["Date"], train_days, test_days, step_days, expanding
+        )
+
+        data_hash = hashlib.sha256(
+            pd.util.hash_pandas_object(daily_df, index=False).to_numpy().tobytes()
+        ).hexdigest()[:16]
+        self.directory = os.path.join(
+            directory, _hash([data_hash, _code_hash(_FEATURE_MODULES)])
+        )
+        self.features_dir = os.path.join(self.directory, "features")
+        self.results_path = os.path.join(self.directory, "results.parquet")
+        self.code = _code_hash(_CELL_MODULES)
+        self.report = {}
+        self._ensure_features(daily_df)
+
+    def _ensure_features(self, daily_df: pd.DataFrame) -> None:
+        if os.path.exists(os.path.join(self.features_dir, "meta.json")):
+            return
+        staging = f"{self.features_dir}.{os.getpid()}.tmp"
+        save_frame(add_time_series_features(daily_df).reset_index(drop=True), staging)
+        try:
+            os.rename(staging, self.features_dir)
+        except OSError:
+            # Another run published the same features first
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def results(self) -> pd.DataFrame:
+        """Every cell computed so far for this daily_df."""
+        if not os.path.exists(self.results_path):
+            return pd.DataFrame(columns=[*WINDOW_COLUMNS, *PARAMS, *METRICS, "cell"])
+        return pd.read_parquet(self.results_path)
+
+    def _cells(self, grid: pd.DataFrame) -> pd.DataFrame:
+        cells = self.windows.merge(grid, how="cross")
+        cells["cell"] = [
+            _hash([self.code, row.train_start, row.train_end, row.test_start,
+                   row.test_end, *(getattr(row, name) for name in PARAMS)])
+            for row in cells.itertuples(index=False)
+        ]
+        return cells
+
+    def _tasks(self, missing: pd.DataFrame) -> list:
+        tasks = []
+        for (_, contamination), group in missing.groupby(["window", "contamination"], sort=False):
+            first = group.iloc[0]
+            window = {col: first[col] for col in WINDOW_COLUMNS}
+            key = _hash([self.code, *list(window.values())[1:], float(contamination)])
+            tasks.append({
+                "window": window,
+                "contamination": float(contamination),
+                "detections": os.path.join(self.directory, "detections", f"{key}.parquet"),
+                "settings": group[[*list(PARAMS)[1:], "cell"]].to_dict("records"),
+            })
+        # Longest training windows first, so they do not start last
+        return sorted(
+            tasks, key=lambda t: t["window"]["train_start"] - t["window"]["train_end"]
+        )
+
+    def _compute(self, tasks: list) -> list:
+        if self.workers == 1:
+            _init_worker(self.features_dir)
+            return [row for task in tasks for row in _run_task(task)]
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.features_dir,),
+        ) as pool:
+            return [row for rows in pool.map(_run_task, tasks) for row in rows]
+
+    @instrument(name="walk_forward_backtest")
+    def run(self, grid: pd.DataFrame = None) -> pd.DataFrame:
+        cells = self._cells(parameter_grid() if grid is None else grid)
+        stored = self.results()
+        missing = cells[~cells["cell"].isin(stored["cell"])]
+
+        tasks = self._tasks(missing)
+        fits = sum(not os.path.exists(task["detections"]) for task in tasks)
+        computed = pd.DataFrame(self._compute(tasks)) if tasks else stored.iloc[:0]
+        if len(computed):
+            stored = pd.concat([stored, computed], ignore_index=True)
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{self.results_path}.{os.getpid()}.tmp"
+            stored.to_parquet(tmp, index=False)
+            os.replace(tmp, self.results_path)
+
+        self.report = {
+            "cells": len(cells),
+            "computed": len(missing),
+            "reused": len(cells) - len(missing),
+            "models_fit": fits,
+        }
+        wanted = stored[stored["cell"].isin(cells["cell"])]
+        return (
+            wanted[[*WINDOW_COLUMNS, *PARAMS, *METRICS]]
+            .sort_values([*PARAMS, "window"])
+            .reset_index(drop=True)
+        )
+
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Totals per parameter combination across windows, plus how stable
+    the saving is: the share of windows with any waste_saved, and the
+    mean / std / min of the per-window waste_saved_pct.
+    """
+    results = results.assign(
+        waste_saved_pct=100 * results["waste_saved"]
+        / results["blind_waste"].where(results["blind_waste"] > 0)
+    )
+    grouped = results.groupby(list(PARAMS))
+    totals = grouped[METRICS[2:]].sum()
+    totals["waste_saved_pct"] = 100 * totals["waste_saved"] / totals["blind_waste"].where(
+        totals["blind_waste"] > 0
+    )
+    totals["windows"] = grouped.size()
+    totals["windows_saving"] = grouped["waste_saved"].apply(lambda s: int((s > 0).sum()))
+    pct = grouped["waste_saved_pct"]
+    totals["window_pct_mean"] = pct.mean()
+    totals["window_pct_std"] = pct.std()
+    totals["window_pct_min"] = pct.min()
+    return totals.reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest")
+    parser.add_argument("--train-days", type=int, default=90)
+    parser.add_argument("--test-days", type=int, default=28)
+    parser.add_argument("--step-days", type=int, default=None)
+    parser.add_argument("--expanding", action="store_true",
+                        help="train on all history before each test window")
+    for name, default in PARAMS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, nargs="+",
+                            default=[default])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--ecommerce", nargs="?", const=ECOMMERCE_DIR, default=None, metavar="DIR",
+        help="backtest on the multi-table Ecommerce Order Dataset"
+    )
+    parser.add_argument("--directory", default=BACKTEST_DIR)
+    parser.add_argument("--output", default=None, help="per-window results CSV")
+    args = parser.parse_args(argv)
+
+    daily = build_daily_demand(args.ecommerce) if args.ecommerce else load_data()
+    backtest = WalkForwardBacktest(
+        daily, args.directory, args.train_days, args.test_days, args.step_days,
+        args.expanding, args.workers,
+    )
+    grid = parameter_grid(**{name: getattr(args, name) for name in PARAMS})
+    results = backtest.run(grid)
+
+    print(f"{len(backtest.windows)} windows, {backtest.report}")
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(summarize(results).to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
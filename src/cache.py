@@ -0,0 +1,311 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = ".cache/daily_df"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+_MANIFEST = "manifest.json"
+_HASH_BLOCK = 8 * 1024 * 1024
+
+
+# -------------------------------
+# Columnar frame layout
+# -------------------------------
+def save_frame(df: pd.DataFrame, directory: str) -> None:
+    """
+    Writes df as one .npy file per column (strings dictionary-encoded
+    into int32 codes + a categories array) plus a small meta.json.
+    """
+    os.makedirs(directory, exist_ok=True)
+    meta = {"columns": [], "index": None}
+
+    def _write(name, series):
+        dtype = str(series.dtype)
+        if series.dtype.kind in "biufcmM":
+            np.save(os.path.join(directory, f"{name}.npy"), series.to_numpy())
+            return {"name": name, "dtype": dtype, "encoding": "plain"}
+
+        spec = {"name": name, "dtype": dtype, "encoding": "dictionary"}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # keep the declared categories (order, unused ones) as they are
+            codes, categories = series.cat.codes.to_numpy(), series.cat.categories
+            spec["ordered"] = bool(series.cat.ordered)
+        else:
+            codes, categories = pd.factorize(series)
+        np.save(
+            os.path.join(directory, f"{name}.codes.npy"),
+            codes.astype(np.int32)
+        )
+        np.save(
+            os.path.join(directory, f"{name}.categories.npy"),
+            np.asarray(categories, dtype=None if categories.dtype.kind in "biufmM" else str)
+        )
+        return spec
+
+    for i, col in enumerate(df.columns):
+        spec = _write(f"c{i}", df[col])
+        spec["column"] = col
+        meta["columns"].append(spec)
+
+    meta["index"] = _write("index", df.index.to_series())
+
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def _read_meta(directory: str) -> dict:
+    with open(os.path.join(directory, "meta.json")) as f:
+        return json.load(f)
+
+
+def _read_column(directory: str, spec: dict, mmap_mode) -> pd.Series:
+    name = spec["name"]
+    if spec["encoding"] == "plain":
+        values = np.load(
+            os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode
+        )
+        return pd.Series(values, copy=False).astype(spec["dtype"])
+
+    codes = np.load(os.path.join(directory, f"{name}.codes.npy"))
+    categories = np.load(os.path.join(directory, f"{name}.categories.npy"))
+    if categories.dtype.kind == "U":
+        categories = categories.astype(object)
+    values = pd.Categorical.from_codes(codes, categories, ordered=spec.get("ordered"))
+    if "ordered" in spec:
+        return pd.Series(values)
+    return pd.Series(values).astype(spec["dtype"])
+
+
+def load_columns(directory: str, columns, mmap: bool = True) -> dict:
+    """
+    Reads only the named columns of a save_frame directory, as Series
+    keyed by column name. Numeric columns are memory-mapped, so slices
+    only touch the pages they read.
+    """
+    specs = {spec["column"]: spec for spec in _read_meta(directory)["columns"]}
+    missing = [col for col in columns if col not in specs]
+    if missing:
+        raise KeyError(f"Columns not in {directory}: {missing}")
+
+    mmap_mode = "r" if mmap else None
+    return {col: _read_column(directory, specs[col], mmap_mode) for col in columns}
+
+
+def load_frame(directory: str, mmap: bool = True) -> pd.DataFrame:
+    """Inverse of save_frame; numeric columns are memory-mapped."""
+    meta = _read_meta(directory)
+    mmap_mode = "r" if mmap else None
+
+    data = {
+        spec["column"]: _read_column(directory, spec, mmap_mode).array
+        for spec in meta["columns"]
+    }
+    index = pd.Index(_read_column(directory, meta["index"], mmap_mode))
+
+    return pd.DataFrame(data, index=index, columns=[s["column"] for s in meta["columns"]])
+
+
+# -------------------------------
+# Fingerprinted cache
+# -------------------------------
+class DailyCache:
+    """
+    On-disk cache of cleaned daily_df frames.
+
+    Entries are keyed by the source file's size, mtime and SHA-256 plus
+    the cleaning parameters. Content hashes are memoized per
+    (path, size, mtime) so warm lookups never re-read the source. The
+    cache is capped at `max_bytes`, evicting least-recently-used entries.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # ---------- manifest ----------
+    def _manifest_path(self) -> str:
+        return os.path.join(self.cache_dir, _MANIFEST)
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"entries": {}, "sources": {}, "hits": 0, "misses": 0}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self._manifest_path())
+
+    # ---------- keys ----------
+    def source_fingerprint(self, path: str, manifest: dict = None) -> dict:
+        """
+        Size, mtime and SHA-256 of `path`. The hash is reused while size
+        and mtime match. A fresh hash is recorded in `manifest`, or, when
+        none is passed, written to the on-disk manifest right away.
+        """
+        persist = manifest is None
+        manifest = self._read_manifest() if persist else manifest
+        st = os.stat(path)
+        abs_path = os.path.abspath(path)
+
+        known = manifest["sources"].get(abs_path)
+        if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+            return known
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                digest.update(block)
+
+        fingerprint = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": digest.hexdigest(),
+        }
+        manifest["sources"][abs_path] = fingerprint
+        if persist:
+            self._write_manifest(manifest)
+        return fingerprint
+
+    @staticmethod
+    def make_key(fingerprint: dict, params: dict) -> str:
+        payload = json.dumps(
+            {"source": fingerprint, "params": params},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    # ---------- lookup ----------
+    def get_or_build(self, path: str, params: dict, build) -> pd.DataFrame:
+        """
+        Returns the cached frame for (path, params), or calls build()
+        and stores its result.
+        """
+        manifest = self._read_manifest()
+        key = self.make_key(self.source_fingerprint(path, manifest), params)
+        info = {"source": os.path.abspath(path), "params": params}
+        return self._get_or_build(manifest, key, build, info)
+
+    def contains(self, key: str) -> bool:
+        manifest = self._read_manifest()
+        return key in manifest["entries"] and os.path.isdir(
+            os.path.join(self.cache_dir, key)
+        )
+
+    def get_or_build_key(self, key: str, build, source: str,
+                         params: dict = None) -> pd.DataFrame:
+        """
+        Like get_or_build for callers that derive their own key.
+        `source` is what invalidate() matches on.
+        """
+        info = {"source": source, "params": params or {}}
+        return self._get_or_build(self._read_manifest(), key, build, info)
+
+    def _get_or_build(self, manifest: dict, key: str, build, info: dict) -> pd.DataFrame:
+        entry_dir = os.path.join(self.cache_dir, key)
+
+        if key in manifest["entries"] and os.path.isdir(entry_dir):
+            self.hits += 1
+            manifest["hits"] += 1
+            manifest["entries"][key]["last_access"] = time.time()
+            self._write_manifest(manifest)
+            return load_frame(entry_dir)
+
+        df = build()
+
+        # build() may have used the cache itself (nested stages), so merge
+        # into the manifest as it is now rather than the one read above
+        sources = manifest["sources"]
+        manifest = self._read_manifest()
+        manifest["sources"].update(sources)
+
+        self.misses += 1
+        manifest["misses"] += 1
+
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        save_frame(df, tmp_dir)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+
+        manifest["entries"][key] = {
+            **info,
+            "bytes": _dir_size(entry_dir),
+            "last_access": time.time(),
+        }
+        self._evict(manifest, keep=key)
+        self._write_manifest(manifest)
+
+        return df
+
+    # ---------- maintenance ----------
+    def _evict(self, manifest: dict, keep: str = None) -> None:
+        entries = manifest["entries"]
+        total = sum(e["bytes"] for e in entries.values())
+
+        for key in sorted(entries, key=lambda k: entries[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= entries[key]["bytes"]
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            del entries[key]
+
+    def invalidate(self, path: str = None) -> int:
+        """
+        Drops every entry built from `path` (or all entries if None).
+        `path` may also be a source name passed to get_or_build_key.
+        Returns the number of entries removed.
+        """
+        manifest = self._read_manifest()
+        target = os.path.abspath(path) if path else None
+
+        removed = [
+            key for key, entry in manifest["entries"].items()
+            if target is None or entry["source"] in (target, path)
+        ]
+        for key in removed:
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            del manifest["entries"][key]
+
+        if target is None:
+            manifest["sources"] = {}
+        else:
+            manifest["sources"].pop(target, None)
+
+        self._write_manifest(manifest)
+        return len(removed)
+
+    def stats(self) -> dict:
+        """Session and lifetime hit/miss counters plus current size."""
+        manifest = self._read_manifest()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "total_hits": manifest["hits"],
+            "total_misses": manifest["misses"],
+            "entries": len(manifest["entries"]),
+            "bytes": sum(e["bytes"] for e in manifest["entries"].values()),
+        }
+
+
+def _dir_size(directory: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for name in os.listdir(directory)
+    )
@@ -0,0 +1,46 @@
+"""
+Compact dtypes for daily_df and the per-SKU stages.
+
+    SKU          str           -> category (int16/int32 codes)
+    Date         datetime64    -> int32 days since 1970-01-01
+    daily_sales  int64         -> int32
+    features     float64       -> float32 (add_time_series_features(dtype=...))
+
+Features are still computed in float64 and only stored as float32.
+Every detector scores its input rounded to float32 (IsolationForest
+casts it, MadDetector rounds it the same way), so detection flags the
+same SKU-days with the same reasons as the float64 pipeline. expand_dtypes turns
+SKU / Date / daily_sales back into the standard dtypes for export.
+"""
+import numpy as np
+import pandas as pd
+
+FEATURE_DTYPE = np.float32
+DATE_DTYPE = "datetime64[us]"
+
+
+def is_compact(df: pd.DataFrame) -> bool:
+    return df["Date"].dtype == np.int32
+
+
+def compact_daily(df: pd.DataFrame) -> pd.DataFrame:
+    """daily_df with compact SKU / Date / daily_sales columns."""
+    if is_compact(df):
+        return df
+    df = df.copy(deep=False)
+    # Categories are sorted, so sorting by SKU keeps the string order
+    df["SKU"] = df["SKU"].astype("category")
+    df["Date"] = df["Date"].to_numpy(dtype="datetime64[D]").astype(np.int32)
+    df["daily_sales"] = df["daily_sales"].astype(np.int32)
+    return df
+
+
+def expand_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Undoes compact_daily; float32 feature columns are left as they are."""
+    if not is_compact(df):
+        return df
+    df = df.copy(deep=False)
+    df["SKU"] = df["SKU"].astype(str)
+    df["Date"] = df["Date"].to_numpy().astype("datetime64[D]").astype(DATE_DTYPE)
+    df["daily_sales"] = df["daily_sales"].astype(np.int64)
+    return df
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from src.cache import load_columns, load_frame, save_frame
+from src.profiling import instrument
+
+DASHBOARD_DIR = ".cache/dashboard"
+# The results CSV app.py reads; main publishes its store when writing it
+DASHBOARD_RESULTS_PATH = "data/ghost_demand_results.csv"
+
+# Summed into the per-SKU rollups when present in the results
+SAVINGS_COLUMNS = ["cost_saving", "waste_reduction_value", "waste_saved"]
+
+_RECORDS = "records"
+_ROLLUPS = "rollups"
+_SOURCE = "source.json"
+
+
+def store_dir_for(source: str, root: str = DASHBOARD_DIR) -> str:
+    """Store directory for a results file (one store per source path)."""
+    digest = hashlib.sha256(os.path.abspath(source).encode()).hexdigest()[:16]
+    return os.path.join(root, digest)
+
+
+def _source_stamp(path: str) -> dict:
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def build_rollups(records: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-SKU case counts, units and savings for records sorted by SKU,
+    plus each SKU's [row_start, row_stop) range in those records.
+    """
+    sku = records["SKU"].to_numpy()
+    starts = np.flatnonzero(np.r_[len(sku) > 0, sku[1:] != sku[:-1]])
+    stops = np.r_[starts[1:], len(sku)].astype(np.int64)
+
+    grouped = records.groupby("SKU", sort=False, observed=True)
+    rollups = pd.DataFrame({"ghost_cases": grouped.size()})
+    rollups["units"] = grouped["daily_sales"].sum()
+    for col in SAVINGS_COLUMNS:
+        if col in records.columns:
+            rollups[col] = grouped[col].sum()
+
+    rollups["row_start"] = starts
+    rollups["row_stop"] = stops
+    return rollups
+
+
+def publish_results(results: pd.DataFrame, source: str = None,
+                    directory: str = None) -> str:
+    """
+    Builds the dashboard store for a results table: records sorted by SKU
+    in the columnar layout, per-SKU rollups and row ranges. The new store
+    replaces the old one in a single rename.
+    """
+    if directory is None:
+        if source is None:
+            raise ValueError("publish_results needs a source path or a directory")
+        directory = store_dir_for(source)
+
+    records = (
+        results[results["SKU"].notna()]
+        .sort_values("SKU", kind="stable")
+        .reset_index(drop=True)
+    )
+    rollups = build_rollups(records)
+
+    staging = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    save_frame(records, os.path.join(staging, _RECORDS))
+    save_frame(rollups, os.path.join(staging, _ROLLUPS))
+    if source is not None:
+        with open(os.path.join(staging, _SOURCE), "w") as f:
+            json.dump(_source_stamp(source), f)
+
+    retired = f"{directory}.old-{os.getpid()}"
+    if os.path.exists(directory):
+        os.rename(directory, retired)
+    os.rename(staging, directory)
+    shutil.rmtree(retired, ignore_errors=True)
+
+    return directory
+
+
+class DashboardStore:
+    """
+    Read side of a published results store.
+
+    Rollups are small (one row per SKU) and held in memory; record
+    columns are opened on first use, numeric ones memory-mapped. A SKU
+    filter is a lookup of row ranges followed by a slice of the columns
+    a panel asks for, so its cost depends on the rows shown, not on the
+    length of history.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.rollups = load_frame(os.path.join(directory, _ROLLUPS), mmap=False)
+        self._columns = {}
+
+    @property
+    def skus(self) -> list:
+        return self.rollups.index.tolist()
+
+    def totals(self) -> dict:
+        return {
+            "ghost_cases": int(self.rollups["ghost_cases"].sum()),
+            "units": int(self.rollups["units"].sum()),
+            **{
+                col: float(self.rollups[col].sum())
+                for col in SAVINGS_COLUMNS if col in self.rollups.columns
+            },
+        }
+
+    def sku_summary(self, skus) -> pd.DataFrame:
+        """Rollups of the selected SKUs, most ghost cases first."""
+        summary = self.rollups.loc[self.rollups.index.intersection(skus, sort=False)]
+        summary = summary.drop(columns=["row_start", "row_stop"])
+        return (
+            summary.rename_axis("SKU").reset_index()
+            .sort_values("ghost_cases", ascending=False)
+        )
+
+    def _column(self, name: str) -> pd.Series:
+        if name not in self._columns:
+            self._columns.update(
+                load_columns(os.path.join(self.directory, _RECORDS), [name])
+            )
+        return self._columns[name]
+
+    def records(self, skus, columns, limit: int = None) -> pd.DataFrame:
+        """
+        The selected SKUs' records (in SKU order), only `columns`, and at
+        most `limit` rows.
+        """
+        ranges = self.rollups.loc[
+            self.rollups.index.intersection(skus, sort=False), ["row_start", "row_stop"]
+        ].sort_values("row_start").to_numpy()
+
+        positions, remaining = [], limit
+        for start, stop in ranges:
+            if remaining is not None:
+                stop = min(stop, start + remaining)
+                remaining -= stop - start
+            positions.append(np.arange(start, stop))
+            if remaining == 0:
+                break
+        rows = np.concatenate(positions) if positions else np.zeros(0, dtype=np.int64)
+
+        return pd.DataFrame({
+            col: self._column(col).iloc[rows].to_numpy() for col in columns
+        })
+
+
+@instrument
+def open_results_store(source: str, root: str = DASHBOARD_DIR) -> DashboardStore:
+    """
+    Opens the store for a results CSV, publishing it first when it is
+    missing or older than the CSV.
+    """
+    directory = store_dir_for(source, root)
+    try:
+        with open(os.path.join(directory, _SOURCE)) as f:
+            fresh = json.load(f) == _source_stamp(source)
+    except FileNotFoundError:
+        fresh = False
+
+    if not fresh:
+        results = pd.read_csv(source)
+        results["Date"] = pd.to_datetime(results["Date"], errors="coerce")
+        publish_results(results, source=source, directory=directory)
+
+    return DashboardStore(directory)
@@ -1,28 +1,170 @@
+import numpy as np
 import pandas as pd
 
+from src.cache import DailyCache
+from src.profiling import instrument
 
-def load_and_prepare_data(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
+RAW_DATA_PATH = "data/Amazon Sale Report.csv"
 
-    df["Date"] = pd.to_datetime(
-        df["Date"].astype(str).str.strip(),
-        format="%m-%d-%y",
-        errors="raise"
+DATE_FORMAT = "%m-%d-%y"
+VALID_STATUS = ["Shipped", "Delivered"]
+
+# Only these columns feed daily_df; streaming mode reads nothing else.
+# SKU keeps pandas' default string dtype so both modes agree; Date and
+# Status repeat heavily, so the parser dictionary-encodes them.
+INGEST_COLUMNS = ["Date", "SKU", "Status", "Qty"]
+INGEST_DTYPES = {
+    "Date": "category",
+    "Status": "category",
+    "Qty": "int32",
+}
+
+
+def _as_codes(series: pd.Series):
+    """(codes, uniques) for a column, reusing categorical codes if present."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series, use_na_sentinel=False)
+
+
+def parse_dates(series: pd.Series, errors: str = "raise") -> pd.Series:
+    """
+    Parses Date strings with DATE_FORMAT, once per distinct value.
+
+    Only a few hundred dates repeat across millions of order rows, so the
+    distinct strings are parsed and broadcast back through their codes.
+    Unparseable values raise, exactly as a per-row parse would, or become
+    NaT with errors="coerce".
+    """
+    codes, uniques = _as_codes(series)
+    if (codes < 0).any():
+        # Missing categorical values: parse them like the per-row path
+        uniques = pd.Index(list(uniques) + [np.nan], dtype=object)
+        codes = np.where(codes < 0, len(uniques) - 1, codes)
+
+    parsed = pd.to_datetime(
+        pd.Series(uniques, dtype=object).astype(str).str.strip(),
+        format=DATE_FORMAT,
+        errors=errors
     )
+    return pd.Series(parsed.to_numpy()[codes], index=series.index, name=series.name)
+
 
-    valid_status = ["Shipped", "Delivered"]
-    df = df[df["Status"].isin(valid_status)].copy()
+def valid_status_mask(series: pd.Series) -> np.ndarray:
+    """Status membership in VALID_STATUS, evaluated once per category."""
+    codes, uniques = _as_codes(series)
+    keep = np.append(pd.Index(uniques).isin(VALID_STATUS), False)
+    return keep[codes]
 
-    daily_df = (
+
+def _aggregate_daily(df: pd.DataFrame) -> pd.DataFrame:
+    if not pd.api.types.is_datetime64_dtype(df["Date"]):
+        df["Date"] = parse_dates(df["Date"])
+
+    df = df[valid_status_mask(df["Status"])]
+
+    return (
         df
         .groupby(["Date", "SKU"], as_index=False)
         .agg(daily_sales=("Qty", "sum"))
-        .sort_values(["SKU", "Date"])
     )
 
-    return daily_df
+
+def _empty_daily() -> pd.DataFrame:
+    """daily_df without rows, with the dtypes a non-empty one gets."""
+    sample = pd.DataFrame({
+        "Date": ["01-01-22"], "SKU": ["SKU"], "Status": VALID_STATUS[:1], "Qty": [0],
+    })
+    return _aggregate_daily(sample).iloc[:0]
+
+
+def _merge_partials(partials) -> pd.DataFrame:
+    return (
+        pd.concat(partials, ignore_index=True)
+        .groupby(["Date", "SKU"], as_index=False)
+        .agg(daily_sales=("daily_sales", "sum"))
+    )
+
+
+@instrument
+def load_and_prepare_data(path: str, chunksize: int | None = None,
+                          sketch=None) -> pd.DataFrame:
+    """
+    Reads the Amazon order export and aggregates valid orders into
+    daily_df (Date, SKU, daily_sales), sorted by SKU then Date.
+
+    With `chunksize`, the file is streamed `chunksize` rows at a time
+    reading only Date/SKU/Status/Qty; each chunk is reduced to
+    (Date, SKU) partial sums, so peak memory follows the chunk size and
+    the number of distinct SKU-days rather than the file size.
+
+    `sketch` (a prefilter.DemandSketch) is fed every chunk's partial sums.
+    """
+    if chunksize is None:
+        df = pd.read_csv(path, dtype={"Status": "category"})
+        daily_df = _aggregate_daily(df)
+        if daily_df.empty:
+            return _empty_daily()
+        if sketch is not None:
+            sketch.update(daily_df)
+        return daily_df.sort_values(["SKU", "Date"])
+
+    reader = pd.read_csv(
+        path,
+        usecols=INGEST_COLUMNS,
+        dtype=INGEST_DTYPES,
+        chunksize=chunksize,
+    )
+
+    partials = []
+    merged_rows = 0
+    # Partial rows collected since the last fold (partials[0] is merged)
+    added_rows = 0
+
+    for chunk in reader:
+        chunk["Qty"] = chunk["Qty"].astype("int64")
+        partial = _aggregate_daily(chunk)
+        if sketch is not None:
+            sketch.update(partial)
+        partials.append(partial)
+        added_rows += len(partial)
+
+        # Fold partials together once they outgrow the merged result; the
+        # merged rows are re-grouped only after at least as many new ones
+        # arrived, so all folds together touch < 2x the partial rows
+        if len(partials) > 1 and added_rows > max(merged_rows, chunksize):
+            merged = _merge_partials(partials)
+            partials = [merged]
+            merged_rows = len(merged)
+            added_rows = 0
+
+    daily_df = _merge_partials(partials) if partials else _empty_daily()
+    if daily_df.empty:
+        return _empty_daily()
+    return daily_df.sort_values(["SKU", "Date"])
 
 
 # ✅ Wrapper used by training & deployment
-def load_data() -> pd.DataFrame:
-    return load_and_prepare_data("data/Amazon Sale Report.csv")
+def load_data(chunksize: int | None = None, use_cache: bool = True,
+              sketch=None) -> pd.DataFrame:
+    """
+    Cleaned daily_df for the raw export, served from the on-disk cache
+    when the source file and cleaning parameters are unchanged.
+
+    `sketch` is fed during ingest (per chunk with `chunksize`); on a
+    cache hit there is no ingest, so it is fed the cached daily_df.
+    """
+    if not use_cache:
+        return load_and_prepare_data(RAW_DATA_PATH, chunksize=chunksize, sketch=sketch)
+
+    ingested = []
+
+    def build():
+        ingested.append(True)
+        return load_and_prepare_data(RAW_DATA_PATH, chunksize=chunksize, sketch=sketch)
+
+    params = {"valid_status": VALID_STATUS, "date_format": DATE_FORMAT}
+    daily_df = DailyCache().get_or_build(RAW_DATA_PATH, params, build)
+    if sketch is not None and not ingested:
+        sketch.update(daily_df)
+    return daily_df
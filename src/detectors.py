@@ -0,0 +1,228 @@
+"""
+Pluggable ghost-demand detectors.
+
+detect_ghost_demand dispatches on the Detector protocol: fit / score /
+predict / save / load over a frame of complete feature rows (FEATURES,
+plus SKU for per-SKU detectors). Scores follow the IsolationForest
+convention (lower is more anomalous) and predict returns -1 for ghost
+rows, 1 otherwise.
+
+    forest  the 300-tree IsolationForest (or its FlatForest export)
+    mad     per-SKU robust z-scores: |x - median| / (1.4826 * MAD) of
+            every feature against the SKU's fit-time median and MAD,
+            computed with grouped NumPy sorts, no per-SKU Python loop
+
+A bare fitted forest is still accepted anywhere a detector is, through
+as_detector.
+"""
+import json
+import os
+from typing import Protocol, runtime_checkable
+
+import numpy as np
+import pandas as pd
+
+from src.flat_forest import FlatForest
+from src.ml_model import (
+    FEATURES, MODEL_PATH, atomic_dump, load_ghost_model, train_ghost_model
+)
+
+MAD_MODEL_PATH = "ghost_demand_mad.npz"
+
+# Scales a MAD to the standard deviation of normally distributed data
+_MAD_TO_STD = 1.4826
+
+
+@runtime_checkable
+class Detector(Protocol):
+    name: str
+
+    def fit(self, df: pd.DataFrame) -> "Detector": ...
+
+    def score(self, df: pd.DataFrame) -> np.ndarray: ...
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray: ...
+
+    def save(self, path: str) -> None: ...
+
+    @classmethod
+    def load(cls, path: str) -> "Detector": ...
+
+
+class ForestDetector:
+    """The IsolationForest model (sklearn or FlatForest) as a Detector."""
+
+    name = "forest"
+
+    def __init__(self, model=None, n_jobs: int = -1):
+        self.model = model
+        self.n_jobs = n_jobs
+
+    @property
+    def offset_(self) -> float:
+        return self.model.offset_
+
+    def fit(self, df: pd.DataFrame) -> "ForestDetector":
+        self.model = train_ghost_model(df, n_jobs=self.n_jobs, path=None)
+        return self
+
+    def score(self, df: pd.DataFrame) -> np.ndarray:
+        return self.model.score_samples(df[FEATURES])
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        return self.model.predict(df[FEATURES])
+
+    def save(self, path: str) -> None:
+        if isinstance(self.model, FlatForest):
+            self.model.save(path)
+        else:
+            atomic_dump(self.model, path)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "ForestDetector":
+        if os.path.isdir(path):
+            return cls(FlatForest.load(path))
+        return cls(load_ghost_model(path))
+
+
+def _grouped_median(codes: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """Median of `values` per group code; NaN for groups with no values."""
+    # One sort by (group, value); every group is a contiguous sorted run
+    order = np.lexsort((values, codes))
+    ordered = np.append(values[order], np.nan)
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    lo = np.where(counts > 0, starts + (counts - 1) // 2, len(values))
+    hi = np.where(counts > 0, starts + counts // 2, len(values))
+    return (ordered[lo] + ordered[hi]) / 2
+
+
+class MadDetector:
+    """
+    Flags rows whose largest per-SKU robust z-score over `features`
+    exceeds a threshold. By default the threshold is set at fit time so
+    that `contamination` of the training rows are flagged, as for the
+    forest; a fixed `threshold` (in robust standard deviations) can be
+    given instead. SKUs unseen at fit time, and features with a zero MAD
+    for a SKU, fall back to the pooled median / MAD. Non-finite values
+    (demand_change after a zero-sales day) are left out of both the
+    statistics and the scores.
+    """
+
+    name = "mad"
+
+    def __init__(self, features=FEATURES, contamination: float = 0.02,
+                 threshold: float = None):
+        self.features = list(features)
+        self.contamination = contamination
+        self.threshold = threshold
+        self.skus = pd.Index([])
+        self.median = None
+        self.scale = None
+        self.offset_ = None
+
+    def _values(self, df: pd.DataFrame) -> np.ndarray:
+        # Rounded through float32, as the forest's input is, so standard and
+        # compact (float32) features score the same; statistics stay float64
+        X = df[self.features].to_numpy(dtype=np.float32).astype(np.float64)
+        X[~np.isfinite(X)] = np.nan
+        return X
+
+    def fit(self, df: pd.DataFrame) -> "MadDetector":
+        df = df.dropna(subset=self.features)
+        if df.empty:
+            raise ValueError("No rows with complete features to fit on")
+
+        codes, skus = pd.factorize(df["SKU"])
+        X = self._values(df)
+        n_skus = len(skus)
+
+        # Last row holds the pooled statistics, so a code of -1 uses them
+        median = np.empty((n_skus + 1, X.shape[1]))
+        scale = np.empty_like(median)
+        for j in range(X.shape[1]):
+            finite = ~np.isnan(X[:, j])
+            column, column_codes = X[finite, j], codes[finite]
+            median[:-1, j] = _grouped_median(column_codes, column, n_skus)
+            deviation = np.abs(column - median[column_codes, j])
+            scale[:-1, j] = _MAD_TO_STD * _grouped_median(column_codes, deviation, n_skus)
+
+            median[-1, j] = np.median(column) if len(column) else 0.0
+            pooled = _MAD_TO_STD * np.median(np.abs(column - median[-1, j])) if len(column) else 0.0
+            scale[-1, j] = pooled if pooled > 0 else 1.0
+
+        # NaN (no finite values) or zero spread: use the pooled statistics
+        pooled_median = np.broadcast_to(median[-1], median.shape)
+        median = np.where(np.isnan(median), pooled_median, median)
+        zero = ~(scale > 0)
+        scale[zero] = np.broadcast_to(scale[-1], scale.shape)[zero]
+
+        self.skus = pd.Index(skus.astype(str))
+        self.median, self.scale = median, scale
+        if self.threshold is not None:
+            self.offset_ = -float(self.threshold)
+        else:
+            self.offset_ = float(np.quantile(self._score(codes, X), self.contamination))
+        return self
+
+    def _score(self, codes: np.ndarray, X: np.ndarray) -> np.ndarray:
+        z = np.abs(X - self.median[codes]) / self.scale[codes]
+        return -np.nan_to_num(z, nan=0.0).max(axis=1)
+
+    def score(self, df: pd.DataFrame) -> np.ndarray:
+        codes, skus = pd.factorize(df["SKU"])
+        sku_rows = self.skus.get_indexer(pd.Index(skus).astype(str))
+        return self._score(sku_rows[codes], self._values(df))
+
+    def decision_function(self, df: pd.DataFrame) -> np.ndarray:
+        return self.score(df) - self.offset_
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        return np.where(self.decision_function(df) < 0, -1, 1)
+
+    def save(self, path: str = MAD_MODEL_PATH) -> None:
+        meta = {
+            "features": self.features,
+            "contamination": self.contamination,
+            "threshold": self.threshold,
+            "offset": self.offset_,
+        }
+        # Readers never see a half-written file
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, skus=self.skus.to_numpy(dtype=str), median=self.median,
+                 scale=self.scale, meta=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = MAD_MODEL_PATH) -> "MadDetector":
+        if not os.path.exists(path):
+            raise FileNotFoundError("MAD detector not found. Train it first.")
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            detector = cls(meta["features"], meta["contamination"], meta["threshold"])
+            detector.skus = pd.Index(data["skus"].astype(object))
+            detector.median, detector.scale = data["median"], data["scale"]
+        detector.offset_ = meta["offset"]
+        return detector
+
+
+# src.segments adds "segmented", a per-segment family of these
+DETECTORS = {"forest": ForestDetector, "mad": MadDetector}
+DETECTOR_PATHS = {"forest": MODEL_PATH, "mad": MAD_MODEL_PATH}
+
+
+def as_detector(model) -> Detector:
+    """`model` itself if it is a Detector, else a fitted forest wrapped as one."""
+    return model if isinstance(model, Detector) else ForestDetector(model)
+
+
+def make_detector(kind: str = "forest", **params) -> Detector:
+    if kind not in DETECTORS:
+        raise ValueError(f"Unknown detector {kind!r}; choose from {sorted(DETECTORS)}")
+    return DETECTORS[kind](**params)
+
+
+def load_detector(kind: str = "forest", path: str = None) -> Detector:
+    if kind not in DETECTORS:
+        raise ValueError(f"Unknown detector {kind!r}; choose from {sorted(DETECTORS)}")
+    return DETECTORS[kind].load(path or DETECTOR_PATHS[kind])
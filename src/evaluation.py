@@ -1,7 +1,11 @@
 import numpy as np
 
+from src.profiling import instrument
+
+@instrument
 def evaluate_impact(df):
-    df = df.copy()
+    # Shallow: new columns never reach the caller's frame
+    df = df.copy(deep=False)
 
     df['blind_production'] = df['rolling_mean_7']
     df['optimized_production'] = (
@@ -1,44 +1,107 @@
+import numpy as np
 import pandas as pd
 
+from src.profiling import instrument
 
-def generate_explanations(ghost_df: pd.DataFrame) -> pd.DataFrame:
+
+def _column(df: pd.DataFrame, name: str, default=0) -> pd.Series:
+    """df[name], or a constant column when the feature is absent."""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index)
+
+
+# -------------------------------
+# Rule set
+# Each rule is (reason text, vectorized predicate over the whole frame).
+# Rule i sets bit i of the reason_code column, so adding a rule costs one
+# boolean array per call and nothing per row.
+# -------------------------------
+EXPLANATION_RULES = [
+    # 1. Large deviation from expected demand
+    (
+        "Sales significantly exceeded recent average demand",
+        lambda df: df["forecast_error"] > df["rolling_mean_7"],
+    ),
+    # 2. High volatility
+    (
+        "Demand showed unusually high short-term volatility",
+        lambda df: _column(df, "volatility_ratio") > 1.5,
+    ),
+    # 3. Sudden demand spike
+    (
+        "Abrupt demand spike compared to previous period",
+        lambda df: _column(df, "demand_change") > 1.0,
+    ),
+]
+
+# Used when no rule fires (reason_code == 0)
+FALLBACK_REASON = "Anomalous demand pattern compared to historical behavior"
+
+
+def register_rule(text: str, predicate) -> None:
+    """Appends a rule to the default rule set."""
+    if len(EXPLANATION_RULES) >= 63:
+        raise ValueError("reason_code holds at most 63 rules")
+    EXPLANATION_RULES.append((text, predicate))
+
+
+def compute_reason_codes(df: pd.DataFrame, rules=None) -> np.ndarray:
+    """Bitmask of the rules that fire on each row."""
+    rules = EXPLANATION_RULES if rules is None else rules
+
+    codes = np.zeros(len(df), dtype=np.int64)
+    for bit, (_, predicate) in enumerate(rules):
+        fired = np.asarray(predicate(df), dtype=bool)
+        codes |= fired.astype(np.int64) << bit
+
+    return codes
+
+
+def explain_codes(codes, rules=None) -> np.ndarray:
     """
-    Adds a human-readable explanation column explaining
-    why a SKU-day was flagged as ghost demand.
+    Renders reason codes as text. Each distinct code is formatted once,
+    so this is cheap to call on just the rows being shown or exported.
     """
+    rules = EXPLANATION_RULES if rules is None else rules
+    codes = np.asarray(codes, dtype=np.int64)
 
-    df = ghost_df.copy()
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
 
-    explanations = []
+    texts = []
+    for code in unique_codes:
+        reasons = [
+            text for bit, (text, _) in enumerate(rules)
+            if code >> bit & 1
+        ]
+        texts.append("; ".join(reasons) if reasons else FALLBACK_REASON)
 
-    for _, row in df.iterrows():
-        reasons = []
+    return np.array(texts, dtype=object)[inverse.reshape(-1)]
 
-        # 1. Large deviation from expected demand
-        if row["forecast_error"] > row["rolling_mean_7"]:
-            reasons.append(
-                "Sales significantly exceeded recent average demand"
-            )
 
-        # 2. High volatility
-        if row.get("volatility_ratio", 0) > 1.5:
-            reasons.append(
-                "Demand showed unusually high short-term volatility"
-            )
+def render_explanations(df: pd.DataFrame, rules=None) -> pd.DataFrame:
+    """Adds the explanation column to a frame that already has reason_code."""
+    df = df.copy(deep=False)
+    df["explanation"] = explain_codes(df["reason_code"], rules)
+    return df
+
+
+@instrument
+def generate_explanations(ghost_df: pd.DataFrame, rules=None,
+                          lazy: bool = False) -> pd.DataFrame:
+    """
+    Adds a reason_code bitmask explaining why each SKU-day was flagged
+    as ghost demand, plus the human-readable explanation column.
+
+    With lazy=True only reason_code is added; call render_explanations
+    on the rows that are actually displayed or exported.
+    """
 
-        # 3. Sudden demand spike
-        if row.get("demand_change", 0) > 1.0:
-            reasons.append(
-                "Abrupt demand spike compared to previous period"
-            )
+    df = ghost_df.copy(deep=False)
 
-        # Fallback
-        if not reasons:
-            reasons.append(
-                "Anomalous demand pattern compared to historical behavior"
-            )
+    df["reason_code"] = compute_reason_codes(df, rules)
 
-        explanations.append("; ".join(reasons))
+    if not lazy:
+        df["explanation"] = explain_codes(df["reason_code"], rules)
 
-    df["explanation"] = explanations
     return df
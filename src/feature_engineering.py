@@ -1,31 +1,149 @@
+import numpy as np
 import pandas as pd
+from pandas.api.indexers import BaseIndexer
 
-def add_time_series_features(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.sort_values(["SKU", "Date"]).copy()
+from src.profiling import instrument
 
-    df["rolling_mean_7"] = (
-        df.groupby("SKU")["daily_sales"]
-        .transform(lambda x: x.rolling(7).mean())
-    )
+# Window (in days) that drives volatility_ratio and the model FEATURES
+PRIMARY_WINDOW = 7
+
+# Rows per block of whole SKUs; bounds the float64 temporaries
+_BLOCK_ROWS = 1 << 17
+
+
+def _group_starts(keys: np.ndarray) -> np.ndarray:
+    """
+    For an array sorted by key, returns for every position the index
+    where its key's run begins.
+    """
+    n = len(keys)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    boundary = np.empty(n, dtype=bool)
+    boundary[0] = True
+    boundary[1:] = keys[1:] != keys[:-1]
+
+    starts = np.flatnonzero(boundary)
+    run_lengths = np.diff(np.append(starts, n))
+    return np.repeat(starts, run_lengths)
 
-    df["rolling_std_7"] = (
-        df.groupby("SKU")["daily_sales"]
-        .transform(lambda x: x.rolling(7).std())
-    )
 
-    df["demand_change"] = (
-        df.groupby("SKU")["daily_sales"]
-        .pct_change()
+class _GroupWindowIndexer(BaseIndexer):
+    """
+    Trailing windows of `window_size` rows that never reach back past
+    the row's group start (`group_start`, see _group_starts).
+    """
+
+    def get_window_bounds(self, num_values=0, min_periods=None, center=None,
+                          closed=None, step=None):
+        end = np.arange(1, num_values + 1, dtype=np.int64)
+        start = np.maximum(end - self.window_size, self.group_start)
+        return start.astype(np.int64), end
+
+
+def rolling_window_features(
+    values: np.ndarray,
+    group_start: np.ndarray,
+    window: int
+):
+    """
+    Grouped rolling mean / sample std over flat arrays, equal to
+    groupby(...).rolling(window) with min_periods=window.
+
+    `values` must already be ordered by (group, time) and `group_start`
+    holds the first position of each row's group (see _group_starts).
+    pandas' rolling kernels run once over all rows, and every window
+    restarts at its group's first row. The online updates are the ones
+    each per-group rolling call makes, so results match exactly, NaN
+    handling included.
+    """
+    rolling = pd.Series(values, copy=False).rolling(
+        _GroupWindowIndexer(window_size=window, group_start=group_start),
+        min_periods=window,
     )
+    return rolling.mean().to_numpy(copy=True), rolling.std().to_numpy(copy=True)
+
+
+def _row_blocks(group_start: np.ndarray, block_rows: int):
+    """
+    (start, stop) row ranges of about block_rows rows that never split
+    a group, for arrays laid out as in _group_starts.
+    """
+    n = len(group_start)
+    starts = np.flatnonzero(group_start == np.arange(n))
+    cuts = starts[np.searchsorted(starts, np.arange(block_rows, n, block_rows))
+                  .clip(max=len(starts) - 1)]
+    bounds = np.unique(np.concatenate(([0], cuts, [n])))
+    return list(zip(bounds[:-1], bounds[1:])) or [(0, n)]
 
-    df["volatility_ratio"] = (
-        df["rolling_std_7"] / (df["rolling_mean_7"] + 1e-6)
+
+def _block_features(sales, group_start, missing_sku, windows) -> dict:
+    """All feature columns (float64) for a block of whole groups."""
+    columns = {}
+    for window in windows:
+        mean, std = rolling_window_features(sales, group_start, window)
+        mean[missing_sku] = np.nan
+        std[missing_sku] = np.nan
+        columns[f"rolling_mean_{window}"] = mean
+        columns[f"rolling_std_{window}"] = std
+
+    # Previous day's sales within the same SKU (NaN on each SKU's first row)
+    prev = np.full(len(sales), np.nan)
+    has_prev = np.arange(len(sales)) > group_start
+    prev[1:] = sales[:-1]
+    prev[~has_prev | missing_sku] = np.nan
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        columns["demand_change"] = sales / prev - 1
+
+    columns["volatility_ratio"] = (
+        columns[f"rolling_std_{PRIMARY_WINDOW}"]
+        / (columns[f"rolling_mean_{PRIMARY_WINDOW}"] + 1e-6)
     )
 
     # Simple proxy for forecast error (naive forecast)
-    df["forecast_error"] = (
-        df["daily_sales"] -
-        df.groupby("SKU")["daily_sales"].shift(1)
-    )
+    columns["forecast_error"] = sales - prev
+    return columns
+
+
+@instrument
+def add_time_series_features(
+    df: pd.DataFrame,
+    windows=(PRIMARY_WINDOW,),
+    dtype=np.float64
+) -> pd.DataFrame:
+    """
+    Adds rolling demand features per SKU.
+
+    Always produces rolling_mean_7, rolling_std_7, demand_change,
+    volatility_ratio and forecast_error; every extra entry in `windows`
+    (e.g. 14, 28) adds its own rolling_mean_<w> / rolling_std_<w> pair.
+
+    Features are computed in float64, a block of SKUs at a time, and
+    stored as `dtype` (float32 in compact mode).
+    """
+    # sort_values already returns a new frame; columns are added to it
+    df = df.sort_values(["SKU", "Date"])
+
+    sales = df["daily_sales"].to_numpy(dtype=np.float64)
+    sku_codes = pd.factorize(df["SKU"])[0]
+    group_start = _group_starts(sku_codes)
+    # groupby drops missing SKUs, so their rows get no features
+    missing_sku = sku_codes < 0
+
+    columns = {}
+    for lo, hi in _row_blocks(group_start, _BLOCK_ROWS):
+        block = _block_features(
+            sales[lo:hi], group_start[lo:hi] - lo, missing_sku[lo:hi],
+            sorted(set(windows) | {PRIMARY_WINDOW}),
+        )
+        for name, values in block.items():
+            if name not in columns:
+                columns[name] = np.empty(len(df), dtype=dtype)
+            columns[name][lo:hi] = values
+
+    for name, values in columns.items():
+        df[name] = values
 
     return df
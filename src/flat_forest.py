@@ -0,0 +1,242 @@
+import json
+import os
+
+import numpy as np
+
+# Rows scored per block; bounds the (rows x trees) working set
+_BLOCK_ROWS = 4096
+
+_ARRAYS = [
+    "feature", "threshold", "first_child", "missing_left",
+    "leaf_value", "roots",
+]
+
+
+def _average_path_length(n: float) -> float:
+    # Same formula as sklearn.ensemble._iforest._average_path_length
+    if n <= 1:
+        return 0.0
+    if n == 2:
+        return 1.0
+    return 2.0 * (np.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+
+
+class FlatForest:
+    """
+    IsolationForest flattened into contiguous structure-of-arrays buffers.
+
+    All trees' nodes live in shared arrays (feature, threshold, child
+    index, leaf path-length value) and every tree is walked at once, one
+    depth level per vectorized step. Siblings are stored next to each
+    other, so a step is `node = first_child[node] + (x > threshold)`.
+    Scores are bit-identical to the fitted sklearn model's score_samples /
+    decision_function / predict, and saved forests load by memory-mapping.
+
+    Can be passed anywhere a fitted IsolationForest is expected for
+    inference, e.g. detect_ghost_demand(df, FlatForest.load(path)).
+    """
+
+    def __init__(self, arrays: dict, meta: dict):
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self.meta = meta
+        self.offset_ = meta["offset"]
+
+    # -------------------------------
+    # Export
+    # -------------------------------
+    @staticmethod
+    def _sibling_order(children_left, children_right) -> np.ndarray:
+        """Breadth-first node order with each node's children adjacent."""
+        order = [0]
+        frontier = [0]
+        while frontier:
+            nxt = []
+            for node in frontier:
+                if children_left[node] >= 0:
+                    nxt.append(children_left[node])
+                    nxt.append(children_right[node])
+            order.extend(nxt)
+            frontier = nxt
+        return np.asarray(order, dtype=np.int64)
+
+    @classmethod
+    def from_sklearn(cls, model, feature_names=None) -> "FlatForest":
+        features, thresholds, children, missing = [], [], [], []
+        leaf_values, roots = [], []
+        max_depth = 0
+        offset = 0
+
+        for tree_idx, (estimator, subset) in enumerate(
+            zip(model.estimators_, model.estimators_features_)
+        ):
+            tree = estimator.tree_
+            order = cls._sibling_order(tree.children_left, tree.children_right)
+            position = np.empty(len(order), dtype=np.int64)
+            position[order] = np.arange(len(order))
+
+            is_leaf = tree.children_left[order] < 0
+
+            # Leaves point to themselves with an +inf threshold, so extra
+            # steps are no-ops; children index the reordered layout
+            first_child = np.where(
+                is_leaf,
+                np.arange(len(order)),
+                position[np.maximum(tree.children_left[order], 0)]
+            ) + offset
+            threshold = np.where(is_leaf, np.inf, tree.threshold[order])
+
+            # Tree features index the estimator's feature subset
+            feature = np.asarray(subset)[np.where(is_leaf, 0, tree.feature[order])]
+
+            if hasattr(tree, "missing_go_to_left"):
+                missing_left = np.asarray(tree.missing_go_to_left, dtype=bool)[order]
+            else:
+                missing_left = np.zeros(len(order), dtype=bool)
+            missing_left |= is_leaf
+
+            # Same expression, in the same order, as sklearn's depth update
+            depths = model._decision_path_lengths[tree_idx]
+            avg_lengths = model._average_path_length_per_tree[tree_idx]
+            leaf_value = (depths + avg_lengths - 1.0)[order]
+
+            features.append(feature.astype(np.int32))
+            thresholds.append(threshold.astype(np.float64))
+            children.append(first_child.astype(np.int32))
+            missing.append(missing_left)
+            leaf_values.append(np.asarray(leaf_value, dtype=np.float64))
+            roots.append(offset)
+
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += len(order)
+
+        arrays = {
+            "feature": np.concatenate(features),
+            "threshold": np.concatenate(thresholds),
+            "first_child": np.concatenate(children),
+            "missing_left": np.concatenate(missing),
+            "leaf_value": np.concatenate(leaf_values),
+            "roots": np.asarray(roots, dtype=np.int32),
+        }
+
+        n_trees = len(model.estimators_)
+        meta = {
+            "n_trees": n_trees,
+            "n_features": int(model.n_features_in_),
+            "max_depth": max_depth,
+            "denominator": n_trees * _average_path_length(model._max_samples),
+            # Prefix denominators are k * this, the product sklearn forms
+            "average_path_length": _average_path_length(model._max_samples),
+            "offset": float(model.offset_),
+            "feature_names": list(feature_names) if feature_names is not None else None,
+        }
+        return cls(arrays, meta)
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "FlatForest":
+        # Resolved once, so every file comes from the same export even if
+        # a symlinked directory is swapped meanwhile
+        directory = os.path.realpath(directory)
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in _ARRAYS
+        }
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        return cls(arrays, meta)
+
+    # -------------------------------
+    # Scoring
+    # -------------------------------
+    def _path_lengths(self, X: np.ndarray, prefixes: np.ndarray) -> np.ndarray:
+        n, n_features = X.shape
+        flat_x = X.ravel()
+        row_base = (np.arange(n, dtype=np.int64) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        has_missing = np.isnan(X).any()
+
+        for _ in range(self.meta["max_depth"]):
+            value = np.take(flat_x, row_base + np.take(self.feature, node))
+            threshold = np.take(self.threshold, node)
+            if has_missing:
+                go_right = np.where(
+                    np.isnan(value),
+                    ~np.take(self.missing_left, node),
+                    value > threshold
+                )
+            else:
+                go_right = value > threshold
+            node = np.take(self.first_child, node) + go_right
+
+        # Sequential accumulation in tree order, exactly like sklearn; the
+        # running sum after tree k is the path length of the first k trees
+        return np.cumsum(np.take(self.leaf_value, node), axis=1)[:, prefixes - 1]
+
+    def prefix_score_samples(self, X, n_trees) -> np.ndarray:
+        """
+        score_samples of the forests made of this forest's first n trees,
+        for every n in `n_trees`, in one pass: shape (len(n_trees), rows).
+        A forest fitted with the same random_state and n trees scores the
+        same, as sklearn draws every tree's seed up front.
+        """
+        # sklearn validates inputs to float32 before walking the trees
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.meta["n_features"]:
+            raise ValueError(
+                f"Expected {self.meta['n_features']} features, got shape {X.shape}"
+            )
+        prefixes = np.asarray(n_trees, dtype=np.int64)
+        if prefixes.min() < 1 or prefixes.max() > self.meta["n_trees"]:
+            raise ValueError(f"Prefixes must be within 1..{self.meta['n_trees']} trees")
+
+        depths = np.zeros((X.shape[0], len(prefixes)))
+        for start in range(0, X.shape[0], _BLOCK_ROWS):
+            block = X[start:start + _BLOCK_ROWS]
+            depths[start:start + _BLOCK_ROWS] = self._path_lengths(block, prefixes)
+
+        denominator = prefixes * self._average_path_length()
+        scores = 2 ** (
+            -np.divide(depths, denominator, out=np.ones_like(depths),
+                       where=denominator != 0)
+        )
+        return -scores.T
+
+    def prefix(self, n_trees: int) -> "FlatForest":
+        """The forest of the first n_trees trees (shares this one's arrays)."""
+        arrays = {name: getattr(self, name) for name in _ARRAYS}
+        arrays["roots"] = self.roots[:n_trees]
+        meta = {
+            **self.meta,
+            "n_trees": n_trees,
+            "denominator": n_trees * self._average_path_length(),
+        }
+        return FlatForest(arrays, meta)
+
+    def _average_path_length(self) -> float:
+        # Exports older than the stored per-tree value only have the total
+        if "average_path_length" in self.meta:
+            return self.meta["average_path_length"]
+        return self.meta["denominator"] / self.meta["n_trees"]
+
+    def score_samples(self, X) -> np.ndarray:
+        return self.prefix_score_samples(X, [self.meta["n_trees"]])[0]
+
+    def decision_function(self, X) -> np.ndarray:
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X) -> np.ndarray:
+        decision = self.decision_function(X)
+        is_inlier = np.ones(decision.shape[0], dtype=int)
+        is_inlier[decision < 0] = -1
+        return is_inlier
@@ -1,20 +1,223 @@
-from src.data_cleaning import load_and_prepare_data
-from src.feature_engineering import build_features
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from src.compact import FEATURE_DTYPE, compact_daily, expand_dtypes
+from src.data_cleaning import load_data
+from src.ecommerce_orders import ECOMMERCE_DIR, build_daily_demand
+from src.feature_engineering import add_time_series_features
+from src.detectors import DETECTORS, load_detector
 from src.ml_model import detect_ghost_demand
 from src.optimization import optimize_production
 from src.evaluation import evaluate_impact
 from src.explainability import generate_explanations
+from src.parallel import SharedFrame, shard_of
+from src.prefilter import DemandSketch, SkuPrefilter, estimate_recall_loss
+from src.dashboard_store import DASHBOARD_RESULTS_PATH, publish_results
+from src.results_store import RESULTS_STORE_DIR, ResultsStore
+from src.stages import PipelineContext, StageDAG
+from src.profiling import cprofile_hook, profiled
+
+OUTPUT_PATH = "backup/outputs/final_results.csv"
 
-def main():
-    
-    df = load_and_prepare_data("data/Amazon Sale Report.csv")
-    df = build_features(df)
-    df = detect_ghost_demand(df)
+
+def run_pipeline(df: pd.DataFrame, model, compact: bool = False) -> pd.DataFrame:
+    """
+    Per-SKU stages, from cleaned daily_df to evaluated ghost cases.
+    With compact=True the stages run on compact dtypes (see src.compact);
+    the result has the standard SKU / Date columns either way.
+    """
+    if compact:
+        df = add_time_series_features(compact_daily(df), dtype=FEATURE_DTYPE)
+    else:
+        df = add_time_series_features(df)
+    df = detect_ghost_demand(df, model)
     df = generate_explanations(df)      # ← explain the detection
     df = optimize_production(df)
     df = evaluate_impact(df)
+    return expand_dtypes(df)
+
+
+# -------------------------------
+# Sharded execution
+# Every stage after cleaning only looks at one SKU's history, so SKUs
+# are hash-partitioned into shards and each shard runs the full chain
+# in a worker process. daily_df reaches workers through shared memory.
+# -------------------------------
+_worker_model = None
+
+
+def _init_worker(detector: str, model_path: str):
+    global _worker_model
+    _worker_model = load_detector(detector, model_path)
+
+
+def _run_shard(spec: dict, shard: int, compact: bool = False) -> pd.DataFrame:
+    frame = SharedFrame.attach(spec)
+    try:
+        rows = frame.array("shard") == shard
+        df = frame.to_frame(rows)
+    finally:
+        rows = None
+        frame.close()
+    return run_pipeline(df, _worker_model, compact=compact)
+
+
+def run_sharded(df: pd.DataFrame, workers: int, model_path: str = None,
+                compact: bool = False, detector: str = "forest") -> pd.DataFrame:
+    """
+    Runs run_pipeline over `workers` SKU shards in a process pool.
+    Output rows are put back in serial order, so the result matches
+    the single-process run exactly.
+    """
+    shards = shard_of(df["SKU"], workers)
+
+    with SharedFrame.create(df, arrays={"shard": shards}) as frame:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(detector, model_path),
+        ) as pool:
+            parts = list(pool.map(
+                functools.partial(_run_shard, compact=compact),
+                [frame.spec] * workers, range(workers)
+            ))
+
+    # Serial output is ordered by (SKU, Date), which is unique per row
+    return (
+        pd.concat(parts)
+        .sort_values(["SKU", "Date"], kind="stable")
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ghost demand pipeline")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="SKU shards to run in parallel processes (1 = serial)"
+    )
+    parser.add_argument(
+        "--no-memo", action="store_true",
+        help="run every stage instead of reusing memoized stage outputs"
+    )
+    parser.add_argument(
+        "--ecommerce", nargs="?", const=ECOMMERCE_DIR, default=None, metavar="DIR",
+        help="build daily_df from the multi-table Ecommerce Order Dataset "
+             "instead of the Amazon report (not memoized)"
+    )
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="run the stages on categorical SKUs, int32 days and float32 features"
+    )
+    parser.add_argument(
+        "--detector", choices=sorted(DETECTORS), default="forest",
+        help="ghost detector (train it first with train_model.py --detector)"
+    )
+    parser.add_argument(
+        "--prefilter", action="store_true",
+        help="score only the SKUs a demand sketch selects (not memoized)"
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=None, metavar="ROWS",
+        help="stream the raw export ROWS rows at a time (--prefilter's "
+             "sketch is fed per chunk)"
+    )
+    parser.add_argument(
+        "--min-units", type=int, default=0,
+        help="with --prefilter, estimated units a SKU needs to be scored"
+    )
+    parser.add_argument(
+        "--min-growth", type=float, default=None,
+        help="with --prefilter, also score SKUs whose newest week grew this much"
+    )
+    parser.add_argument(
+        "--recall-sample", type=float, default=0.0, metavar="FRACTION",
+        help="with --prefilter, score this share of the skipped SKUs to "
+             "estimate the recall loss"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="print which stages would be recomputed and exit"
+    )
+    parser.add_argument(
+        "--profile", default=None, metavar="TRACE",
+        help="write a per-stage trace (.json or .csv)"
+    )
+    parser.add_argument(
+        "--profile-memory", choices=["rss", "tracemalloc"], default="rss"
+    )
+    parser.add_argument(
+        "--cprofile", default=None, metavar="DIR",
+        help="with --profile, also dump a cProfile .prof per stage"
+    )
+    parser.add_argument("--output", default=OUTPUT_PATH, help="CSV export")
+    parser.add_argument(
+        "--dashboard", default=DASHBOARD_RESULTS_PATH,
+        help="results CSV the dashboard reads; written with its store ('' to skip)"
+    )
+    parser.add_argument(
+        "--store", default=RESULTS_STORE_DIR,
+        help="results store directory (days in this run are replaced)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.dry_run:
+        context = PipelineContext(compact=args.compact, detector=args.detector)
+        print(StageDAG().plan(context).to_string(index=False))
+        return
+
+    hook = cprofile_hook(args.cprofile) if args.cprofile else None
+    with profiled(args.profile, memory=args.profile_memory, hook=hook):
+        if args.ecommerce:
+            load = functools.partial(build_daily_demand, args.ecommerce)
+        else:
+            load = functools.partial(load_data, chunksize=args.chunksize)
+        if args.prefilter:
+            prefilter = SkuPrefilter(min_units=args.min_units, min_growth=args.min_growth)
+            if args.ecommerce:
+                # Built by a join, not streamed: apply() sketches the result
+                daily, sketch = load(), None
+            else:
+                # Fed chunk by chunk while the export is read
+                sketch = DemandSketch(**prefilter.sketch_args)
+                daily = load(sketch=sketch)
+            kept = prefilter.apply(daily, sketch)
+            load = lambda: kept
+            print("prefilter:", prefilter.report)
+
+        if args.workers > 1:
+            source = load()
+            df = run_sharded(source, args.workers, compact=args.compact,
+                             detector=args.detector)
+        elif args.no_memo or args.ecommerce or args.prefilter:
+            source = load()
+            df = run_pipeline(source, load_detector(args.detector), compact=args.compact)
+        else:
+            dag = StageDAG()
+            context = PipelineContext(compact=args.compact, detector=args.detector)
+            df = dag.run(context)
+            # cached by the run above
+            source = dag.run(context, target="load_and_prepare_data")
+
+        if args.prefilter and args.recall_sample:
+            print("prefilter recall:", estimate_recall_loss(
+                daily, kept, df, load_detector(args.detector), sample=args.recall_sample
+            ))
+
+        # Every input day is replaced, including days that no longer flag anything
+        dates = (daily if args.prefilter else source)["Date"]
+        with ResultsStore(args.store) as store:
+            store.write(df, days=pd.date_range(dates.min(), dates.max()) if len(dates) else [])
+
+        df.to_csv(args.output, index=False)
+        if args.dashboard:
+            # Published against the file app.py opens, so its first load
+            # finds fresh rollups instead of rebuilding them
+            df.to_csv(args.dashboard, index=False)
+            publish_results(df, source=args.dashboard)
 
-    df.to_csv("../backup/outputs/final_results.csv", index=False)
 
 if __name__ == "__main__":
     main()
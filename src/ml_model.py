@@ -1,6 +1,15 @@
 from sklearn.ensemble import IsolationForest
+import glob
 import joblib
 import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from src.flat_forest import FlatForest
+from src.profiling import instrument
 
 FEATURES = [
     "daily_sales",
@@ -11,39 +20,159 @@ FEATURES = [
     "volatility_ratio"
 ]
 
+# IsolationForest settings of the production model (see src.sweep for tuning)
+FOREST_PARAMS = {
+    "n_estimators": 300,
+    "max_samples": 256,
+    "max_features": 0.8,
+    "contamination": 0.02,
+}
+
 MODEL_PATH = "ghost_demand_model.pkl"
+FLAT_MODEL_DIR = "ghost_demand_model.flat"
+
+
+def recent_window(df, window_days):
+    """Rows from the last `window_days` days of df (all rows if None)."""
+    if window_days is None:
+        return df
+    cutoff = df["Date"].max() - pd.Timedelta(days=window_days - 1)
+    return df[df["Date"] >= cutoff]
+
+
+def training_metadata(df, model, fit_seconds: float, **extra) -> dict:
+    """Registry metadata describing how a model was fit."""
+    return {
+        "features": list(FEATURES),
+        "train_start": str(df["Date"].min().date()) if "Date" in df else None,
+        "train_end": str(df["Date"].max().date()) if "Date" in df else None,
+        "train_rows": int(len(df)),
+        "fit_seconds": round(fit_seconds, 3),
+        "offset": float(model.offset_),
+        **extra,
+    }
 
 
-def train_ghost_model(df):
+def atomic_dump(model, path: str) -> None:
+    # Readers never see a half-written pickle
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(model, tmp)
+    os.replace(tmp, path)
+
+
+@instrument
+def train_ghost_model(df, n_jobs: int = -1, path: str = MODEL_PATH, **params):
+    """
+    Fits the forest on all of df. Trees are built on n_jobs cores; the
+    fitted model is identical for any n_jobs (per-tree seeds are drawn
+    up front from random_state). The offset_ pass that scores all of df
+    stays sequential, which keeps the model bit-reproducible. `params`
+    override FOREST_PARAMS.
+    """
     df = df.dropna(subset=FEATURES).copy()
     X = df[FEATURES]
 
     model = IsolationForest(
-        n_estimators=300,
-        max_samples=256,
-        max_features=0.8,
-        contamination=0.02,
-        random_state=42
+        **{**FOREST_PARAMS, **params},
+        random_state=42,
+        n_jobs=n_jobs
     )
 
     model.fit(X)
-    joblib.dump(model, MODEL_PATH)
+    if path:
+        atomic_dump(model, path)
+
+    return model
+
+
+def extend_ghost_model(model, df, n_new_trees: int = 50,
+                       window_days: int = 30, n_jobs: int = -1):
+    """
+    Grows an existing forest with n_new_trees trees fit on the last
+    window_days of df (warm_start), instead of refitting full history.
+
+    The existing trees are kept unchanged. The anomaly threshold
+    (offset_) is re-estimated on the recent window, so `contamination`
+    refers to recent data. The model is modified in place and returned.
+    """
+    recent = recent_window(df.dropna(subset=FEATURES), window_days)
+    if recent.empty:
+        raise ValueError("No rows with complete features in the training window")
+
+    model.set_params(
+        warm_start=True,
+        n_estimators=len(model.estimators_) + n_new_trees,
+        n_jobs=n_jobs,
+    )
+    model.fit(recent[FEATURES])
+    model.set_params(warm_start=False)
 
     return model
 
 
-def load_ghost_model():
-    if not os.path.exists(MODEL_PATH):
+def load_ghost_model(path: str = MODEL_PATH):
+    if not os.path.exists(path):
         raise FileNotFoundError("Model not found. Train it first.")
-    return joblib.load(MODEL_PATH)
+    return joblib.load(path)
+
+
+def export_flat_model(model, directory: str = FLAT_MODEL_DIR) -> FlatForest:
+    """
+    Writes the array-backed copy of a fitted forest for fast inference.
+
+    `directory` is a symlink to a complete export in a hidden sibling
+    directory. A new export is written next to it and the link is swapped
+    with os.replace, so a loader sees either the old model or the new one.
+    """
+    flat = FlatForest.from_sklearn(model, FEATURES)
+
+    parent, name = os.path.split(os.path.abspath(directory))
+    staging = tempfile.mkdtemp(prefix=f".{name}-", dir=parent)
+    flat.save(staging)
+
+    previous = os.path.realpath(directory) if os.path.islink(directory) else None
+    if os.path.isdir(directory) and previous is None:
+        # A plain directory from an older export: moved aside (and pruned below)
+        os.rename(directory, f"{staging}.old")
 
+    link = f"{staging}.link"
+    os.symlink(os.path.basename(staging), link)
+    os.replace(link, directory)
 
+    # Keep the previous export for loaders that resolved the old link
+    for old in glob.glob(os.path.join(parent, f".{name}-*")):
+        if old not in (staging, previous):
+            shutil.rmtree(old, ignore_errors=True)
+    return flat
+
+
+def load_flat_model(directory: str = FLAT_MODEL_DIR) -> FlatForest:
+    if not os.path.exists(directory):
+        raise FileNotFoundError("Flat model not found. Export it first.")
+    return FlatForest.load(directory)
+
+
+@instrument
 def detect_ghost_demand(df, model):
-    df = df.dropna(subset=FEATURES).copy()
-    X = df[FEATURES]
+    """
+    Flags ghost SKU-days with `model`: any src.detectors.Detector, or a
+    fitted IsolationForest / FlatForest.
+    """
+    # src.detectors builds on this module
+    from src.detectors import as_detector
+
+    # Rows with every feature present (what dropna(subset=FEATURES) keeps);
+    # only their features and the flagged rows are ever copied
+    complete = df[FEATURES].notna().all(axis=1).to_numpy()
+    X = df.loc[complete, ["SKU", *FEATURES]]
 
-    df["ghost_flag"] = model.predict(X)
-    df["ghost_demand"] = (df["ghost_flag"] == -1).astype(int)
+    flags = as_detector(model).predict(X) if len(X) else np.zeros(0, dtype=np.int64)
+    ghost = np.zeros(len(df), dtype=bool)
+    ghost[complete] = flags == -1
 
-    ghost_df = df[df["ghost_demand"] == 1].copy()
+    # An explicit copy: under pandas 2 (no copy-on-write) assigning into
+    # the filtered slice raises SettingWithCopyWarning
+    ghost_df = df[ghost].copy()
+    ghost_df["ghost_flag"] = flags[flags == -1]
+    ghost_df["ghost_demand"] = (ghost_df["ghost_flag"] == -1).astype(int)
     return ghost_df
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+
+from src.flat_forest import FlatForest
+
+REGISTRY_DIR = "models"
+
+_MODEL_FILE = "model.joblib"
+_FLAT_DIR = "flat"
+_METADATA_FILE = "metadata.json"
+_CURRENT_FILE = "CURRENT"
+
+
+def _sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _atomic_write_text(path: str, text: str) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    """
+    Content-addressed store of trained ghost-demand models.
+
+    Layout:
+        models/<version>/model.joblib     uncompressed, so it can be mmap'd
+        models/<version>/flat/            FlatForest arrays (.npy)
+        models/<version>/metadata.json    features, training window, fit time
+        models/CURRENT                    version that serving loads
+
+    <version> is the first 16 hex digits of the model file's sha256.
+    A version is written to a temporary directory and renamed into place,
+    and CURRENT is swapped with os.replace, so readers only ever see
+    complete models - a crashed publish leaves the previous one current.
+    """
+
+    def __init__(self, root: str = REGISTRY_DIR):
+        self.root = root
+
+    def _path(self, *parts) -> str:
+        return os.path.join(self.root, *parts)
+
+    # ---------- write ----------
+    def publish(self, model, metadata: dict = None,
+                make_current: bool = True) -> str:
+        """Stores a fitted model and returns its version id."""
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".publish-", dir=self.root)
+
+        try:
+            model_path = os.path.join(staging, _MODEL_FILE)
+            joblib.dump(model, model_path)
+            version = _sha256(model_path)[:16]
+
+            features = (metadata or {}).get("features")
+            FlatForest.from_sklearn(model, features).save(
+                os.path.join(staging, _FLAT_DIR)
+            )
+
+            meta = {
+                "version": version,
+                "published_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "n_estimators": len(model.estimators_),
+                **(metadata or {}),
+            }
+            with open(os.path.join(staging, _METADATA_FILE), "w") as f:
+                json.dump(meta, f, indent=2, default=str)
+
+            target = self._path(version)
+            if os.path.exists(target):
+                # Same content already published
+                shutil.rmtree(staging)
+            else:
+                os.rename(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if make_current:
+            self.set_current(version)
+        return version
+
+    def set_current(self, version: str) -> None:
+        """Points serving at a published version (also used to roll back)."""
+        if not os.path.isdir(self._path(version)):
+            raise KeyError(f"Unknown model version: {version}")
+        _atomic_write_text(self._path(_CURRENT_FILE), version + "\n")
+
+    # ---------- read ----------
+    def current(self):
+        """Current version id, or None for an empty registry."""
+        try:
+            with open(self._path(_CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _resolve(self, version) -> str:
+        version = version or self.current()
+        if version is None or not os.path.isdir(self._path(version)):
+            raise FileNotFoundError("Model not found. Train it first.")
+        return version
+
+    def metadata(self, version: str = None) -> dict:
+        version = self._resolve(version)
+        with open(self._path(version, _METADATA_FILE)) as f:
+            return json.load(f)
+
+    def versions(self) -> list:
+        """Metadata of every published version, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        metas = [
+            self.metadata(name) for name in os.listdir(self.root)
+            if os.path.isfile(self._path(name, _METADATA_FILE))
+        ]
+        return sorted(metas, key=lambda m: m["published_at"])
+
+    def load(self, version: str = None, mmap: bool = True):
+        """
+        The sklearn IsolationForest. With mmap=True joblib maps the
+        model's NumPy buffers read-only, though sklearn copies each
+        tree's node table into the estimator on unpickling.
+        """
+        version = self._resolve(version)
+        return joblib.load(
+            self._path(version, _MODEL_FILE), mmap_mode="r" if mmap else None
+        )
+
+    def load_flat(self, version: str = None, mmap: bool = True) -> FlatForest:
+        """
+        The FlatForest copy. Its arrays are memory-mapped, so every
+        serving process scoring the same version shares one page-cache
+        copy of the model.
+        """
+        version = self._resolve(version)
+        return FlatForest.load(self._path(version, _FLAT_DIR), mmap=mmap)
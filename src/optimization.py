@@ -1,6 +1,10 @@
-from ortools.linear_solver import pywraplp
+from ortools.linear_solver.python import model_builder as mb
+from ortools.linear_solver.python import model_builder_helper as mbh
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+
+from src.profiling import instrument
 
 
 # -------------------------------
@@ -11,104 +15,145 @@ UNIT_PRODUCTION_COST = 50.0      # Cost per unit produced (₹ or $)
 UNIT_WASTE_PENALTY = 20.0        # Waste / disposal / discount cost per unit
 
 
-def optimize_production(ghost_df: pd.DataFrame) -> pd.DataFrame:
+# -------------------------------
+# Solver dispatch
+# -------------------------------
+def _solve_separable(cost, lower, upper, maximize=False):
     """
-    Optimize production cuts for ghost demand cases using OR-Tools.
-
-    Returns ghost_df with:
-    - recommended_cut
-    - cost_saving
-    - waste_reduction_value
+    Closed-form optimum of an LP with bounds only: every variable sits
+    at whichever bound its own cost coefficient prefers.
     """
+    direction = -cost if maximize else cost
 
-    # Defensive copy
-    df = ghost_df.copy()
+    x = np.where(direction < 0, upper, lower).astype(np.float64)
+    optimal = bool(np.all(lower <= upper) and np.all(np.isfinite(x)))
 
-    # -------------------------------
-    # 1. Filter actionable cases ONLY
-    # -------------------------------
-    df = df[
-        (df["forecast_error"] > 0) &
-        (df["rolling_mean_7"] > 0)
-    ].copy()
-
-    if df.empty:
-        # Nothing actionable
-        ghost_df["recommended_cut"] = 0.0
-        ghost_df["cost_saving"] = 0.0
-        ghost_df["waste_reduction_value"] = 0.0
-        return ghost_df
+    return x, optimal
 
-    # -------------------------------
-    # 2. Initialize solver
-    # -------------------------------
-    solver = pywraplp.Solver.CreateSolver("GLOP")
 
-    if solver is None:
+def _solve_with_ortools(cost, lower, upper, constraints=None, maximize=False):
+    """Builds a GLOP model straight from arrays (no per-variable calls)."""
+    n = len(cost)
+    if constraints is None:
+        matrix = sp.csr_matrix((0, n))
+        row_lower = row_upper = np.zeros(0)
+    else:
+        matrix, row_lower, row_upper = constraints
+        matrix = sp.csr_matrix(matrix, dtype=np.float64)
+
+    model = mb.Model()
+    model.helper.fill_model_from_sparse_data(
+        np.asarray(lower, dtype=np.float64),
+        np.asarray(upper, dtype=np.float64),
+        np.asarray(cost, dtype=np.float64),
+        np.asarray(row_lower, dtype=np.float64),
+        np.asarray(row_upper, dtype=np.float64),
+        matrix,
+    )
+    model.helper.set_maximize(maximize)
+
+    solver = mbh.ModelSolverHelper("glop")
+    if not solver.solver_is_supported():
         raise RuntimeError("OR-Tools solver could not be created")
 
-    reduction_vars = {}
+    solver.solve(model.helper)
 
-    # -------------------------------
-    # 3. Decision variables
-    # -------------------------------
-    for idx, row in df.iterrows():
-        max_cut = max(
-            0.0,
-            row["forecast_error"] * MAX_REDUCTION_RATIO
-        )
+    if solver.status() != mb.SolveStatus.OPTIMAL:
+        return np.zeros(n), False
 
-        reduction_vars[idx] = solver.NumVar(
-            0.0,
-            max_cut,
-            f"cut_{idx}"
-        )
+    return np.asarray(solver.variable_values(), dtype=np.float64), True
 
-    # -------------------------------
-    # 4. Objective function
-    # Minimize cost of overproduction
-    # -------------------------------
-    objective = solver.Objective()
 
-    unit_penalty = UNIT_PRODUCTION_COST + UNIT_WASTE_PENALTY
+def solve_lp(cost, lower, upper, constraints=None, maximize=False,
+             method: str = "auto"):
+    """
+    Solves  min/max cost·x  s.t.  lower <= x <= upper
+    and, optionally, row_lower <= A·x <= row_upper
+    where constraints = (A, row_lower, row_upper).
 
-    for idx, var in reduction_vars.items():
-        objective.SetCoefficient(var, unit_penalty)
+    method="auto" uses the closed form when no constraint couples the
+    variables and OR-Tools GLOP otherwise; "closed_form" / "ortools"
+    force a path. Returns (x, optimal).
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    lower = np.broadcast_to(np.asarray(lower, dtype=np.float64), cost.shape)
+    upper = np.broadcast_to(np.asarray(upper, dtype=np.float64), cost.shape)
 
-    objective.SetMinimization()
+    coupled = constraints is not None and constraints[0].shape[0] > 0
 
-    # -------------------------------
-    # 5. Solve
-    # -------------------------------
-    status = solver.Solve()
+    if method == "auto":
+        method = "ortools" if coupled else "closed_form"
+
+    if method == "closed_form":
+        if coupled:
+            raise ValueError("closed_form cannot handle coupling constraints")
+        return _solve_separable(cost, lower, upper, maximize)
+
+    if method == "ortools":
+        return _solve_with_ortools(cost, lower, upper, constraints, maximize)
+
+    raise ValueError(f"Unknown LP method: {method}")
+
+
+@instrument
+def optimize_production(ghost_df: pd.DataFrame, method: str = "auto",
+                        max_reduction_ratio: float = MAX_REDUCTION_RATIO,
+                        unit_production_cost: float = UNIT_PRODUCTION_COST,
+                        unit_waste_penalty: float = UNIT_WASTE_PENALTY) -> pd.DataFrame:
+    """
+    Optimize production cuts for ghost demand cases.
+
+    The per-row cut LP has no coupling constraints, so by default it is
+    solved in closed form; `method` is passed through to solve_lp. The
+    business knobs default to the module constants.
+
+    Returns ghost_df with:
+    - recommended_cut
+    - cost_saving
+    - waste_reduction_value
+    """
 
     # -------------------------------
-    # 6. Handle solver result safely
+    # 1. Filter actionable cases ONLY
     # -------------------------------
-    df["recommended_cut"] = 0.0
+    forecast_error = ghost_df["forecast_error"].to_numpy(dtype=np.float64)
+    rolling_mean = ghost_df["rolling_mean_7"].to_numpy(dtype=np.float64)
 
-    if status == pywraplp.Solver.OPTIMAL:
-        for idx, var in reduction_vars.items():
-            df.loc[idx, "recommended_cut"] = var.solution_value()
-    else:
+    actionable = (forecast_error > 0) & (rolling_mean > 0)
+
+    recommended_cut = np.zeros(len(ghost_df))
+
+    if actionable.any():
+        # -------------------------------
+        # 2. Decision variables (bounds)
+        # -------------------------------
+        max_cut = np.maximum(
+            0.0,
+            forecast_error[actionable] * max_reduction_ratio
+        )
+
+        # -------------------------------
+        # 3. Objective function
+        # Every unit cut avoids its production and waste cost, so the
+        # avoided overproduction cost is maximized
+        # -------------------------------
+        unit_penalty = unit_production_cost + unit_waste_penalty
+        cost = np.full(len(max_cut), unit_penalty)
+
+        # -------------------------------
+        # 4. Solve
         # Infeasible or abnormal → no action
-        df["recommended_cut"] = 0.0
+        # -------------------------------
+        cut, optimal = solve_lp(cost, 0.0, max_cut, maximize=True, method=method)
 
-    # -------------------------------
-    # 7. Business impact metrics
-    # -------------------------------
-    df["cost_saving"] = df["recommended_cut"] * UNIT_PRODUCTION_COST
-    df["waste_reduction_value"] = df["recommended_cut"] * UNIT_WASTE_PENALTY
+        if optimal:
+            recommended_cut[actionable] = cut
 
     # -------------------------------
-    # 8. Merge back into original DF
+    # 5. Business impact metrics, written back in bulk
     # -------------------------------
-    ghost_df["recommended_cut"] = 0.0
-    ghost_df["cost_saving"] = 0.0
-    ghost_df["waste_reduction_value"] = 0.0
-
-    ghost_df.update(
-        df[["recommended_cut", "cost_saving", "waste_reduction_value"]]
-    )
+    ghost_df["recommended_cut"] = recommended_cut
+    ghost_df["cost_saving"] = recommended_cut * unit_production_cost
+    ghost_df["waste_reduction_value"] = recommended_cut * unit_waste_penalty
 
     return ghost_df
@@ -0,0 +1,147 @@
+import zlib
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+def shard_of(values, n_shards: int) -> np.ndarray:
+    """
+    Stable hash partition (crc32) of each value into [0, n_shards).
+    Each distinct value is hashed once.
+    """
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    buckets = np.fromiter(
+        (zlib.crc32(str(u).encode()) % n_shards for u in uniques),
+        dtype=np.int64,
+        count=len(uniques),
+    )
+    return buckets[codes]
+
+
+class SharedFrame:
+    """
+    A DataFrame's columns and index placed in POSIX shared memory so that
+    worker processes can attach by name instead of receiving a pickle.
+
+    String-like columns are dictionary-encoded (int32 codes + a
+    fixed-width unicode categories array); everything else is stored as
+    its NumPy buffer. The creating process owns the blocks and must
+    call unlink() when done; workers call attach() on the `spec`.
+
+    `arrays` carries extra per-row NumPy arrays (e.g. shard ids) that
+    workers read with array(name).
+    """
+
+    def __init__(self, spec: dict, blocks: list, owner: bool):
+        self.spec = spec
+        self._handles = {shm.name: shm for shm in blocks}
+        self._owner = owner
+
+    # ---------- create / attach ----------
+    @staticmethod
+    def _put(array: np.ndarray, blocks: list) -> dict:
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        blocks.append(shm)
+        return {"name": shm.name, "dtype": array.dtype.str, "shape": array.shape}
+
+    @classmethod
+    def create(cls, df: pd.DataFrame, arrays: dict = None) -> "SharedFrame":
+        blocks = []
+        columns = []
+
+        def _encode(series):
+            if series.dtype.kind in "biufcmM":
+                return {
+                    "dtype": str(series.dtype),
+                    "values": cls._put(series.to_numpy(), blocks),
+                }
+            codes, uniques = pd.factorize(series)
+            return {
+                "dtype": str(series.dtype),
+                "codes": cls._put(codes.astype(np.int32), blocks),
+                "categories": cls._put(np.asarray(uniques, dtype=str), blocks),
+            }
+
+        try:
+            for col in df.columns:
+                spec = _encode(df[col])
+                spec["column"] = col
+                columns.append(spec)
+            index = _encode(df.index.to_series())
+            extra = {
+                name: cls._put(np.asarray(values), blocks)
+                for name, values in (arrays or {}).items()
+            }
+        except Exception:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+            raise
+
+        spec = {"columns": columns, "index": index, "arrays": extra}
+        return cls(spec, blocks, owner=True)
+
+    @classmethod
+    def attach(cls, spec: dict) -> "SharedFrame":
+        return cls(spec, [], owner=False)
+
+    # ---------- read ----------
+    def _view(self, ref: dict) -> np.ndarray:
+        shm = self._handles.get(ref["name"])
+        if shm is None:
+            # Pool workers share the creator's resource tracker, so the
+            # segment is unlinked exactly once, by the creator
+            shm = shared_memory.SharedMemory(name=ref["name"])
+            self._handles[ref["name"]] = shm
+        return np.ndarray(ref["shape"], dtype=np.dtype(ref["dtype"]), buffer=shm.buf)
+
+    def array(self, name: str) -> np.ndarray:
+        """Read-only view of an extra array passed to create()."""
+        view = self._view(self.spec["arrays"][name])
+        view.flags.writeable = False
+        return view
+
+    def to_frame(self, rows=None) -> pd.DataFrame:
+        """Copies the selected rows (mask or positions) out of shared memory."""
+        take = slice(None) if rows is None else rows
+
+        def _decode(spec):
+            if "values" in spec:
+                values = np.array(self._view(spec["values"])[take])
+                return pd.Series(values).astype(spec["dtype"])
+            codes = np.array(self._view(spec["codes"])[take])
+            categories = self._view(spec["categories"]).astype(object)
+            values = pd.Categorical.from_codes(codes, categories)
+            return pd.Series(values).astype(spec["dtype"])
+
+        data = {spec["column"]: _decode(spec).to_numpy() for spec in self.spec["columns"]}
+        index = pd.Index(_decode(self.spec["index"]))
+
+        return pd.DataFrame(
+            data, index=index, columns=[s["column"] for s in self.spec["columns"]]
+        )
+
+    # ---------- cleanup ----------
+    def close(self):
+        for shm in self._handles.values():
+            shm.close()
+        self._handles = {}
+
+    def unlink(self):
+        handles = list(self._handles.values())
+        self.close()
+        if self._owner:
+            for shm in handles:
+                shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._owner:
+            self.unlink()
+        else:
+            self.close()
@@ -0,0 +1,255 @@
+"""
+Sketch-based SKU prefilter for the per-SKU stages.
+
+Most long-tail SKUs sell on a handful of days, and a SKU with fewer than
+PRIMARY_WINDOW sales days never gets a complete feature row, so
+detect_ghost_demand can never flag it. DemandSketch keeps bounded-memory
+Count-Min sketches of per-SKU units, sales days and units per time
+bucket (for recent growth), plus a top-k heavy-hitter set, and can be
+fed chunk by chunk during ingest. SkuPrefilter keeps only the SKUs
+whose estimates clear the thresholds.
+
+Count-Min estimates never undercount, so the sales-days threshold alone
+(the default) skips only SKUs that cannot be flagged. Volume / growth
+thresholds trade recall for speed; estimate_recall_loss measures that
+on a sample of the skipped SKUs.
+"""
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering import PRIMARY_WINDOW, add_time_series_features
+from src.ml_model import detect_ghost_demand
+from src.profiling import instrument
+
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def sku_hashes(skus) -> np.ndarray:
+    """64-bit hash of every SKU; each distinct value is hashed once."""
+    codes, uniques = pd.factorize(pd.Series(skus), use_na_sentinel=False)
+    hashes = pd.util.hash_array(np.asarray(uniques, dtype=object))
+    return hashes[codes]
+
+
+def _mix(hashes: np.ndarray, seed: int) -> np.ndarray:
+    # splitmix64 finalizer; uint64 arithmetic wraps as intended
+    x = hashes ^ np.uint64(seed)
+    x = (x ^ (x >> np.uint64(30))) * _MIX_1
+    x = (x ^ (x >> np.uint64(27))) * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+
+class CountMinSketch:
+    """
+    depth x width counters; a key's estimate is the minimum of its depth
+    counters, which is never below its true count.
+    """
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4, seed: int = 0):
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        return np.stack([
+            (_mix(hashes, self.seed * self.depth + row + 1) % np.uint64(self.width))
+            .astype(np.int64)
+            for row in range(self.depth)
+        ])
+
+    def add(self, hashes: np.ndarray, counts) -> None:
+        counts = np.broadcast_to(np.asarray(counts, dtype=np.float64), hashes.shape)
+        for row, columns in enumerate(self._columns(hashes)):
+            self.table[row] += np.bincount(
+                columns, weights=counts, minlength=self.width
+            ).astype(np.int64)
+
+    def estimate(self, hashes: np.ndarray) -> np.ndarray:
+        columns = self._columns(hashes)
+        return np.min(self.table[np.arange(self.depth)[:, None], columns], axis=0)
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+
+class TopK:
+    """
+    Heavy-hitter candidates: the k keys with the largest estimates seen
+    so far (estimates come from a Count-Min sketch of the same stream).
+    """
+
+    def __init__(self, k: int = 1_000):
+        self.k = k
+        self.keys = np.array([], dtype=object)
+        self.estimates = np.array([], dtype=np.int64)
+
+    def update(self, keys, estimates) -> None:
+        keys = np.concatenate([self.keys, np.asarray(keys, dtype=object)])
+        estimates = np.concatenate([self.estimates, np.asarray(estimates, dtype=np.int64)])
+        # Latest estimate per key wins (estimates only grow)
+        order = np.argsort(-estimates, kind="stable")
+        _, first = np.unique(keys[order], return_index=True)
+        keep = order[first]
+        if len(keep) > self.k:
+            keep = keep[np.argpartition(-estimates[keep], self.k - 1)[:self.k]]
+        self.keys, self.estimates = keys[keep], estimates[keep]
+
+    def items(self) -> pd.Series:
+        return pd.Series(self.estimates, index=self.keys).sort_values(ascending=False)
+
+
+class DemandSketch:
+    """
+    Per-SKU units, sales days and units per `bucket_days` bucket (the
+    newest `max_buckets` buckets are kept), all as Count-Min sketches,
+    plus the top_k SKUs by units. update() takes daily_df rows or
+    per-chunk partial aggregates of them; a SKU-day split over two
+    chunks counts as two sales days, which only errs towards keeping.
+    """
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4, bucket_days: int = 7,
+                 max_buckets: int = 8, top_k: int = 1_000, seed: int = 0):
+        self.width, self.depth, self.seed = width, depth, seed
+        self.bucket_days = bucket_days
+        self.max_buckets = max_buckets
+        self.units = CountMinSketch(width, depth, seed)
+        self.days = CountMinSketch(width, depth, seed)
+        self.buckets = {}
+        self.top = TopK(top_k)
+
+    def update(self, daily: pd.DataFrame) -> None:
+        if daily.empty:
+            return
+        hashes = sku_hashes(daily["SKU"])
+        sales = daily["daily_sales"].to_numpy(dtype=np.int64)
+        self.units.add(hashes, sales)
+        self.days.add(hashes, 1)
+
+        day = daily["Date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+        bucket = day // self.bucket_days
+        for b in np.unique(bucket):
+            if b not in self.buckets:
+                if len(self.buckets) >= self.max_buckets and b < min(self.buckets):
+                    continue
+                self.buckets[b] = CountMinSketch(self.width, self.depth, self.seed)
+            in_bucket = bucket == b
+            self.buckets[b].add(hashes[in_bucket], sales[in_bucket])
+        for old in sorted(self.buckets)[:-self.max_buckets]:
+            del self.buckets[old]
+
+        skus, first = np.unique(np.asarray(daily["SKU"], dtype=object), return_index=True)
+        self.top.update(skus, self.units.estimate(hashes[first]))
+
+    def estimates(self, skus) -> pd.DataFrame:
+        """Estimated units, sales_days and growth (newest bucket vs. the mean of the rest)."""
+        skus = pd.Index(skus)
+        hashes = sku_hashes(skus)
+        out = pd.DataFrame({
+            "units": self.units.estimate(hashes),
+            "sales_days": self.days.estimate(hashes),
+        }, index=skus)
+
+        ordered = sorted(self.buckets)
+        if len(ordered) > 1:
+            recent = self.buckets[ordered[-1]].estimate(hashes)
+            earlier = np.mean([self.buckets[b].estimate(hashes) for b in ordered[:-1]], axis=0)
+            out["growth"] = (recent + 1.0) / (earlier + 1.0)
+        else:
+            out["growth"] = 1.0
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        return (self.units.nbytes + self.days.nbytes
+                + sum(sketch.nbytes for sketch in self.buckets.values()))
+
+
+class SkuPrefilter:
+    """
+    Keeps the SKUs worth the per-SKU stages: at least `min_days`
+    estimated sales days, and then either `min_units` estimated units,
+    growth of at least `min_growth`, or a place in the sketch's top-k.
+    The defaults only apply the lossless sales-days rule.
+    """
+
+    def __init__(self, min_days: int = PRIMARY_WINDOW, min_units: int = 0,
+                 min_growth: float = None, keep_top_k: bool = True, **sketch_args):
+        self.min_days = min_days
+        self.min_units = min_units
+        self.min_growth = min_growth
+        self.keep_top_k = keep_top_k
+        self.sketch_args = sketch_args
+        self.report = {}
+
+    def select(self, sketch: DemandSketch, skus) -> np.ndarray:
+        """Keep mask for distinct `skus`."""
+        est = sketch.estimates(skus)
+        worth = est["units"].to_numpy() >= self.min_units
+        if self.min_growth is not None:
+            worth |= est["growth"].to_numpy() >= self.min_growth
+        if self.keep_top_k:
+            worth |= est.index.isin(sketch.top.keys)
+        return worth & (est["sales_days"].to_numpy() >= self.min_days)
+
+    @instrument(name="prefilter_skus")
+    def apply(self, daily_df: pd.DataFrame, sketch: DemandSketch = None) -> pd.DataFrame:
+        """
+        daily_df restricted to the selected SKUs. `sketch` is the one fed
+        during ingest; without it one is built from daily_df. The counts
+        are kept in self.report.
+        """
+        if sketch is None:
+            sketch = DemandSketch(**self.sketch_args)
+            sketch.update(daily_df)
+
+        codes, skus = pd.factorize(daily_df["SKU"])
+        keep = np.append(self.select(sketch, skus), False)
+        rows = keep[codes]
+        self.report = {
+            "skus": len(skus),
+            "skus_kept": int(keep.sum()),
+            "skus_skipped": len(skus) - int(keep.sum()),
+            "rows_skipped": int((~rows).sum()),
+            "sketch_bytes": sketch.nbytes,
+        }
+        return daily_df[rows]
+
+
+def estimate_recall_loss(daily_df: pd.DataFrame, kept: pd.DataFrame, flagged: pd.DataFrame,
+                         model, sample: float = 0.05, seed: int = 0) -> dict:
+    """
+    Estimated share of ghost SKU-days lost by prefiltering: features and
+    detection are run exhaustively on a `sample` fraction of the skipped
+    SKUs, and their flags scaled up to all skipped SKUs. `kept` is the
+    prefiltered daily_df and `flagged` the detections on it. Actionable
+    means optimize_production would consider a cut (positive forecast
+    error and rolling mean). sample=1.0 gives the exact loss.
+    """
+    skipped = daily_df[~daily_df["SKU"].isin(pd.unique(kept["SKU"]))]
+    skus = pd.unique(skipped["SKU"])
+    n_sample = min(len(skus), max(int(np.ceil(sample * len(skus))), 1)) if len(skus) else 0
+
+    def actionable(df):
+        return int(((df["forecast_error"] > 0) & (df["rolling_mean_7"] > 0)).sum())
+
+    found = {"flagged": len(flagged), "actionable": actionable(flagged)}
+    missed = {"flagged": 0.0, "actionable": 0.0}
+    if n_sample:
+        chosen = np.random.default_rng(seed).choice(skus, n_sample, replace=False)
+        features = add_time_series_features(skipped[skipped["SKU"].isin(chosen)])
+        sample_flags = detect_ghost_demand(features, model)
+        scale = len(skus) / n_sample
+        missed = {
+            "flagged": len(sample_flags) * scale,
+            "actionable": actionable(sample_flags) * scale,
+        }
+
+    report = {"sampled_skus": n_sample}
+    for kind in ("flagged", "actionable"):
+        total = found[kind] + missed[kind]
+        report[f"est_missed_{kind}"] = missed[kind]
+        report[f"est_recall_{kind}"] = found[kind] / total if total else 1.0
+    return report
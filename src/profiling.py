@@ -0,0 +1,327 @@
+"""
+Per-stage instrumentation for the pipeline.
+
+Stage functions are wrapped with @instrument. Outside a profiling run
+the wrapper is a single global check, so it costs nothing measurable;
+inside one it records, per call:
+
+    wall_s, cpu_s           perf_counter / process_time deltas
+    rss_mb, rss_delta_mb    resident set size after the call / change during it
+    process_peak_rss_mb     ru_maxrss: the peak of the whole process so far,
+                            not of this stage (it never goes down)
+    py_peak_mb              tracemalloc peak during the call (memory="tracemalloc")
+    rows_in, rows_out       len() of the first DataFrame argument / the result
+
+    with profiled("traces/run.json", hook=cprofile_hook("traces/prof")):
+        ... run the pipeline ...
+
+    python -m src.profiling diff traces/before.json traces/after.json
+
+Traces are JSON or CSV (by extension), one record per stage call, so
+two runs can be diffed to catch regressions.
+"""
+import argparse
+import contextlib
+import cProfile
+import functools
+import itertools
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+import uuid
+
+import pandas as pd
+
+# The run being recorded; None when profiling is off
+_ACTIVE = None
+
+TRACE_FIELDS = [
+    "run_id", "seq", "stage", "depth", "wall_s", "cpu_s",
+    "rss_mb", "rss_delta_mb", "process_peak_rss_mb", "py_peak_mb",
+    "rows_in", "rows_out", "error",
+]
+
+# RSS changes below this are page-level noise when comparing stages
+RSS_NOISE_MB = 8.0
+
+# ru_maxrss is KiB on Linux, bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 2 ** 20
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _process_peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT / 2 ** 20
+
+
+def _rows(value):
+    return len(value) if isinstance(value, pd.DataFrame) else None
+
+
+class ProfileRun:
+    """
+    Records stage calls while active.
+
+    `memory="tracemalloc"` also tracks Python allocation peaks per stage
+    (noticeably slower). `hook(stage)` may return a context manager
+    entered around every stage call, e.g. cprofile_hook(), or one that
+    runs `py-spy record --pid <pid>` for the duration of the stage.
+    """
+
+    def __init__(self, memory: str = "rss", hook=None):
+        if memory not in ("rss", "tracemalloc"):
+            raise ValueError(f"Unknown memory mode: {memory}")
+        self.run_id = uuid.uuid4().hex[:12]
+        self.memory = memory
+        self.hook = hook
+        self.records = []
+        self._depth = 0
+        self._started_tracemalloc = False
+
+    # ---------- activation ----------
+    def __enter__(self):
+        global _ACTIVE
+        if _ACTIVE is not None:
+            raise RuntimeError("A profiling run is already active")
+        if self.memory == "tracemalloc" and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        _ACTIVE = self
+        return self
+
+    def __exit__(self, *exc):
+        global _ACTIVE
+        _ACTIVE = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    # ---------- recording ----------
+    def _begin(self, name: str, rows_in) -> tuple:
+        record = {
+            "run_id": self.run_id,
+            "seq": len(self.records),
+            "stage": name,
+            "depth": self._depth,
+            "rows_in": rows_in,
+            "rows_out": None,
+            "error": None,
+        }
+        self.records.append(record)
+
+        base = None
+        if self.memory == "tracemalloc":
+            # Nested stages reset the peak, so an outer stage's peak only
+            # covers the part after its last inner stage
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        self._depth += 1
+        return record, base, _rss_mb(), time.perf_counter(), time.process_time()
+
+    def _end(self, state: tuple) -> None:
+        record, base, rss, wall, cpu = state
+        record["wall_s"] = time.perf_counter() - wall
+        record["cpu_s"] = time.process_time() - cpu
+        self._depth -= 1
+        record["rss_mb"] = _rss_mb()
+        record["rss_delta_mb"] = (
+            record["rss_mb"] - rss
+            if rss is not None and record["rss_mb"] is not None else None
+        )
+        record["process_peak_rss_mb"] = _process_peak_rss_mb()
+        record["py_peak_mb"] = (
+            (tracemalloc.get_traced_memory()[1] - base) / 2 ** 20
+            if base is not None else None
+        )
+
+    @contextlib.contextmanager
+    def _measure(self, name: str, rows_in=None):
+        state = self._begin(name, rows_in)
+        try:
+            with self.hook(name) if self.hook else contextlib.nullcontext():
+                yield state[0]
+        except BaseException as exc:
+            state[0]["error"] = type(exc).__name__
+            raise
+        finally:
+            self._end(state)
+
+    def call(self, name: str, func, args, kwargs):
+        rows_in = next((len(a) for a in args if isinstance(a, pd.DataFrame)), None)
+        with self._measure(name, rows_in) as record:
+            result = func(*args, **kwargs)
+            record["rows_out"] = _rows(result)
+        return result
+
+    # ---------- output ----------
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.records, columns=TRACE_FIELDS)
+
+    def save(self, path: str) -> None:
+        """Writes the trace as JSON, or CSV when path ends in .csv."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if path.endswith(".csv"):
+            self.to_frame().to_csv(path, index=False)
+        else:
+            with open(path, "w") as f:
+                json.dump({"run_id": self.run_id, "records": self.records}, f, indent=2)
+
+
+def instrument(func=None, *, name: str = None):
+    """Decorator marking a function as a profiled pipeline stage."""
+    if func is None:
+        return functools.partial(instrument, name=name)
+
+    stage = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        run = _ACTIVE
+        if run is None:
+            return func(*args, **kwargs)
+        return run.call(stage, func, args, kwargs)
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """Profiles a block that is not a single function call."""
+    run = _ACTIVE
+    if run is None:
+        yield
+        return
+    with run._measure(name):
+        yield
+
+
+def cprofile_hook(directory: str):
+    """
+    Hook that runs each stage under cProfile and writes
+    <directory>/<seq>-<stage>.prof (pstats format: snakeviz, gprof2dot,
+    `python -m pstats`). Stages nested in a profiled stage are covered
+    by the outer profile, since only one profiler can be active.
+    """
+    os.makedirs(directory, exist_ok=True)
+    counter = itertools.count()
+    active = []
+
+    @contextlib.contextmanager
+    def hook(name):
+        if active:
+            yield
+            return
+        active.append(name)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            active.pop()
+            profiler.dump_stats(os.path.join(directory, f"{next(counter):03d}-{name}.prof"))
+
+    return hook
+
+
+@contextlib.contextmanager
+def profiled(path: str = None, memory: str = "rss", hook=None):
+    """
+    Profiles the enclosed block and saves the trace to `path`.
+    With path=None nothing is recorded.
+    """
+    if not path:
+        yield None
+        return
+    with ProfileRun(memory=memory, hook=hook) as run:
+        try:
+            yield run
+        finally:
+            run.save(path)
+
+
+# -------------------------------
+# Trace comparison
+# -------------------------------
+def load_trace(path: str) -> pd.DataFrame:
+    if path.endswith(".csv"):
+        trace = pd.read_csv(path)
+    else:
+        with open(path) as f:
+            trace = pd.DataFrame(json.load(f)["records"])
+    # Older traces called the process peak max_rss_mb
+    trace = trace.rename(columns={"max_rss_mb": "process_peak_rss_mb"})
+    return trace.reindex(columns=TRACE_FIELDS)
+
+
+def diff_traces(before: pd.DataFrame, after: pd.DataFrame,
+                threshold: float = 1.2) -> pd.DataFrame:
+    """
+    Per-stage totals of two traces side by side. `regression` marks
+    stages whose wall time or RSS growth grew by more than `threshold`x.
+    RSS growth below RSS_NOISE_MB counts as RSS_NOISE_MB, so stages that
+    barely allocate do not flag on noise. The process peak is shown but
+    not compared: it is cumulative, so it belongs to the run, not a stage.
+    """
+    def totals(trace):
+        grouped = trace.groupby("stage", sort=False)
+        return pd.DataFrame({
+            "calls": grouped.size(),
+            "wall_s": grouped["wall_s"].sum(),
+            "cpu_s": grouped["cpu_s"].sum(),
+            "rss_delta_mb": grouped["rss_delta_mb"].sum(min_count=1),
+            "process_peak_rss_mb": grouped["process_peak_rss_mb"].max(),
+            "py_peak_mb": grouped["py_peak_mb"].max(),
+            "rows_out": grouped["rows_out"].sum(min_count=1),
+        })
+
+    before, after = totals(before), totals(after)
+    order = list(dict.fromkeys([*before.index, *after.index]))
+    merged = before.join(
+        after, how="outer", lsuffix="_before", rsuffix="_after"
+    ).reindex(order)
+    merged["wall_ratio"] = merged["wall_s_after"] / merged["wall_s_before"]
+    merged["rss_ratio"] = (
+        merged["rss_delta_mb_after"].clip(lower=RSS_NOISE_MB)
+        / merged["rss_delta_mb_before"].clip(lower=RSS_NOISE_MB)
+    )
+    merged["regression"] = (merged["wall_ratio"] > threshold) | (
+        merged["rss_ratio"] > threshold
+    )
+    return merged.reset_index().rename(columns={"index": "stage"})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare pipeline traces")
+    sub = parser.add_subparsers(dest="command", required=True)
+    diff = sub.add_parser("diff")
+    diff.add_argument("before")
+    diff.add_argument("after")
+    diff.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    result = diff_traces(load_trace(args.before), load_trace(args.after), args.threshold)
+    columns = [
+        "stage", "wall_s_before", "wall_s_after", "wall_ratio",
+        "rss_delta_mb_before", "rss_delta_mb_after", "rows_out_before",
+        "rows_out_after", "regression",
+    ]
+    print(result[columns].to_string(index=False, float_format="%.3f"))
+    return 1 if result["regression"].any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
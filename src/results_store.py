@@ -0,0 +1,269 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+RESULTS_STORE_DIR = "results_store"
+
+_DB_FILE = "results.db"
+_PARQUET_DIR = "parquet"
+_TABLE = "results"
+_KEY = ["SKU", "Date"]
+
+
+def _sql_type(dtype) -> str:
+    if dtype.kind in "biu":
+        return "INTEGER"
+    if dtype.kind == "f":
+        return "REAL"
+    return "TEXT"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class ResultsStore:
+    """
+    Local sink for pipeline results, standing in for the BigQuery table.
+
+    Every day's rows are written twice:
+      - parquet/date=YYYY-MM-DD/part.parquet, sorted by SKU, for
+        columnar scans with partition pruning and row-group pushdown;
+      - results.db (SQLite), with a (SKU, Date) primary key and Date /
+        (ghost_demand, Date) indexes, for point lookups by SKU.
+
+    write() replaces whole days, so appending a new day and re-running
+    an old one are the same operation and re-runs are idempotent. Days
+    passed to write() without rows are cleared.
+    """
+
+    def __init__(self, root: str = RESULTS_STORE_DIR):
+        self.root = root
+        self.parquet_dir = os.path.join(root, _PARQUET_DIR)
+        os.makedirs(self.parquet_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, _DB_FILE))
+        self._db.execute("PRAGMA journal_mode=WAL")
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- schema ----------
+    def _columns(self) -> list:
+        rows = self._db.execute(f"PRAGMA table_info({_TABLE})").fetchall()
+        return [row[1] for row in rows]
+
+    def _ensure_schema(self, df: pd.DataFrame) -> None:
+        existing = self._columns()
+        if not existing:
+            defs = ", ".join(
+                f"{_quote(col)} {'TEXT' if col in _KEY else _sql_type(df[col].dtype)}"
+                for col in df.columns
+            )
+            self._db.execute(
+                f"CREATE TABLE {_TABLE} ({defs}, PRIMARY KEY (SKU, Date))"
+            )
+            # Day replacement and date-range reads without a table scan
+            self._db.execute(f"CREATE INDEX idx_{_TABLE}_date ON {_TABLE} (Date)")
+            if "ghost_demand" in df.columns:
+                self._db.execute(
+                    f"CREATE INDEX idx_{_TABLE}_ghost ON {_TABLE} (ghost_demand, Date)"
+                )
+            return
+
+        for col in df.columns:
+            if col not in existing:
+                self._db.execute(
+                    f"ALTER TABLE {_TABLE} ADD COLUMN {_quote(col)} "
+                    f"{_sql_type(df[col].dtype)}"
+                )
+
+    # ---------- write ----------
+    def _partition_path(self, day: str) -> str:
+        return os.path.join(self.parquet_dir, f"date={day}", "part.parquet")
+
+    def write(self, results: pd.DataFrame, days=None) -> list:
+        """
+        Stores results, replacing every day in `days` (default: the days
+        results contain). A listed day without rows is cleared, so a
+        re-run that no longer flags anything removes the old rows.
+        Returns the days replaced as YYYY-MM-DD strings.
+        """
+        missing = [col for col in _KEY if col not in results.columns]
+        if missing and not results.empty:
+            raise KeyError(f"Results need columns {missing}")
+
+        df = results.reset_index(drop=True)
+        row_days = pd.Series([], dtype=object)
+        if not df.empty:
+            df["Date"] = pd.to_datetime(df["Date"])
+            df["SKU"] = df["SKU"].astype(str)
+            row_days = df["Date"].dt.strftime("%Y-%m-%d")
+
+        if days is None:
+            days = row_days.unique()
+        days = sorted({self._day(day) for day in days})
+        outside = set(row_days.unique()) - set(days)
+        if outside:
+            raise ValueError(f"Results have rows outside days: {sorted(outside)}")
+        if not days:
+            return []
+
+        groups = df.groupby(row_days, sort=True).groups if not df.empty else {}
+
+        # Parquet files are staged first and swapped in only once the SQL
+        # transaction has committed, so a failed write leaves both as they were
+        staged = {}
+        try:
+            with self._db:
+                if not df.empty:
+                    self._ensure_schema(df)
+                for day in days:
+                    if day in groups:
+                        day_df = df.loc[groups[day]].sort_values(_KEY, kind="stable")
+                        self._write_sql(day, day_df)
+                        staged[day] = self._stage_parquet(day_df)
+                    elif self._columns():
+                        self._db.execute(f"DELETE FROM {_TABLE} WHERE Date = ?", (day,))
+        except BaseException:
+            for tmp in staged.values():
+                os.remove(tmp)
+            raise
+
+        for day in days:
+            if day in staged:
+                path = self._partition_path(day)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(staged[day], path)
+            else:
+                shutil.rmtree(os.path.dirname(self._partition_path(day)),
+                              ignore_errors=True)
+
+        return days
+
+    def _write_sql(self, day: str, day_df: pd.DataFrame) -> None:
+        self._db.execute(f"DELETE FROM {_TABLE} WHERE Date = ?", (day,))
+
+        # tolist() yields Python scalars; SQLite stores NaN as NULL
+        columns = [
+            [day] * len(day_df) if col == "Date" else day_df[col].tolist()
+            for col in day_df.columns
+        ]
+        names = ", ".join(_quote(col) for col in day_df.columns)
+        marks = ", ".join("?" * len(day_df.columns))
+        self._db.executemany(
+            f"INSERT INTO {_TABLE} ({names}) VALUES ({marks})", zip(*columns)
+        )
+
+    def _stage_parquet(self, day_df: pd.DataFrame) -> str:
+        # Dot-prefixed files are skipped by dataset discovery and days()
+        fd, tmp = tempfile.mkstemp(dir=self.parquet_dir, prefix=".", suffix=".parquet")
+        os.close(fd)
+        table = pa.Table.from_pandas(day_df.drop(columns="Date"), preserve_index=False)
+        pq.write_table(table, tmp, row_group_size=64 * 1024)
+        return tmp
+
+    # ---------- read ----------
+    def read(self, skus=None, start=None, end=None, ghost_only: bool = False,
+             columns=None, engine: str = "auto") -> pd.DataFrame:
+        """
+        Rows matching the SKU list, the inclusive [start, end] date range
+        and, with ghost_only, ghost_demand == 1; sorted by (SKU, Date).
+        `columns` selects the value columns; SKU and Date always come back.
+
+        engine="sql" answers from the SQLite indexes (best for a few
+        SKUs), engine="parquet" scans only the partitions in the date
+        range with the filters pushed down to row groups. "auto" uses
+        SQL when SKUs are given.
+        """
+        if columns is not None:
+            columns = _KEY + [c for c in columns if c not in _KEY]
+
+        if engine == "auto":
+            engine = "sql" if skus is not None else "parquet"
+        if engine == "sql":
+            df = self._read_sql(skus, start, end, ghost_only, columns)
+        elif engine == "parquet":
+            df = self._read_parquet(skus, start, end, ghost_only, columns)
+        else:
+            raise ValueError(f"Unknown engine: {engine}")
+
+        return df.sort_values(_KEY, kind="stable").reset_index(drop=True)
+
+    @staticmethod
+    def _day(value) -> str:
+        return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+    def _read_sql(self, skus, start, end, ghost_only, columns) -> pd.DataFrame:
+        if not self._columns():
+            return pd.DataFrame(columns=columns or _KEY)
+
+        clauses, params = [], []
+        if skus is not None:
+            skus = [str(s) for s in skus]
+            clauses.append(f"SKU IN ({', '.join('?' * len(skus))})")
+            params.extend(skus)
+        if start is not None:
+            clauses.append("Date >= ?")
+            params.append(self._day(start))
+        if end is not None:
+            clauses.append("Date <= ?")
+            params.append(self._day(end))
+        if ghost_only:
+            clauses.append("ghost_demand = 1")
+
+        select = "*" if columns is None else ", ".join(_quote(c) for c in columns)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        df = pd.read_sql_query(
+            f"SELECT {select} FROM {_TABLE}{where}", self._db, params=params
+        )
+        if "Date" in df.columns:
+            df["Date"] = pd.to_datetime(df["Date"])
+        return df
+
+    def _read_parquet(self, skus, start, end, ghost_only, columns) -> pd.DataFrame:
+        if not self.days():
+            return pd.DataFrame(columns=columns or _KEY)
+
+        dataset = ds.dataset(
+            self.parquet_dir, format="parquet",
+            partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+        )
+
+        # Zero-padded ISO days compare correctly as strings, so the date
+        # range prunes whole partition directories
+        condition = ds.scalar(True)
+        if start is not None:
+            condition &= ds.field("date") >= self._day(start)
+        if end is not None:
+            condition &= ds.field("date") <= self._day(end)
+        if skus is not None:
+            condition &= ds.field("SKU").isin([str(s) for s in skus])
+        if ghost_only:
+            condition &= ds.field("ghost_demand") == 1
+
+        wanted = None
+        if columns is not None:
+            wanted = [c for c in columns if c != "Date"] + ["date"]
+
+        df = dataset.to_table(columns=wanted, filter=condition).to_pandas()
+        df.insert(0, "Date", pd.to_datetime(df.pop("date")))
+        return df if columns is None else df[columns]
+
+    def days(self) -> list:
+        """Days present in the store, oldest first."""
+        return sorted(
+            name.split("=", 1)[1] for name in os.listdir(self.parquet_dir)
+            if name.startswith("date=")
+        )
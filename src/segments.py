@@ -0,0 +1,275 @@
+"""
+Per-segment detector family.
+
+One global model scores fast-moving basics and seasonal fashion SKUs
+against the same contamination. train_segment_models fits one detector
+per segment instead: the SKU prefix (`J0003-SET-M` -> `J0003`) or the
+Ecommerce dataset's product_category_name. Segments are fitted in
+parallel worker processes that attach to the feature rows in shared
+memory, and each model is saved as its own artifact, with an
+index.json listing them. Segments with fewer than `min_rows` complete
+feature rows, and segments unseen at training time, are scored by a
+default model fitted on every row.
+
+SegmentedDetector is the Detector over such a directory. It loads
+segment models lazily through a bounded LRU cache, and it groups rows by
+segment, so every model scores one contiguous batch.
+"""
+import functools
+import json
+import os
+import shutil
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.detectors import DETECTOR_PATHS, DETECTORS, ForestDetector, make_detector
+from src.ecommerce_orders import ECOMMERCE_DIR, SPLITS, read_tables
+from src.flat_forest import FlatForest
+from src.ml_model import FEATURES
+from src.parallel import SharedFrame
+from src.profiling import instrument
+
+SEGMENT_MODEL_DIR = "segment_models"
+DEFAULT_SEGMENT = "__default__"
+
+_INDEX_FILE = "index.json"
+_CATEGORY_FILE = "categories.parquet"
+_ARTIFACT_SUFFIX = {"forest": ".flat", "mad": ".npz"}
+# Training runs kept on disk; readers still on the previous index can finish
+_KEEP_RUNS = 2
+
+
+def index_path(directory: str = SEGMENT_MODEL_DIR) -> str:
+    return os.path.join(directory, _INDEX_FILE)
+
+
+def product_categories(directory: str = ECOMMERCE_DIR, splits=SPLITS) -> pd.Series:
+    """product_category_name by product_id (the Ecommerce pipeline's SKU)."""
+    products = read_tables(["products"], directory, splits)["products"]
+    products = products.drop_duplicates("product_id")
+    return products.set_index("product_id")["product_category_name"]
+
+
+def segment_labels(skus, by: str = "prefix", sep: str = "-",
+                   categories: pd.Series = None) -> np.ndarray:
+    """
+    Segment of every SKU: the part before the first `sep` for
+    by="prefix", or its entry in `categories` for by="category"
+    (DEFAULT_SEGMENT when missing). Each distinct SKU is mapped once.
+    """
+    codes, uniques = pd.factorize(pd.Series(skus), use_na_sentinel=False)
+    uniques = pd.Index(uniques).astype(str)
+    if by == "prefix":
+        labels = pd.Series(uniques.str.split(sep, n=1).str[0])
+    elif by == "category":
+        if categories is None:
+            raise ValueError("by='category' needs a categories mapping")
+        labels = pd.Series(categories).reindex(uniques)
+    else:
+        raise ValueError(f"Unknown segmentation {by!r}; use 'prefix' or 'category'")
+    return labels.fillna(DEFAULT_SEGMENT).to_numpy(dtype=object)[codes]
+
+
+def _save_artifact(detector, path: str) -> None:
+    # Forests are stored flat, so segment models load by memory-mapping
+    if isinstance(detector, ForestDetector) and not isinstance(detector.model, FlatForest):
+        detector = ForestDetector(FlatForest.from_sklearn(detector.model, FEATURES))
+    detector.save(path)
+
+
+def _fit_segment(spec: dict, kind: str, job: tuple) -> dict:
+    code, path = job
+    frame = SharedFrame.attach(spec)
+    try:
+        rows = None if code is None else frame.array("segment") == code
+        df = frame.to_frame(rows)
+    finally:
+        rows = None
+        frame.close()
+
+    start = time.perf_counter()
+    params = {"n_jobs": 1} if kind == "forest" else {}
+    detector = make_detector(kind, **params).fit(df)
+    fit_seconds = time.perf_counter() - start
+    _save_artifact(detector, path)
+    return {"rows": len(df), "fit_seconds": round(fit_seconds, 3)}
+
+
+def _prune_runs(directory: str, keep: int = _KEEP_RUNS) -> None:
+    runs = sorted(name for name in os.listdir(directory) if name.startswith("run-"))
+    for name in runs[:-keep]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+@instrument
+def train_segment_models(df: pd.DataFrame, by: str = "prefix", sep: str = "-",
+                         categories: pd.Series = None,
+                         directory: str = SEGMENT_MODEL_DIR, detector: str = "forest",
+                         min_rows: int = 2_000, workers: int = None) -> dict:
+    """
+    Fits a `detector` per segment of df's complete feature rows on
+    `workers` processes, and writes the artifacts plus index.json under
+    `directory`. Returns the index.
+
+    Every run gets its own run-* subdirectory, and index.json is
+    replaced last, so readers see either the old family or the new one.
+    """
+    df = df.dropna(subset=FEATURES)
+    if df.empty:
+        raise ValueError("No rows with complete features to fit on")
+
+    labels = segment_labels(df["SKU"], by, sep, categories)
+    names, counts = np.unique(labels, return_counts=True)
+    own = (counts >= min_rows) & (names != DEFAULT_SEGMENT)
+    segments = pd.Index(names[own])
+
+    run = f"run-{time.time_ns()}"
+    os.makedirs(os.path.join(directory, run), exist_ok=True)
+    suffix = _ARTIFACT_SUFFIX.get(detector, "")
+
+    # Largest first, so the default model (all rows) does not start last
+    jobs = [(None, os.path.join(run, f"default{suffix}"))] + [
+        (code, os.path.join(run, f"segment-{code:05d}{suffix}"))
+        for code in np.argsort(-counts[own], kind="stable")
+    ]
+    shared = df[["SKU", *FEATURES]]
+    with SharedFrame.create(shared, arrays={"segment": segments.get_indexer(labels)}) as frame:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fitted = list(pool.map(
+                functools.partial(_fit_segment, frame.spec, detector),
+                [(code, os.path.join(directory, path)) for code, path in jobs],
+            ))
+
+    entries = {}
+    for (code, path), result in zip(jobs, fitted):
+        name = DEFAULT_SEGMENT if code is None else segments[code]
+        entries[name] = {"path": path, **result}
+
+    index = {
+        "detector": detector,
+        "by": by,
+        "sep": sep,
+        "min_rows": min_rows,
+        "run": run,
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "segments": entries,
+    }
+    if by == "category":
+        mapping = pd.DataFrame({"segment": pd.Series(categories, dtype=object)})
+        mapping.index = mapping.index.astype(str)
+        mapping.to_parquet(os.path.join(directory, run, _CATEGORY_FILE))
+        index["categories"] = os.path.join(run, _CATEGORY_FILE)
+
+    tmp = f"{index_path(directory)}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, index_path(directory))
+    _prune_runs(directory)
+    return index
+
+
+class SegmentedDetector:
+    """
+    Detector over a trained segment family. At most `cache_size` segment
+    models are held in memory (least recently used evicted first);
+    self.stats counts loads, cache hits and evictions.
+    """
+
+    name = "segmented"
+
+    def __init__(self, directory: str = SEGMENT_MODEL_DIR, cache_size: int = 8,
+                 **train_args):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.train_args = train_args
+        self.index = None
+        self.categories = None
+        self._models = OrderedDict()
+        self.stats = {"loads": 0, "hits": 0, "evictions": 0}
+        if os.path.exists(index_path(directory)):
+            self._read_index()
+
+    def _read_index(self) -> None:
+        with open(index_path(self.directory)) as f:
+            self.index = json.load(f)
+        self.categories = None
+        if "categories" in self.index:
+            mapping = pd.read_parquet(os.path.join(self.directory, self.index["categories"]))
+            self.categories = mapping["segment"]
+        self._models.clear()
+
+    @property
+    def offset_(self) -> float:
+        # Each segment model has its own threshold; report the default's
+        return self.model(DEFAULT_SEGMENT).offset_
+
+    def model(self, segment: str):
+        """The segment's fitted detector, loaded on first use."""
+        if segment in self._models:
+            self._models.move_to_end(segment)
+            self.stats["hits"] += 1
+            return self._models[segment]
+
+        entry = self.index["segments"][segment]
+        path = os.path.join(self.directory, entry["path"])
+        model = DETECTORS[self.index["detector"]].load(path)
+        self.stats["loads"] += 1
+
+        self._models[segment] = model
+        while len(self._models) > self.cache_size:
+            self._models.popitem(last=False)
+            self.stats["evictions"] += 1
+        return model
+
+    def segments(self, df: pd.DataFrame) -> np.ndarray:
+        """Model segment of every row (DEFAULT_SEGMENT for untrained segments)."""
+        labels = segment_labels(df["SKU"], self.index["by"], self.index["sep"],
+                                self.categories)
+        trained = pd.Index(list(self.index["segments"]))
+        return np.where(trained.get_indexer(labels) >= 0, labels, DEFAULT_SEGMENT)
+
+    def _batched(self, df: pd.DataFrame, method: str, dtype) -> np.ndarray:
+        codes, names = pd.factorize(self.segments(df))
+        order = np.argsort(codes, kind="stable")
+        ends = np.cumsum(np.bincount(codes, minlength=len(names)))
+
+        out = np.empty(len(df), dtype=dtype)
+        start = 0
+        for code, end in enumerate(ends):
+            rows = order[start:end]
+            out[rows] = getattr(self.model(names[code]), method)(df.iloc[rows])
+            start = end
+        return out
+
+    def fit(self, df: pd.DataFrame) -> "SegmentedDetector":
+        train_segment_models(df, directory=self.directory, **self.train_args)
+        self._read_index()
+        return self
+
+    def score(self, df: pd.DataFrame) -> np.ndarray:
+        return self._batched(df, "score", np.float64)
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        return self._batched(df, "predict", np.int64)
+
+    def save(self, path: str = SEGMENT_MODEL_DIR) -> None:
+        if os.path.abspath(path) == os.path.abspath(self.directory):
+            return
+        run = self.index["run"]
+        shutil.copytree(os.path.join(self.directory, run), os.path.join(path, run),
+                        dirs_exist_ok=True)
+        shutil.copy2(index_path(self.directory), index_path(path))
+
+    @classmethod
+    def load(cls, path: str = SEGMENT_MODEL_DIR) -> "SegmentedDetector":
+        if not os.path.exists(index_path(path)):
+            raise FileNotFoundError("Segment models not found. Train them first.")
+        return cls(path)
+
+
+DETECTORS["segmented"] = SegmentedDetector
+DETECTOR_PATHS["segmented"] = SEGMENT_MODEL_DIR
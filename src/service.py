@@ -0,0 +1,359 @@
+"""
+Long-running local scoring service.
+
+Loads the ghost-demand model once and scores over HTTP (TCP or a Unix
+socket). Concurrent requests are coalesced into micro-batches so the
+model sees one predict call per batch instead of one per request.
+
+    python -m src.service [--port 8765 | --socket /tmp/ghost.sock]
+                          [--max-batch 256] [--max-wait-ms 5]
+
+Endpoints:
+    POST /score    {"rows": [[...], ...]}  feature rows, FEATURES order
+                   {"rows": [{"daily_sales": ..., ...}, ...]}
+                   {"daily_sales": [{"SKU", "Date", "daily_sales"}, ...]}
+    GET  /metrics  request latency and batch-size percentiles
+    GET  /health
+"""
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering import add_time_series_features
+from src.ml_model import (
+    FEATURES, FLAT_MODEL_DIR, MODEL_PATH, load_flat_model, load_ghost_model
+)
+from src.model_registry import ModelRegistry
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT_MS = 5.0
+
+# Samples kept for the latency / batch-size percentiles
+_METRICS_WINDOW = 10_000
+
+
+def load_scoring_model(kind: str = "auto", registry: ModelRegistry = None):
+    """
+    The registry's current model as a memory-mapped flat forest, else
+    the exported flat forest (much lower per-call overhead than sklearn),
+    otherwise the pickled sklearn model.
+    """
+    registry = registry or ModelRegistry()
+    if kind in ("auto", "flat") and registry.current():
+        return registry.load_flat()
+    if kind == "flat" or (kind == "auto" and os.path.exists(FLAT_MODEL_DIR)):
+        return load_flat_model()
+    if kind in ("auto", "sklearn"):
+        return load_ghost_model(MODEL_PATH)
+    raise ValueError(f"Unknown model kind: {kind}")
+
+
+class ServiceMetrics:
+    """Thread-safe counters plus rolling latency / batch-size samples."""
+
+    def __init__(self, window: int = _METRICS_WINDOW):
+        self._lock = threading.Lock()
+        self._latency_ms = deque(maxlen=window)
+        self._batch_rows = deque(maxlen=window)
+        self._batch_requests = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.rows = 0
+        self.batches = 0
+
+    def record_request(self, latency_s: float, ok: bool = True):
+        with self._lock:
+            self.requests += 1
+            self.errors += not ok
+            self._latency_ms.append(latency_s * 1000.0)
+
+    def record_batch(self, n_rows: int, n_requests: int):
+        with self._lock:
+            self.batches += 1
+            self.rows += n_rows
+            self._batch_rows.append(n_rows)
+            self._batch_requests.append(n_requests)
+
+    @staticmethod
+    def _percentiles(samples) -> dict:
+        if not samples:
+            return {"p50": None, "p99": None, "mean": None}
+        values = np.asarray(samples, dtype=np.float64)
+        return {
+            "p50": float(np.percentile(values, 50)),
+            "p99": float(np.percentile(values, 99)),
+            "mean": float(values.mean()),
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "rows": self.rows,
+                "batches": self.batches,
+                "latency_ms": self._percentiles(self._latency_ms),
+                "batch_rows": self._percentiles(self._batch_rows),
+                "batch_requests": self._percentiles(self._batch_requests),
+            }
+
+
+class MicroBatcher:
+    """
+    Collects submitted feature blocks until max_batch_size rows are
+    waiting or max_wait_ms has passed since the first one, then scores
+    them with a single decision_function call on a worker thread.
+    """
+
+    def __init__(self, model, max_batch_size: int = DEFAULT_MAX_BATCH,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 metrics: ServiceMetrics = None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.metrics = metrics or ServiceMetrics()
+
+        # sklearn warns when a model fitted on a frame gets a bare array
+        self._named_input = hasattr(model, "feature_names_in_")
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, X: np.ndarray) -> Future:
+        """Queues rows for scoring; the future resolves to their decision scores."""
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def score(self, X: np.ndarray) -> np.ndarray:
+        return self.submit(X).result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    # ---------- worker ----------
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None, True
+
+        batch = [first]
+        n_rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while n_rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            n_rows += len(item[0])
+
+        return batch, False
+
+    def _run(self, batch):
+        blocks = [X for X, _ in batch]
+        X = np.concatenate(blocks) if len(blocks) > 1 else blocks[0]
+        if self._named_input:
+            X = pd.DataFrame(X, columns=FEATURES)
+
+        try:
+            decision = np.asarray(self.model.decision_function(X))
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        self.metrics.record_batch(len(decision), len(batch))
+
+        offsets = np.cumsum([len(b) for b in blocks])[:-1]
+        for (_, future), part in zip(batch, np.split(decision, offsets)):
+            future.set_result(part)
+
+    def _loop(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            if batch:
+                self._run(batch)
+
+
+class ScoringService:
+    """The model, its micro-batcher and the request-level entry points."""
+
+    def __init__(self, model, max_batch_size: int = DEFAULT_MAX_BATCH,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.model = model
+        self.metrics = ServiceMetrics()
+        self.batcher = MicroBatcher(model, max_batch_size, max_wait_ms, self.metrics)
+
+    @staticmethod
+    def _feature_matrix(rows) -> np.ndarray:
+        if rows and isinstance(rows[0], dict):
+            rows = [[row[name] for name in FEATURES] for row in rows]
+        X = np.asarray(rows, dtype=np.float64)
+        if X.size == 0:
+            X = X.reshape(0, len(FEATURES))
+        if X.ndim != 2 or X.shape[1] != len(FEATURES):
+            raise ValueError(f"Each row needs {len(FEATURES)} features: {FEATURES}")
+        return X
+
+    def _verdicts(self, X: np.ndarray) -> dict:
+        decision = self.batcher.score(X) if len(X) else np.zeros(0)
+        # Same rule as IsolationForest.predict
+        flags = np.where(decision < 0, -1, 1)
+        return {
+            "ghost_flag": flags.tolist(),
+            "ghost_demand": (flags == -1).astype(int).tolist(),
+            "score": decision.tolist(),
+        }
+
+    def score_rows(self, rows) -> dict:
+        return self._verdicts(self._feature_matrix(rows))
+
+    def score_daily_sales(self, records) -> dict:
+        """
+        Builds features from raw (SKU, Date, daily_sales) history and
+        scores every SKU-day whose features are defined.
+        """
+        df = pd.DataFrame.from_records(records, columns=["SKU", "Date", "daily_sales"])
+        df["Date"] = pd.to_datetime(df["Date"])
+        df = add_time_series_features(df).dropna(subset=FEATURES)
+
+        result = self._verdicts(df[FEATURES].to_numpy(dtype=np.float64))
+        result["SKU"] = df["SKU"].astype(str).tolist()
+        result["Date"] = df["Date"].dt.strftime("%Y-%m-%d").tolist()
+        return result
+
+    def handle(self, payload: dict) -> dict:
+        if "rows" in payload:
+            return self.score_rows(payload["rows"])
+        if "daily_sales" in payload:
+            return self.score_daily_sales(payload["daily_sales"])
+        raise ValueError("Body needs 'rows' or 'daily_sales'")
+
+    # ---------- servers ----------
+    def make_server(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                    socket_path: str = None):
+        """HTTP server bound to host:port, or to a Unix socket when given."""
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = _UnixHTTPServer(socket_path, _ScoringHandler)
+        else:
+            server = _TCPHTTPServer((host, port), _ScoringHandler)
+        server.service = self
+        return server
+
+    def close(self):
+        self.batcher.close()
+
+
+# Many clients connect at once under load; the default backlog is 5
+class _TCPHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        # Unix-socket peers have no (host, port)
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/metrics":
+            self._reply(200, service.metrics.snapshot())
+        elif self.path == "/health":
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path != "/score":
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+            return
+
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            body, status = service.handle(payload), 200
+        except (ValueError, KeyError, TypeError) as exc:
+            body, status = {"error": str(exc)}, 400
+        except Exception as exc:
+            body, status = {"error": str(exc)}, 500
+
+        service.metrics.record_request(time.perf_counter() - start, ok=status == 200)
+        self._reply(status, body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ghost demand scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", default=None, help="serve on a Unix socket instead")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--model", choices=["auto", "flat", "sklearn"], default="auto")
+    args = parser.parse_args(argv)
+
+    service = ScoringService(
+        load_scoring_model(args.model), args.max_batch, args.max_wait_ms
+    )
+    server = service.make_server(args.host, args.port, args.socket)
+
+    where = args.socket or f"http://{args.host}:{server.server_address[1]}"
+    print(f"Scoring service listening on {where}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+The ghost-demand pipeline as a DAG of memoized stages.
+
+Every stage output is cached on disk under a key made from
+    - the stage's code (source of the modules that implement it),
+    - its config,
+    - the keys of the stages it reads from,
+    - its external inputs (raw file fingerprint, model version).
+Keys are computed without running anything, so a changed rule in
+explainability.py only re-runs generate_explanations and the stages
+after it, and plan() can report what would be recomputed.
+"""
+import hashlib
+import inspect
+import json
+import sys
+
+import pandas as pd
+
+from src.cache import DailyCache
+from src.compact import FEATURE_DTYPE, compact_daily, expand_dtypes
+from src.data_cleaning import (
+    DATE_FORMAT, RAW_DATA_PATH, VALID_STATUS, load_and_prepare_data
+)
+from src.evaluation import evaluate_impact
+from src.explainability import generate_explanations
+from src.feature_engineering import add_time_series_features
+from src.detectors import DETECTOR_PATHS, load_detector
+from src.ml_model import detect_ghost_demand
+from src.optimization import optimize_production
+from src.segments import index_path
+
+STAGE_CACHE_DIR = ".cache/stages"
+
+
+def _hash(payload) -> str:
+    data = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def _module_hash(module_name: str) -> str:
+    path = inspect.getsourcefile(sys.modules[module_name])
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class Stage:
+    """
+    One pipeline step: run(context, *upstream_outputs) -> DataFrame.
+
+    `modules` are the modules whose source defines the step's behaviour,
+    `config` any settings it depends on beyond that source, and
+    `external(context, cache)` fingerprints inputs that are not stage
+    outputs. All of them go into the stage's cache key.
+    """
+
+    def __init__(self, name: str, run, deps=(), modules=(), config=None,
+                 external=None):
+        self.name = name
+        self.run = run
+        self.deps = list(deps)
+        self.modules = list(modules)
+        self.config = config or {}
+        self.external = external
+
+    def code_hash(self) -> str:
+        return _hash([_module_hash(m) for m in self.modules])
+
+
+class PipelineContext:
+    """
+    Inputs shared by the stages; the model is loaded only if needed.
+    compact=True runs the per-SKU stages on compact dtypes (src.compact).
+    `detector` picks the src.detectors kind, read from its default path
+    unless model_path is given.
+    """
+
+    def __init__(self, raw_path: str = RAW_DATA_PATH, model_path: str = None,
+                 model=None, compact: bool = False, detector: str = "forest"):
+        self.raw_path = raw_path
+        self.detector = detector
+        self.model_path = model_path or DETECTOR_PATHS[detector]
+        self.compact = compact
+        self._model = model
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = load_detector(self.detector, self.model_path)
+        return self._model
+
+
+def _raw_fingerprint(context: PipelineContext, cache: DailyCache) -> dict:
+    return cache.source_fingerprint(context.raw_path)
+
+
+def _model_fingerprint(context: PipelineContext, cache: DailyCache) -> dict:
+    path = context.model_path
+    if context.detector == "segmented":
+        # index.json names the training run every artifact belongs to
+        path = index_path(path)
+    return {"detector": context.detector, **cache.source_fingerprint(path)}
+
+
+def _dtype_mode(context: PipelineContext, cache: DailyCache) -> dict:
+    return {"compact": context.compact}
+
+
+def _features(context: PipelineContext, df: pd.DataFrame) -> pd.DataFrame:
+    if context.compact:
+        return add_time_series_features(compact_daily(df), dtype=FEATURE_DTYPE)
+    return add_time_series_features(df)
+
+
+PIPELINE_STAGES = [
+    Stage(
+        "load_and_prepare_data",
+        lambda ctx: load_and_prepare_data(ctx.raw_path),
+        modules=["src.data_cleaning"],
+        config={"valid_status": VALID_STATUS, "date_format": DATE_FORMAT},
+        external=_raw_fingerprint,
+    ),
+    Stage(
+        "add_time_series_features",
+        _features,
+        deps=["load_and_prepare_data"],
+        modules=["src.feature_engineering", "src.compact"],
+        external=_dtype_mode,
+    ),
+    Stage(
+        "detect_ghost_demand",
+        lambda ctx, df: detect_ghost_demand(df, ctx.model),
+        deps=["add_time_series_features"],
+        modules=["src.ml_model", "src.detectors", "src.flat_forest",
+                 "src.segments"],
+        external=_model_fingerprint,
+    ),
+    Stage(
+        "generate_explanations",
+        lambda ctx, df: generate_explanations(df),
+        deps=["detect_ghost_demand"],
+        modules=["src.explainability"],
+    ),
+    Stage(
+        "optimize_production",
+        lambda ctx, df: optimize_production(df),
+        deps=["generate_explanations"],
+        modules=["src.optimization"],
+    ),
+    Stage(
+        "evaluate_impact",
+        lambda ctx, df: expand_dtypes(evaluate_impact(df)),
+        deps=["optimize_production"],
+        modules=["src.evaluation", "src.compact"],
+    ),
+]
+
+
+class StageDAG:
+    """Runs stages in dependency order, reusing memoized outputs."""
+
+    def __init__(self, stages=None, cache: DailyCache = None):
+        self.stages = {stage.name: stage for stage in (stages or PIPELINE_STAGES)}
+        self.cache = cache or DailyCache(STAGE_CACHE_DIR)
+
+    def _order(self, target: str) -> list:
+        order, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            order.append(name)
+
+        visit(target)
+        return order
+
+    def keys(self, context: PipelineContext, target: str = None) -> dict:
+        """Cache key of every stage up to target, without running any."""
+        target = target or list(self.stages)[-1]
+        keys = {}
+        for name in self._order(target):
+            stage = self.stages[name]
+            keys[name] = _hash({
+                "stage": name,
+                "code": stage.code_hash(),
+                "config": stage.config,
+                "deps": [keys[dep] for dep in stage.deps],
+                "external": stage.external(context, self.cache) if stage.external else None,
+            })
+        return keys
+
+    def plan(self, context: PipelineContext, target: str = None) -> pd.DataFrame:
+        """
+        Per stage: its key and whether it is cached, or would be recomputed
+        because its own inputs changed or because an upstream stage is.
+        """
+        target = target or list(self.stages)[-1]
+        keys = self.keys(context, target)
+
+        rows, recompute = [], set()
+        for name in self._order(target):
+            stage = self.stages[name]
+            if self.cache.contains(keys[name]):
+                status = "cached"
+            elif any(dep in recompute for dep in stage.deps):
+                status = "recompute (upstream changed)"
+            else:
+                status = "recompute"
+            if status != "cached":
+                recompute.add(name)
+            rows.append({"stage": name, "key": keys[name][:12], "status": status})
+
+        return pd.DataFrame(rows)
+
+    def run(self, context: PipelineContext, target: str = None) -> pd.DataFrame:
+        """
+        Output of `target` (default: the last stage). Cached outputs are
+        loaded only where the walk back from target stops, so just the
+        invalidated suffix of the DAG executes.
+        """
+        target = target or list(self.stages)[-1]
+        keys = self.keys(context, target)
+        outputs = {}
+
+        def materialize(name):
+            if name not in outputs:
+                stage = self.stages[name]
+                outputs[name] = self.cache.get_or_build_key(
+                    keys[name],
+                    lambda: stage.run(context, *[materialize(d) for d in stage.deps]),
+                    source=f"stage:{name}",
+                    params=stage.config,
+                )
+            return outputs[name]
+
+        return materialize(target)
@@ -0,0 +1,489 @@
+"""
+Streaming ghost-demand detection over an order event feed.
+
+Tails an append-only JSONL file (or accepts JSONL over a Unix socket) of
+order events with the Amazon report's ingest columns,
+
+    {"Date": "04-30-22", "SKU": "J0230-SKD-M", "Status": "Shipped", "Qty": 1}
+
+applies the same Status filter and daily aggregation as
+load_and_prepare_data, and keeps per-SKU state in memory: the open
+(current) day's running total per SKU plus a RollingState of the
+closed days. Touched SKU-days are scored with the model as their total
+grows, after every event batch or every --score-every seconds, and an
+alert is emitted the first time a SKU-day is flagged.
+
+    python -m src.streaming --source events.jsonl [--follow] [--history]
+        [--socket /tmp/orders.sock] [--alerts alerts.jsonl]
+        [--max-batch 1000] [--max-wait-ms 200] [--score-every SECONDS]
+        [--checkpoint DIR] [--checkpoint-every 30]
+
+A SKU's day closes (is committed to the rolling state) when an event
+for a later day arrives. Events for a day that is already closed are
+counted as late and dropped. The reader and the detector are joined
+by a bounded asyncio queue, so a slow detector pauses the tail / the
+socket reads instead of buffering without limit. Checkpoints store the
+state, the open days and the file offset; restarting with the same
+--checkpoint resumes from that offset.
+
+Alerts are delivered at least once. They are emitted as soon as a batch
+is scored, while the checkpoint (offset plus the set of alerted
+SKU-days) is only written every --checkpoint-every seconds. After a
+crash, the events since the last checkpoint are replayed and an alert
+raised in that span is emitted again. Consumers that need each alert
+exactly once should deduplicate on (SKU, Date).
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import INGEST_COLUMNS, _aggregate_daily, load_data, parse_dates
+from src.ml_model import FEATURES
+from src.rolling_state import RollingState
+from src.service import load_scoring_model
+
+DEFAULT_MAX_BATCH = 1_000
+DEFAULT_MAX_WAIT_MS = 200.0
+DEFAULT_QUEUE_SIZE = 10_000
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+# Alert latency samples kept for the percentiles
+_LATENCY_WINDOW = 10_000
+
+
+class StreamingDetector:
+    """
+    Per-SKU open days + rolling state, and the scoring of SKU-days whose
+    totals changed. Not thread-safe: one consumer drives it.
+    """
+
+    def __init__(self, model, state: RollingState = None):
+        self.model = model
+        self.state = state or RollingState()
+        # sklearn warns when a model fitted on a frame gets a bare array
+        self._named_input = hasattr(model, "feature_names_in_")
+
+        self.open = {}          # SKU -> [Date, daily_sales] of its current day
+        self.dirty = {}         # SKU -> arrival time of its oldest unscored event
+        self.alerted = set()    # (SKU, Date) already alerted, open days only
+
+        self.counters = {
+            "events": 0, "bad_events": 0, "late_events": 0,
+            "batches": 0, "scored": 0, "alerts": 0, "closed_days": 0,
+        }
+        self._latency_ms = deque(maxlen=_LATENCY_WINDOW)
+
+    # ---------- ingest ----------
+    def _parse(self, lines, arrivals):
+        records, first_seen = [], {}
+        for line, arrival in zip(lines, arrivals):
+            try:
+                event = json.loads(line)
+                record = [event.get(col) for col in INGEST_COLUMNS]
+            except (ValueError, AttributeError):
+                self.counters["bad_events"] += 1
+                continue
+            records.append(record)
+            first_seen.setdefault(record[1], arrival)
+
+        df = pd.DataFrame.from_records(records, columns=INGEST_COLUMNS)
+        df["Qty"] = pd.to_numeric(df["Qty"], errors="coerce")
+        # Parsed here once per distinct date; _aggregate_daily keeps them
+        df["Date"] = parse_dates(df["Date"], errors="coerce")
+        bad = df["Date"].isna() | df["Qty"].isna() | df["SKU"].isna()
+        self.counters["bad_events"] += int(bad.sum())
+
+        df = df[~bad]
+        df["Qty"] = df["Qty"].astype(np.int64)
+        return df, first_seen
+
+    def ingest(self, lines, arrivals) -> list:
+        """
+        Applies a batch of raw JSONL events. Returns alerts for days the
+        batch closed (their final totals are scored before committing).
+        """
+        self.counters["events"] += len(lines)
+        self.counters["batches"] += 1
+        df, first_seen = self._parse(lines, arrivals)
+
+        daily = _aggregate_daily(df).sort_values(["Date", "SKU"], kind="stable")
+
+        slots = self.state.lookup(daily["SKU"].to_numpy(dtype=object))
+        last_date = np.full(len(slots), np.datetime64("NaT"), dtype="datetime64[ns]")
+        last_date[slots >= 0] = self.state.last_date[slots[slots >= 0]]
+        closed = []
+        for date, sku, sales, last in zip(
+            daily["Date"], daily["SKU"], daily["daily_sales"].to_numpy(), last_date
+        ):
+            day = self.open.get(sku)
+            if day is not None and date == day[0]:
+                day[1] += int(sales)
+            elif day is not None and date > day[0]:
+                closed.append((day[0], sku, day[1], self.dirty.pop(sku, None)))
+                self.open[sku] = [date, int(sales)]
+            elif day is None and (np.isnat(last) or date > last):
+                self.open[sku] = [date, int(sales)]
+            else:
+                self.counters["late_events"] += 1
+                continue
+            self.dirty.setdefault(sku, first_seen.get(sku, time.monotonic()))
+
+        return self._close(closed)
+
+    def _close(self, closed) -> list:
+        if not closed:
+            return []
+        frame = pd.DataFrame(closed, columns=["Date", "SKU", "daily_sales", "since"])
+        alerts = []
+        # A SKU may close several days in one batch: commit them in order
+        for _, day in frame.groupby("Date", sort=True):
+            unscored = day[day["since"].notna()]
+            if len(unscored):
+                alerts += self._score(
+                    unscored.drop(columns="since"),
+                    dict(zip(unscored["SKU"], unscored["since"])),
+                )
+            self.state.update(day.drop(columns="since"))
+            self.alerted.difference_update(zip(day["SKU"], day["Date"]))
+            self.counters["closed_days"] += len(day)
+        return alerts
+
+    # ---------- scoring ----------
+    def _score(self, day_df: pd.DataFrame, since: dict) -> list:
+        features = self.state.preview(day_df).dropna(subset=FEATURES)
+        self.counters["scored"] += len(day_df)
+        if features.empty:
+            return []
+
+        X = features[FEATURES]
+        if not self._named_input:
+            X = X.to_numpy(dtype=np.float64)
+        decision = np.asarray(self.model.decision_function(X))
+
+        now = time.monotonic()
+        alerts = []
+        # Same rule as IsolationForest.predict
+        for row, score in zip(features[decision < 0].itertuples(index=False),
+                              decision[decision < 0]):
+            key = (row.SKU, row.Date)
+            if key in self.alerted:
+                continue
+            self.alerted.add(key)
+            latency_ms = (now - since[row.SKU]) * 1000.0
+            self._latency_ms.append(latency_ms)
+            alert = {
+                "SKU": row.SKU,
+                "Date": pd.Timestamp(row.Date).strftime("%Y-%m-%d"),
+                "daily_sales": int(row.daily_sales),
+                "score": float(score),
+                "latency_ms": round(latency_ms, 3),
+            }
+            alert.update({name: float(getattr(row, name)) for name in FEATURES})
+            alerts.append(alert)
+
+        self.counters["alerts"] += len(alerts)
+        return alerts
+
+    def score_open(self) -> list:
+        """Scores every open SKU-day with events not scored yet."""
+        if not self.dirty:
+            return []
+        since, self.dirty = self.dirty, {}
+        day_df = pd.DataFrame(
+            [(self.open[sku][0], sku, self.open[sku][1]) for sku in since],
+            columns=["Date", "SKU", "daily_sales"],
+        )
+        return self._score(day_df, since)
+
+    def stats(self) -> dict:
+        stats = dict(self.counters)
+        stats["open_days"] = len(self.open)
+        stats["skus"] = self.state.n_skus
+        if self._latency_ms:
+            latency = np.asarray(self._latency_ms)
+            stats["latency_ms"] = {
+                "p50": float(np.percentile(latency, 50)),
+                "p99": float(np.percentile(latency, 99)),
+                "max": float(latency.max()),
+            }
+        return stats
+
+    # ---------- checkpoints ----------
+    def save(self, directory: str, offset: int = None) -> str:
+        """
+        Writes the state plus a checkpoint.json pointing at it; the
+        pointer is replaced atomically, so a crash mid-save leaves the
+        previous checkpoint intact.
+        """
+        os.makedirs(directory, exist_ok=True)
+        state_file = f"state-{time.time_ns()}.npz"
+        tmp = os.path.join(directory, f"{state_file}.tmp")
+        self.state.save(tmp)
+        os.replace(tmp, os.path.join(directory, state_file))
+
+        meta = {
+            "offset": offset,
+            "state": state_file,
+            "open": [
+                [sku, pd.Timestamp(date).isoformat(), sales]
+                for sku, (date, sales) in self.open.items()
+            ],
+            "dirty": list(self.dirty),
+            "alerted": [[sku, pd.Timestamp(date).isoformat()] for sku, date in self.alerted],
+            "counters": self.counters,
+        }
+        path = os.path.join(directory, CHECKPOINT_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(f"{path}.tmp", path)
+
+        for old in glob.glob(os.path.join(directory, "state-*.npz")):
+            if os.path.basename(old) != state_file:
+                os.remove(old)
+        return path
+
+    @classmethod
+    def restore(cls, directory: str, model):
+        """(detector, offset) from the checkpoint in directory."""
+        with open(os.path.join(directory, CHECKPOINT_FILE)) as f:
+            meta = json.load(f)
+
+        detector = cls(model, RollingState.load(os.path.join(directory, meta["state"])))
+        detector.open = {
+            sku: [pd.Timestamp(date), sales] for sku, date, sales in meta["open"]
+        }
+        now = time.monotonic()
+        detector.dirty = {sku: now for sku in meta["dirty"]}
+        detector.alerted = {(sku, pd.Timestamp(date)) for sku, date in meta["alerted"]}
+        detector.counters.update(meta["counters"])
+        return detector, meta["offset"]
+
+
+# -------------------------------
+# Event sources
+# Each puts (arrival time, offset after the line, line) on the queue and
+# None when the source ends; a full queue blocks the source.
+# -------------------------------
+async def tail_jsonl(path: str, queue: asyncio.Queue, offset: int = 0,
+                     follow: bool = True, poll_interval: float = 0.2) -> None:
+    with open(path, "rb") as f:
+        f.seek(offset or 0)
+        while True:
+            line = f.readline()
+            if line.endswith(b"\n"):
+                offset += len(line)
+                if line.strip():
+                    await queue.put((time.monotonic(), offset, line))
+                continue
+
+            # EOF, or a line the writer has not finished yet
+            f.seek(offset)
+            if not follow:
+                break
+            await asyncio.sleep(poll_interval)
+
+    await queue.put(None)
+
+
+async def serve_socket(path: str, queue: asyncio.Queue) -> None:
+    async def handle(reader, writer):
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    await queue.put((time.monotonic(), None, line))
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(handle, path=path)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+# -------------------------------
+# Consumer
+# -------------------------------
+async def _collect(queue: asyncio.Queue, max_batch: int, max_wait: float,
+                   timeout: float = None):
+    """
+    Up to max_batch items, waiting at most max_wait after the first one
+    (and at most `timeout` for the first). Returns (items, ended).
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        first = await asyncio.wait_for(queue.get(), timeout)
+    except asyncio.TimeoutError:
+        return [], False
+    if first is None:
+        return [], True
+
+    batch = [first]
+    deadline = loop.time() + max_wait
+    while len(batch) < max_batch:
+        try:
+            item = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+        if item is None:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+async def run_detector(detector: StreamingDetector, queue: asyncio.Queue, emit,
+                       max_batch: int = DEFAULT_MAX_BATCH,
+                       max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                       score_every: float = None, checkpoint_dir: str = None,
+                       checkpoint_every: float = 30.0) -> None:
+    """
+    Consumes the queue until its source ends. Batches are processed on a
+    worker thread, so the source keeps reading meanwhile. With
+    score_every=None open SKU-days are scored after every batch,
+    otherwise every score_every seconds.
+    """
+    loop = asyncio.get_running_loop()
+    max_wait = max_wait_ms / 1000.0
+    next_score = loop.time() + (score_every or 0.0)
+    next_checkpoint = loop.time() + checkpoint_every
+    offset = None
+    pending = None
+
+    def process(batch, score):
+        alerts = []
+        if batch:
+            arrivals, _, lines = zip(*batch)
+            alerts = detector.ingest(list(lines), list(arrivals))
+        if score:
+            alerts += detector.score_open()
+        return alerts
+
+    def finish(batch, alerts):
+        nonlocal offset
+        if batch and batch[-1][1] is not None:
+            offset = batch[-1][1]
+        for alert in alerts:
+            emit(alert)
+
+    try:
+        ended = False
+        while not ended:
+            timeout = None
+            if score_every and detector.dirty:
+                timeout = max(next_score - loop.time(), 0.0)
+            batch, ended = await _collect(queue, max_batch, max_wait, timeout)
+
+            score = ended or score_every is None or loop.time() >= next_score
+            if score and score_every:
+                next_score = loop.time() + score_every
+            if not batch and not score:
+                continue
+
+            pending = (batch, loop.run_in_executor(None, process, batch, score))
+            # Shielded: on cancellation the batch still completes (below)
+            alerts = await asyncio.shield(pending[1])
+            pending = None
+            finish(batch, alerts)
+
+            if checkpoint_dir and loop.time() >= next_checkpoint:
+                await asyncio.to_thread(detector.save, checkpoint_dir, offset)
+                next_checkpoint = loop.time() + checkpoint_every
+    finally:
+        if pending is not None:
+            await asyncio.wait([pending[1]])
+            if not pending[1].exception():
+                finish(pending[0], pending[1].result())
+        if checkpoint_dir:
+            detector.save(checkpoint_dir, offset)
+
+
+def _alert_writer(path: str = None):
+    out = open(path, "a") if path else sys.stdout
+
+    def emit(alert):
+        out.write(json.dumps(alert) + "\n")
+        out.flush()
+
+    return emit
+
+
+async def _main(args) -> StreamingDetector:
+    model = load_scoring_model(args.model)
+
+    offset = 0
+    if args.checkpoint and os.path.exists(os.path.join(args.checkpoint, CHECKPOINT_FILE)):
+        detector, offset = StreamingDetector.restore(args.checkpoint, model)
+        print(f"Restored checkpoint at offset {offset}", file=sys.stderr)
+    elif args.history:
+        detector = StreamingDetector(model, RollingState.from_history(load_data()))
+    else:
+        detector = StreamingDetector(model)
+
+    queue = asyncio.Queue(maxsize=args.queue_size)
+    if args.socket:
+        source = asyncio.create_task(serve_socket(args.socket, queue))
+    else:
+        source = asyncio.create_task(
+            tail_jsonl(args.source, queue, offset or 0, follow=args.follow)
+        )
+
+    try:
+        await run_detector(
+            detector, queue, _alert_writer(args.alerts),
+            max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+            score_every=args.score_every, checkpoint_dir=args.checkpoint,
+            checkpoint_every=args.checkpoint_every,
+        )
+    finally:
+        source.cancel()
+    return detector
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming ghost demand detection")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--source", help="append-only JSONL order event file")
+    source.add_argument("--socket", help="accept JSONL events on this Unix socket")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep tailing the file after reaching its end")
+    parser.add_argument("--history", action="store_true",
+                        help="start from the cleaned batch history (load_data)")
+    parser.add_argument("--alerts", default=None, help="alert JSONL file (default stdout)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--score-every", type=float, default=None, metavar="SECONDS",
+                        help="score on this cadence instead of after every batch")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument("--checkpoint", default=None, metavar="DIR")
+    parser.add_argument("--checkpoint-every", type=float, default=30.0)
+    parser.add_argument("--model", choices=["auto", "flat", "sklearn"], default="auto")
+    args = parser.parse_args(argv)
+
+    try:
+        detector = asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        return
+    print(json.dumps(detector.stats()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
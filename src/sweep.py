@@ -0,0 +1,207 @@
+"""
+Hyperparameter sweep for the ghost model.
+
+Loads and featurizes once and places the FEATURES matrix in shared
+memory, where worker processes fit forests without copying it. Trees
+are shared across n_estimators values. Every (max_samples,
+max_features, seed) family is fitted once with the largest
+n_estimators, and its prefixes are scored in a single pass
+(FlatForest.prefix_score_samples, identical to fitting the smaller
+forest). Contamination only moves the threshold, so it reuses the same
+scores too.
+
+Each configuration is scored by:
+    stability       mean Jaccard of its flags across random seeds
+    agreement       Jaccard of its flags with the production model's
+                    (FOREST_PARAMS), same seed
+    score_s_per_m   FlatForest scoring seconds per million rows
+    fit_s           fit seconds (the family's fit, pro rata by trees)
+
+Configurations not dominated on (score_s_per_m, stability, agreement)
+form the frontier; the report lists every configuration with its
+frontier flag.
+
+    python -m src.sweep --n-estimators 50 100 300 --max-samples 128 256 \\
+        --workers 4 --report sweep_report.csv
+"""
+import argparse
+import functools
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from src.data_cleaning import load_data
+from src.ecommerce_orders import ECOMMERCE_DIR, build_daily_demand
+from src.feature_engineering import add_time_series_features
+from src.flat_forest import FlatForest
+from src.ml_model import FEATURES, FOREST_PARAMS
+from src.parallel import SharedFrame
+from src.profiling import instrument
+
+SWEEP_REPORT_PATH = "sweep_report.csv"
+SWEEP_GRID = {
+    "n_estimators": [50, 100, 200, 300],
+    "max_samples": [128, 256, 512],
+    "max_features": [0.6, 0.8, 1.0],
+    "contamination": [0.01, 0.02, 0.05],
+}
+SEEDS = (42, 43)
+PARAMS = list(FOREST_PARAMS)
+
+
+def _jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    union = np.count_nonzero(a | b)
+    return np.count_nonzero(a & b) / union if union else 1.0
+
+
+def _fit_family(spec: dict, grid: dict, seeds, timing_rows: int, family: tuple) -> list:
+    """Fits one (max_samples, max_features) family per seed; flags of every config."""
+    max_samples, max_features = family
+    n_list = np.asarray(sorted(grid["n_estimators"]))
+    frame = SharedFrame.attach(spec)
+    try:
+        X = frame.array("X")
+        timing = np.array(X[:timing_rows])
+        rows = []
+        for seed in seeds:
+            start = time.perf_counter()
+            model = IsolationForest(
+                n_estimators=int(n_list[-1]), max_samples=max_samples,
+                max_features=max_features, random_state=seed, n_jobs=1,
+            ).fit(X)
+            fit_s = time.perf_counter() - start
+
+            flat = FlatForest.from_sklearn(model, FEATURES)
+            scores = flat.prefix_score_samples(X, n_list)
+            for n, prefix_scores in zip(n_list, scores):
+                prefix = flat.prefix(int(n))
+                start = time.perf_counter()
+                prefix.score_samples(timing)
+                score_s = time.perf_counter() - start
+
+                for contamination in grid["contamination"]:
+                    # sklearn's offset_: the contamination percentile of training scores
+                    offset = np.percentile(prefix_scores, 100.0 * contamination)
+                    rows.append({
+                        "n_estimators": int(n),
+                        "max_samples": max_samples,
+                        "max_features": max_features,
+                        "contamination": contamination,
+                        "seed": seed,
+                        "fit_s": fit_s * n / n_list[-1],
+                        "score_s_per_m": score_s * 1e6 / len(timing),
+                        "flags": np.packbits(prefix_scores < offset),
+                    })
+    finally:
+        X = None
+        frame.close()
+    return rows
+
+
+def frontier(report: pd.DataFrame) -> np.ndarray:
+    """Rows no other row beats on runtime, stability and agreement at once."""
+    cost = np.column_stack([
+        report["score_s_per_m"], -report["stability"], -report["agreement"]
+    ])
+    dominated = np.zeros(len(report), dtype=bool)
+    for i in range(len(report)):
+        better_or_equal = (cost <= cost[i]).all(axis=1)
+        strictly_better = (cost < cost[i]).any(axis=1)
+        dominated[i] = (better_or_equal & strictly_better).any()
+    return ~dominated
+
+
+@instrument(name="hyperparameter_sweep")
+def run_sweep(features: pd.DataFrame, grid: dict = None, seeds=SEEDS,
+              workers: int = None, timing_rows: int = 20_000) -> pd.DataFrame:
+    """
+    Sweeps every combination of `grid` (PARAMS -> values; missing keys
+    use SWEEP_GRID) over features' complete rows and returns the report,
+    one row per configuration. The production configuration is always
+    included, as the agreement reference.
+    """
+    grid = {name: list((grid or {}).get(name) or SWEEP_GRID[name]) for name in PARAMS}
+    for name in PARAMS:
+        if FOREST_PARAMS[name] not in grid[name]:
+            grid[name].append(FOREST_PARAMS[name])
+    seeds = list(seeds)
+
+    X = features[FEATURES].dropna().to_numpy(dtype=np.float32)
+    if not len(X):
+        raise ValueError("No rows with complete features to sweep on")
+    families = list(itertools.product(grid["max_samples"], grid["max_features"]))
+
+    with SharedFrame.create(pd.DataFrame(index=pd.RangeIndex(0)), arrays={"X": X}) as frame:
+        fit = functools.partial(_fit_family, frame.spec, grid, seeds, timing_rows)
+        if workers == 1:
+            fitted = [fit(family) for family in families]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                fitted = list(pool.map(fit, families))
+    runs = pd.DataFrame([row for rows in fitted for row in rows])
+
+    def flags(packed) -> np.ndarray:
+        return np.unpackbits(packed, count=len(X)).astype(bool)
+
+    is_reference = np.logical_and.reduce(
+        [runs[name] == FOREST_PARAMS[name] for name in PARAMS]
+    )
+    reference = {run.seed: flags(run.flags) for run in runs[is_reference].itertuples()}
+
+    report = []
+    for config, group in runs.groupby(PARAMS, sort=True):
+        by_seed = {run.seed: flags(run.flags) for run in group.itertuples()}
+        pairs = list(itertools.combinations(seeds, 2))
+        report.append({
+            **dict(zip(PARAMS, config)),
+            "stability": (np.mean([_jaccard(by_seed[a], by_seed[b]) for a, b in pairs])
+                          if pairs else np.nan),
+            "agreement": _jaccard(by_seed[seeds[0]], reference[seeds[0]]),
+            "flagged_share": by_seed[seeds[0]].mean(),
+            "fit_s": group["fit_s"].mean(),
+            "score_s_per_m": group["score_s_per_m"].mean(),
+        })
+    report = pd.DataFrame(report)
+    report["reference"] = np.logical_and.reduce(
+        [report[name] == FOREST_PARAMS[name] for name in PARAMS]
+    )
+    report["frontier"] = frontier(report.fillna({"stability": 0.0}))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ghost model hyperparameter sweep")
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=SWEEP_GRID["n_estimators"])
+    parser.add_argument("--max-samples", type=int, nargs="+", default=SWEEP_GRID["max_samples"])
+    parser.add_argument("--max-features", type=float, nargs="+",
+                        default=SWEEP_GRID["max_features"])
+    parser.add_argument("--contamination", type=float, nargs="+",
+                        default=SWEEP_GRID["contamination"])
+    parser.add_argument("--seeds", type=int, nargs="+", default=list(SEEDS))
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes fitting forest families (default: all cores)")
+    parser.add_argument(
+        "--ecommerce", nargs="?", const=ECOMMERCE_DIR, default=None, metavar="DIR",
+        help="sweep on the multi-table Ecommerce Order Dataset"
+    )
+    parser.add_argument("--report", default=SWEEP_REPORT_PATH)
+    args = parser.parse_args(argv)
+
+    daily = build_daily_demand(args.ecommerce) if args.ecommerce else load_data()
+    features = add_time_series_features(daily)
+    grid = {name: getattr(args, name) for name in PARAMS}
+    report = run_sweep(features, grid, args.seeds, args.workers)
+
+    report.to_csv(args.report, index=False)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(report[report["frontier"] | report["reference"]].to_string(index=False))
+    print(f"{len(report)} configurations, {int(report['frontier'].sum())} on the "
+          f"frontier; report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
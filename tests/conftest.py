@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def make_daily(n_skus: int = 40, n_days: int = 30, seed: int = 0) -> pd.DataFrame:
+    """Small daily_df (Date, SKU, daily_sales) with ~20% of SKU-days missing."""
+    rng = np.random.default_rng(seed)
+    sku_ids = np.repeat(np.arange(n_skus), n_days)
+    day_ids = np.tile(np.arange(n_days), n_skus)
+    keep = rng.random(len(sku_ids)) > 0.2
+    return pd.DataFrame({
+        "Date": pd.Timestamp("2022-04-01") + pd.to_timedelta(day_ids[keep], unit="D"),
+        "SKU": np.array([f"SKU-{i:03d}" for i in range(n_skus)], dtype=object)[sku_ids[keep]],
+        "daily_sales": rng.poisson(3, keep.sum()).astype(np.int64),
+    })
+
+
+@pytest.fixture
+def daily_df() -> pd.DataFrame:
+    return make_daily()
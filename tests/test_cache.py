@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.cache import DailyCache, load_frame, save_frame
+
+
+def test_source_fingerprint_is_persisted(tmp_path, monkeypatch):
+    source = tmp_path / "raw.csv"
+    source.write_text("a,b\n1,2\n")
+    cache = DailyCache(str(tmp_path / "cache"))
+    first = cache.source_fingerprint(str(source))
+
+    # a fresh instance must take the size/mtime shortcut instead of rehashing
+    def no_rehash(*args, **kwargs):
+        raise AssertionError("source was rehashed")
+
+    monkeypatch.setattr("src.cache.hashlib.sha256", no_rehash)
+    assert DailyCache(str(tmp_path / "cache")).source_fingerprint(str(source)) == first
+
+
+def test_source_fingerprint_rehashes_changed_source(tmp_path):
+    source = tmp_path / "raw.csv"
+    source.write_text("a,b\n1,2\n")
+    cache = DailyCache(str(tmp_path / "cache"))
+    first = cache.source_fingerprint(str(source))
+
+    source.write_text("a,b\n1,3\n")
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert cache.source_fingerprint(str(source))["sha256"] != first["sha256"]
+
+
+def _frame(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "SKU": pd.Series([f"SKU-{i % 17}" for i in range(n)], dtype="str"),
+        "Date": pd.date_range("2024-01-01", periods=n, freq="D"),
+        "category": pd.Categorical(rng.choice(["a", "b", "c"], n)),
+        "tier": pd.Categorical(
+            rng.choice(["low", "high"], n),
+            categories=["low", "mid", "high"], ordered=True
+        ),
+        "daily_sales": rng.integers(0, 50, n),
+        "score": rng.normal(size=n).astype(np.float32),
+        "growth": rng.normal(size=n),
+    })
+
+
+def test_save_load_frame_round_trip(tmp_path):
+    df = _frame()
+    df.loc[3, "SKU"] = None
+    df.index = df.index + 100
+
+    save_frame(df, str(tmp_path / "frame"))
+    for mmap in (True, False):
+        loaded = load_frame(str(tmp_path / "frame"), mmap=mmap)
+        assert dict(loaded.dtypes) == dict(df.dtypes)
+        pd.testing.assert_frame_equal(loaded, df, check_index_type=False)
+        assert loaded.index.tolist() == df.index.tolist()
+
+
+def test_hit_and_miss_counters(tmp_path):
+    source = tmp_path / "raw.csv"
+    source.write_text("a,b\n1,2\n")
+    cache = DailyCache(str(tmp_path / "cache"))
+    builds = []
+
+    def build():
+        builds.append(True)
+        return _frame()
+
+    first = cache.get_or_build(str(source), {"v": 1}, build)
+    second = cache.get_or_build(str(source), {"v": 1}, build)
+    cache.get_or_build(str(source), {"v": 2}, build)
+
+    pd.testing.assert_frame_equal(second, first)
+    assert len(builds) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+    # lifetime counters survive a new instance, session ones start over
+    stats = DailyCache(str(tmp_path / "cache")).stats()
+    assert (stats["hits"], stats["misses"]) == (0, 0)
+    assert (stats["total_hits"], stats["total_misses"]) == (1, 2)
+
+
+def test_source_change_invalidates_entry(tmp_path):
+    source = tmp_path / "raw.csv"
+    source.write_text("a,b\n1,2\n")
+    cache = DailyCache(str(tmp_path / "cache"))
+    cache.get_or_build(str(source), {}, lambda: _frame(seed=0))
+
+    source.write_text("a,b\n1,3\n")
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    rebuilt = cache.get_or_build(str(source), {}, lambda: _frame(seed=1))
+
+    pd.testing.assert_frame_equal(rebuilt, _frame(seed=1))
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert cache.invalidate(str(source)) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_under_max_bytes(tmp_path):
+    frame = _frame(n=2000)
+    probe = DailyCache(str(tmp_path / "probe"))
+    probe.get_or_build_key("probe", lambda: frame, source="probe")
+    entry_bytes = probe.stats()["bytes"]
+
+    # room for two entries, not three
+    cache = DailyCache(str(tmp_path / "cache"), max_bytes=int(entry_bytes * 2.5))
+    for key in ("a", "b"):
+        cache.get_or_build_key(key, lambda: frame, source=key)
+    # touching "a" makes "b" the least recently used
+    cache.get_or_build_key("a", lambda: frame, source="a")
+    cache.get_or_build_key("c", lambda: frame, source="c")
+
+    assert cache.contains("a") and cache.contains("c")
+    assert not cache.contains("b")
+    assert not os.path.exists(tmp_path / "cache" / "b")
+    assert cache.stats()["bytes"] <= cache.max_bytes
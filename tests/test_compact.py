@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.detectors import DETECTORS
+from src.feature_engineering import add_time_series_features
+from src.main import run_pipeline
+
+from conftest import make_daily
+
+
+def fit_detector(kind, features, tmp_path):
+    if kind.startswith("segmented"):
+        inner = kind.split(":")[1]
+        return DETECTORS["segmented"](
+            str(tmp_path / "segments"), detector=inner, min_rows=500, workers=1
+        ).fit(features)
+    return DETECTORS[kind]().fit(features)
+
+
+@pytest.mark.parametrize("seed", [5, 7, 11])
+@pytest.mark.parametrize("kind", ["forest", "mad", "segmented:forest", "segmented:mad"])
+def test_compact_matches_standard(tmp_path, kind, seed):
+    daily = make_daily(n_skus=500, n_days=60, seed=seed)
+    # Ten SKU prefixes, so the segmented detector has segments to split on
+    daily["SKU"] = daily["SKU"].str[4:6] + "-" + daily["SKU"]
+    detector = fit_detector(kind, add_time_series_features(daily), tmp_path)
+
+    standard = run_pipeline(daily, detector).reset_index(drop=True)
+    compact = run_pipeline(daily, detector, compact=True).reset_index(drop=True)
+
+    assert len(standard)
+    # Same SKU-days, flags and reasons; values differ only by the float32 rounding
+    floats = standard.select_dtypes("floating").columns
+    exact = standard.columns.difference(floats)
+    pd.testing.assert_frame_equal(compact[exact], standard[exact], check_exact=True)
+    pd.testing.assert_frame_equal(
+        compact[floats].astype(np.float64), standard[floats], rtol=1e-6, atol=1e-5
+    )
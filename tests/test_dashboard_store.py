@@ -0,0 +1,41 @@
+import pandas as pd
+
+import src.dashboard_store as dashboard_store
+from src.dashboard_store import open_results_store, publish_results
+
+
+def make_results():
+    return pd.DataFrame({
+        "Date": pd.to_datetime(["2022-04-01", "2022-04-02", "2022-04-01"]),
+        "SKU": ["B", "A", "A"],
+        "daily_sales": [3, 1, 2],
+        "cost_saving": [10.0, 20.0, 30.0],
+    })
+
+
+def test_published_store_is_reused(tmp_path, monkeypatch):
+    # What main does: write the CSV the dashboard reads, then publish it
+    root = str(tmp_path / "cache")
+    source = str(tmp_path / "results.csv")
+    results = make_results()
+    results.to_csv(source, index=False)
+    publish_results(results, source=source, directory=dashboard_store.store_dir_for(source, root))
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("store was rebuilt")
+
+    monkeypatch.setattr(dashboard_store, "publish_results", no_rebuild)
+    store = open_results_store(source, root=root)
+    assert store.totals() == {"ghost_cases": 3, "units": 6, "cost_saving": 60.0}
+    assert store.records(["A"], ["Date", "daily_sales"])["daily_sales"].tolist() == [1, 2]
+
+
+def test_stale_store_is_rebuilt(tmp_path):
+    root = str(tmp_path / "cache")
+    source = str(tmp_path / "results.csv")
+    results = make_results()
+    results.to_csv(source, index=False)
+    publish_results(results, source=source, directory=dashboard_store.store_dir_for(source, root))
+
+    results.iloc[:1].to_csv(source, index=False)
+    assert open_results_store(source, root=root).totals()["ghost_cases"] == 1
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_cleaning import load_and_prepare_data
+
+STATUSES = ["Shipped", "Delivered", "Cancelled", "Shipped - Returned to Seller"]
+
+
+@pytest.fixture
+def orders_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 5_000
+    dates = pd.date_range("2022-04-01", periods=40).strftime("%m-%d-%y")
+    orders = pd.DataFrame({
+        "index": np.arange(n),
+        "Order ID": [f"O-{i}" for i in range(n)],
+        "Date": rng.choice(dates, n),
+        "Status": rng.choice(STATUSES, n),
+        "SKU": [f"SKU-{i:03d}" for i in rng.integers(0, 150, n)],
+        "Qty": rng.integers(0, 4, n),
+        "Amount": rng.random(n),
+    })
+    path = tmp_path / "orders.csv"
+    orders.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("chunksize", [50, 97, 1_000, 100_000])
+def test_chunked_ingest_matches_full_read(orders_csv, chunksize):
+    expected = load_and_prepare_data(orders_csv)
+    pd.testing.assert_frame_equal(
+        load_and_prepare_data(orders_csv, chunksize=chunksize).reset_index(drop=True),
+        expected.reset_index(drop=True),
+        check_exact=True,
+    )
+
+
+@pytest.mark.parametrize("chunksize", [None, 10])
+def test_empty_export_keeps_dtypes(orders_csv, tmp_path, chunksize):
+    empty = tmp_path / "empty.csv"
+    empty.write_text(orders_csv.read_text().splitlines()[0] + "\n")
+
+    daily_df = load_and_prepare_data(empty, chunksize=chunksize)
+    assert daily_df.empty
+    pd.testing.assert_series_equal(daily_df.dtypes,
+                                   load_and_prepare_data(orders_csv).dtypes)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from src import feature_engineering
+from src.feature_engineering import add_time_series_features
+
+
+def lambda_baseline(df: pd.DataFrame, windows=(7,)) -> pd.DataFrame:
+    # The per-SKU transform add_time_series_features replaced
+    df = df.sort_values(["SKU", "Date"]).copy()
+    for w in sorted(set(windows) | {7}):
+        df[f"rolling_mean_{w}"] = (
+            df.groupby("SKU")["daily_sales"].transform(lambda x: x.rolling(w).mean())
+        )
+        df[f"rolling_std_{w}"] = (
+            df.groupby("SKU")["daily_sales"].transform(lambda x: x.rolling(w).std())
+        )
+    df["demand_change"] = df.groupby("SKU")["daily_sales"].pct_change()
+    df["volatility_ratio"] = df["rolling_std_7"] / (df["rolling_mean_7"] + 1e-6)
+    df["forecast_error"] = (
+        df["daily_sales"] - df.groupby("SKU")["daily_sales"].shift(1)
+    )
+    return df
+
+
+def assert_matches_baseline(df, windows=(7,)):
+    expected = lambda_baseline(df, windows)
+    actual = add_time_series_features(df, windows=windows)
+    pd.testing.assert_frame_equal(actual, expected[actual.columns], check_exact=True)
+
+
+def test_matches_lambda_transform_exactly(daily_df):
+    assert_matches_baseline(daily_df)
+
+
+def test_extra_windows_match_exactly(daily_df):
+    assert_matches_baseline(daily_df, windows=(7, 14, 28))
+
+
+def test_float_sales_match_exactly(daily_df):
+    rng = np.random.default_rng(1)
+    daily_df["daily_sales"] = rng.gamma(2.0, 1e3, len(daily_df)) + 1e6
+    assert_matches_baseline(daily_df)
+
+
+def test_nan_sales_stay_local(daily_df):
+    daily_df["daily_sales"] = daily_df["daily_sales"].astype(np.float64)
+    daily_df.loc[daily_df.index[::37], "daily_sales"] = np.nan
+    assert_matches_baseline(daily_df)
+
+
+def test_blocks_do_not_change_results(daily_df, monkeypatch):
+    expected = add_time_series_features(daily_df)
+    monkeypatch.setattr(feature_engineering, "_BLOCK_ROWS", 50)
+    pd.testing.assert_frame_equal(add_time_series_features(daily_df), expected,
+                                  check_exact=True)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from src.flat_forest import FlatForest
+from src.ml_model import export_flat_model
+
+PARAMS = {"max_samples": 128, "max_features": 0.8, "contamination": 0.02, "random_state": 0}
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.lognormal(size=(3_000, 6))
+    X[rng.random(len(X)) < 0.01] *= 20
+    return X
+
+
+@pytest.fixture(scope="module")
+def model(data):
+    return IsolationForest(n_estimators=60, **PARAMS).fit(data)
+
+
+def test_scores_match_sklearn(model, data):
+    flat = FlatForest.from_sklearn(model)
+    np.testing.assert_array_equal(flat.score_samples(data), model.score_samples(data))
+    np.testing.assert_array_equal(flat.decision_function(data), model.decision_function(data))
+    np.testing.assert_array_equal(flat.predict(data), model.predict(data))
+
+
+def test_missing_values_match_sklearn(model, data):
+    X = data[:500].copy()
+    X[np.random.default_rng(1).random(X.shape) < 0.1] = np.nan
+    flat = FlatForest.from_sklearn(model)
+    np.testing.assert_array_equal(flat.score_samples(X), model.score_samples(X))
+
+
+def test_saved_forest_matches(model, data, tmp_path):
+    FlatForest.from_sklearn(model).save(str(tmp_path / "flat"))
+    flat = FlatForest.load(str(tmp_path / "flat"))
+    np.testing.assert_array_equal(flat.decision_function(data), model.decision_function(data))
+
+
+@pytest.mark.parametrize("n_trees", [1, 25, 60])
+def test_prefix_matches_smaller_fit(model, data, n_trees):
+    smaller = IsolationForest(n_estimators=n_trees, **PARAMS).fit(data)
+    flat = FlatForest.from_sklearn(model)
+    np.testing.assert_array_equal(
+        flat.prefix_score_samples(data, [n_trees])[0], smaller.score_samples(data)
+    )
+
+
+@pytest.mark.parametrize("max_samples", [256, 3_000])
+def test_prefixes_match_smaller_fits(data, max_samples):
+    params = {**PARAMS, "max_samples": max_samples}
+    flat = FlatForest.from_sklearn(IsolationForest(n_estimators=300, **params).fit(data))
+    n_trees = [1, 2, 4, 5, 7, 300]
+
+    scores = flat.prefix_score_samples(data, n_trees)
+    for n, prefix_scores in zip(n_trees, scores):
+        smaller = IsolationForest(n_estimators=n, **params).fit(data)
+        np.testing.assert_array_equal(prefix_scores, smaller.score_samples(data))
+        np.testing.assert_array_equal(flat.prefix(n).score_samples(data), prefix_scores)
+
+
+def test_export_swaps_the_whole_model(model, data, tmp_path):
+    directory = tmp_path / "model.flat"
+    directory.mkdir()
+    (directory / "meta.json").write_text("{}")   # plain directory of an older export
+
+    first = export_flat_model(model, str(directory))
+    other = IsolationForest(n_estimators=10, **PARAMS).fit(data)
+    export_flat_model(other, str(directory))
+    export_flat_model(other, str(directory))
+
+    assert directory.is_symlink()
+    # the current export plus the previous one, for loaders still reading it
+    assert len(list(tmp_path.glob(".model.flat-*"))) == 2
+    loaded = FlatForest.load(str(directory))
+    np.testing.assert_array_equal(loaded.score_samples(data), other.score_samples(data))
+    assert first.meta["n_trees"] != loaded.meta["n_trees"]
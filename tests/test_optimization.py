@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.optimization import (
+    MAX_REDUCTION_RATIO, UNIT_PRODUCTION_COST, UNIT_WASTE_PENALTY, optimize_production
+)
+
+RESULTS = ["recommended_cut", "cost_saving", "waste_reduction_value"]
+
+
+@pytest.fixture
+def ghost_df():
+    return pd.DataFrame({
+        "forecast_error": [4.0, 2.5, 0.0, -1.0, 3.0],
+        "rolling_mean_7": [5.0, 3.0, 2.0, 1.0, 0.0],
+    })
+
+
+@pytest.mark.parametrize("method", ["closed_form", "ortools"])
+def test_cuts_every_actionable_row_to_its_bound(ghost_df, method):
+    out = optimize_production(ghost_df, method=method)
+
+    # Each unit cut avoids production and waste cost, so the optimum is the
+    # largest allowed cut; rows without excess demand or history are left alone
+    expected = np.array([4.0, 2.5, 0.0, 0.0, 0.0]) * MAX_REDUCTION_RATIO
+    np.testing.assert_allclose(out["recommended_cut"], expected, rtol=1e-12)
+    np.testing.assert_allclose(out["cost_saving"], expected * UNIT_PRODUCTION_COST, rtol=1e-12)
+    np.testing.assert_allclose(
+        out["waste_reduction_value"], expected * UNIT_WASTE_PENALTY, rtol=1e-12
+    )
+
+
+def test_matches_exported_results():
+    exported = pd.read_csv("backup/outputs/final_results.csv")
+    out = optimize_production(exported.drop(columns=RESULTS))
+    pd.testing.assert_frame_equal(out[RESULTS], exported[RESULTS], rtol=1e-12)
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_engineering import add_time_series_features
+from src.optimization import UNIT_PRODUCTION_COST, UNIT_WASTE_PENALTY
+from src.planning import UNIT_SHORTAGE_PENALTY, ProductionPlanner
+
+from conftest import make_daily
+
+BUDGETS = {f"cat-{i}": 30.0 for i in range(4)}
+CAPACITY = {f"plant-{i}": 50.0 for i in range(3)}
+
+
+@pytest.fixture
+def features():
+    df = add_time_series_features(make_daily(n_skus=60, n_days=40)).dropna()
+    number = df["SKU"].str[-3:].astype(int)
+    df["category"] = "cat-" + (number % 4).astype(str)
+    df["plant"] = "plant-" + (number % 3).astype(str)
+    # A third of the SKUs only start selling a few days in
+    late = (number % 3 == 0) & (df["Date"] < df["Date"].min()
+                                + pd.to_timedelta(number % 5, unit="D"))
+    return df[~late]
+
+
+def plan_cost(plan: pd.DataFrame) -> float:
+    return (UNIT_WASTE_PENALTY * plan["inventory"]
+            + UNIT_SHORTAGE_PENALTY * plan["shortage"]
+            - UNIT_PRODUCTION_COST * plan["recommended_cut"]).sum()
+
+
+def assert_warm_matches_cold(df, days=6, **columns):
+    first_day = df["Date"].min()
+    with ProductionPlanner(capacity=CAPACITY, budgets=BUDGETS) as warm:
+        for day in range(days):
+            start = first_day + pd.Timedelta(days=day)
+            with ProductionPlanner(capacity=CAPACITY, budgets=BUDGETS,
+                                   warm_start=False) as cold:
+                cold.opening_inventory = warm.opening_inventory.copy()
+                cold.sku_attrs = warm.sku_attrs.copy()
+                expected = cold.plan(df, start, commit=False, **columns)
+
+            plan = warm.plan(df, start, **columns)
+            assert warm.last_stats["non_optimal_groups"] == 0
+            if day:
+                assert warm.last_stats["warm_groups"] == warm.last_stats["groups"]
+            assert plan_cost(plan) == pytest.approx(plan_cost(expected), rel=1e-9)
+            assert (plan["SKU"].to_numpy() == expected["SKU"].to_numpy()).all()
+
+
+@pytest.mark.parametrize("columns", [
+    {"category_col": "category"},
+    {"plant_col": "plant"},
+    {"plant_col": "plant", "category_col": "category"},
+])
+def test_new_skus_reuse_group_models(features, columns):
+    assert_warm_matches_cold(features, **columns)
+
+
+def test_skus_changing_category(features):
+    # On day 3 some SKUs move category, leaving one group for another
+    moved = (features["SKU"].str[-3:].astype(int) % 7 == 0) & (
+        features["Date"] >= features["Date"].min() + pd.Timedelta(days=3))
+    features.loc[moved, "category"] = "cat-0"
+    assert_warm_matches_cold(features, category_col="category")
+
+
+def test_groups_merging(features):
+    # A SKU stocked by two plants' categories bridges their groups
+    features["category"] = "cat-" + features["plant"].str[-1]
+    bridge = features[features["SKU"] == features["SKU"].iloc[0]].copy()
+    bridge["SKU"] = "SKU-bridge"
+    bridge["plant"] = "plant-1"
+    bridge["category"] = "cat-2"
+    bridge = bridge[bridge["Date"] >= features["Date"].min() + pd.Timedelta(days=2)]
+    assert_warm_matches_cold(pd.concat([features, bridge]),
+                             plant_col="plant", category_col="category")
+
+
+def test_rejects_missing_group_labels(features):
+    features["category"] = features["category"].astype(object)
+    features.loc[features["SKU"] == features["SKU"].iloc[0], "category"] = np.nan
+    with ProductionPlanner(budgets=BUDGETS) as planner:
+        with pytest.raises(ValueError, match="no category"):
+            planner.plan(features, category_col="category")
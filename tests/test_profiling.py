@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+
+from src.profiling import ProfileRun, diff_traces, instrument, load_trace
+
+
+@instrument
+def allocate(mb):
+    block = np.ones(mb * 2 ** 20 // 8)
+    return block
+
+
+@instrument
+def small():
+    return 1
+
+
+def test_rss_delta_is_per_stage():
+    with ProfileRun() as run:
+        kept = allocate(64)
+        small()
+    big, tiny = run.to_frame().to_dict("records")
+
+    assert big["rss_delta_mb"] > 48
+    assert abs(tiny["rss_delta_mb"]) < 8
+    # the process peak carries over from the earlier stage
+    assert tiny["process_peak_rss_mb"] >= big["process_peak_rss_mb"]
+    del kept
+
+
+def test_diff_compares_rss_growth_not_process_peak(tmp_path):
+    def trace(delta, peak):
+        return load_trace(_write(tmp_path / f"{delta}-{peak}.json", [{
+            "stage": "clean", "wall_s": 1.0, "cpu_s": 1.0,
+            "rss_delta_mb": delta, "process_peak_rss_mb": peak,
+        }]))
+
+    # a higher process peak from other stages is not this stage's regression
+    assert not diff_traces(trace(40, 500), trace(40, 900))["regression"].any()
+    assert diff_traces(trace(40, 500), trace(80, 500))["regression"].all()
+    # growth inside the noise floor does not flag
+    assert not diff_traces(trace(1, 500), trace(4, 500))["regression"].any()
+
+
+def test_load_trace_reads_old_field_name(tmp_path):
+    path = _write(tmp_path / "old.json", [{"stage": "clean", "max_rss_mb": 321.0}])
+    assert load_trace(path)["process_peak_rss_mb"].tolist() == [321.0]
+
+
+def _write(path, records):
+    with open(path, "w") as f:
+        json.dump({"run_id": "x", "records": records}, f)
+    return str(path)
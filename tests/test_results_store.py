@@ -0,0 +1,71 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.results_store import ResultsStore
+
+
+def make_results(days, skus=("A", "B", "C")) -> pd.DataFrame:
+    return pd.DataFrame([
+        {"Date": pd.Timestamp(day), "SKU": sku, "daily_sales": float(i),
+         "ghost_demand": 1}
+        for day in days for i, sku in enumerate(skus)
+    ])
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultsStore(str(tmp_path / "store")) as store:
+        yield store
+
+
+@pytest.mark.parametrize("engine", ["sql", "parquet"])
+def test_rewrite_is_idempotent(store, engine):
+    results = make_results(["2022-04-01", "2022-04-02"])
+    store.write(results)
+    first = store.read(engine=engine)
+    store.write(results)
+    pd.testing.assert_frame_equal(store.read(engine=engine), first)
+    assert len(first) == len(results)
+
+
+@pytest.mark.parametrize("engine", ["sql", "parquet"])
+def test_rerun_replaces_days_without_rows(store, engine):
+    store.write(make_results(["2022-04-01", "2022-04-02", "2022-04-03"]))
+
+    # the re-run of 04-02..04-03 flags only one SKU on 04-02 and nothing on 04-03
+    rerun = make_results(["2022-04-02"], skus=("B",))
+    store.write(rerun, days=pd.date_range("2022-04-02", "2022-04-03"))
+    got = store.read(engine=engine)
+    assert got.groupby(got["Date"].dt.strftime("%Y-%m-%d"))["SKU"].apply(list).to_dict() == {
+        "2022-04-01": ["A", "B", "C"], "2022-04-02": ["B"],
+    }
+    assert store.days() == ["2022-04-01", "2022-04-02"]
+
+    store.write(rerun.iloc[:0], days=["2022-04-01", "2022-04-02"])
+    assert store.read(engine=engine).empty
+    assert store.days() == []
+
+
+def test_rows_outside_days_are_rejected(store):
+    with pytest.raises(ValueError):
+        store.write(make_results(["2022-04-01"]), days=["2022-04-02"])
+
+
+def test_failed_write_keeps_both_copies(store, monkeypatch):
+    store.write(make_results(["2022-04-01", "2022-04-02"]))
+    before = store.read(engine="parquet")
+
+    write_sql = store._write_sql
+    def fail_on_second_day(day, day_df):
+        if day == "2022-04-02":
+            raise RuntimeError("disk full")
+        write_sql(day, day_df)
+
+    monkeypatch.setattr(store, "_write_sql", fail_on_second_day)
+    with pytest.raises(RuntimeError):
+        store.write(make_results(["2022-04-01", "2022-04-02"], skus=("Z",)))
+    pd.testing.assert_frame_equal(store.read(engine="sql"), before)
+    pd.testing.assert_frame_equal(store.read(engine="parquet"), before)
+    assert [n for n in os.listdir(store.parquet_dir) if n.startswith(".")] == []
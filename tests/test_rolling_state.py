@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_engineering import add_time_series_features
+from src.rolling_state import RollingState
+
+EXACT = ["rolling_mean_7", "rolling_mean_14", "demand_change", "forecast_error"]
+CLOSE = ["rolling_std_7", "rolling_std_14", "volatility_ratio"]
+
+
+def split(daily_df, days: int = 10):
+    cutoff = daily_df["Date"].max() - pd.Timedelta(days=days - 1)
+    return daily_df[daily_df["Date"] < cutoff], daily_df[daily_df["Date"] >= cutoff]
+
+
+def assert_matches_batch(features, daily_df):
+    batch = add_time_series_features(daily_df, windows=(7, 14))
+    batch = batch[batch["Date"] >= features["Date"].min()]
+    features = features.reset_index(drop=True)
+    batch = batch.reset_index(drop=True)
+    pd.testing.assert_frame_equal(features[EXACT], batch[EXACT], check_exact=True)
+    pd.testing.assert_frame_equal(features[CLOSE], batch[CLOSE], rtol=1e-12)
+
+
+def test_update_matches_batch(daily_df):
+    history, recent = split(daily_df)
+    state = RollingState.from_history(history, windows=(7, 14))
+    assert_matches_batch(state.update(recent), daily_df)
+
+
+def test_new_skus_grow_state(daily_df):
+    # Every SKU starts on a different day, so most days add SKUs
+    first_day = daily_df.groupby("SKU")["Date"].transform("min")
+    offset = pd.to_timedelta(daily_df["SKU"].str[-3:].astype(int) % 20, unit="D")
+    daily_df = daily_df[daily_df["Date"] >= first_day + offset]
+
+    state = RollingState(windows=(7, 14))
+    features = state.update(daily_df)
+    assert state.n_skus == daily_df["SKU"].nunique()
+    assert list(state.skus) == list(pd.unique(daily_df.sort_values(["Date", "SKU"])["SKU"]))
+    assert_matches_batch(features, daily_df)
+
+
+def test_save_load_round_trip(daily_df, tmp_path):
+    history, recent = split(daily_df)
+    state = RollingState.from_history(history, windows=(7, 14))
+    state.save(tmp_path / "state.npz")
+
+    loaded = RollingState.load(tmp_path / "state.npz")
+    assert len(loaded.count) == loaded.n_skus == state.n_skus
+    pd.testing.assert_frame_equal(loaded.update(recent), state.update(recent),
+                                  check_exact=True)
+
+
+def test_rejects_missing_sales(daily_df):
+    day = daily_df[daily_df["Date"] == daily_df["Date"].min()].copy()
+    day["daily_sales"] = day["daily_sales"].astype(float)
+    day.loc[day.index[0], "daily_sales"] = np.nan
+    with pytest.raises(ValueError, match="missing daily_sales"):
+        RollingState().update(day)
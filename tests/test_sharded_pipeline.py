@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from src.detectors import DETECTORS, load_detector
+from src.feature_engineering import add_time_series_features
+from src.main import run_pipeline, run_sharded
+
+from conftest import make_daily
+
+
+@pytest.fixture(scope="module")
+def daily():
+    return make_daily(n_skus=60, n_days=40, seed=3)
+
+
+@pytest.mark.parametrize("kind", ["forest", "mad"])
+@pytest.mark.parametrize("compact", [False, True])
+def test_sharded_matches_serial(daily, tmp_path, kind, compact):
+    path = str(tmp_path / f"{kind}.model")
+    DETECTORS[kind]().fit(add_time_series_features(daily)).save(path)
+
+    serial = run_pipeline(daily, load_detector(kind, path), compact=compact)
+    sharded = run_sharded(daily, 3, model_path=path, compact=compact, detector=kind)
+
+    assert len(serial)
+    pd.testing.assert_frame_equal(
+        sharded.reset_index(drop=True), serial.reset_index(drop=True), check_exact=True
+    )
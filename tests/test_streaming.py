@@ -0,0 +1,22 @@
+import json
+
+from src.streaming import StreamingDetector
+
+
+def test_parse_drops_bad_events():
+    lines = [
+        json.dumps({"Date": "04-30-22", "SKU": "A", "Status": "Shipped", "Qty": 2}),
+        json.dumps({"Date": " 04-30-22 ", "SKU": "A", "Status": "Shipped", "Qty": "1"}),
+        json.dumps({"Date": "2022-04-30", "SKU": "A", "Status": "Shipped", "Qty": 1}),
+        json.dumps({"Date": None, "SKU": "B", "Status": "Shipped", "Qty": 1}),
+        json.dumps({"Date": "05-01-22", "SKU": None, "Status": "Shipped", "Qty": 1}),
+        json.dumps({"Date": "05-01-22", "SKU": "B", "Status": "Shipped", "Qty": "x"}),
+        "not json",
+    ]
+    detector = StreamingDetector(model=None)
+    df, _ = detector._parse(lines, range(len(lines)))
+
+    assert detector.counters["bad_events"] == 5
+    assert df["SKU"].tolist() == ["A", "A"]
+    assert df["Qty"].tolist() == [2, 1]
+    assert (df["Date"] == "2022-04-30").all()
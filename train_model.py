@@ -1,10 +1,92 @@
+import argparse
+import time
+
 from src.data_cleaning import load_data
+from src.detectors import DETECTOR_PATHS, DETECTORS, make_detector
+from src.ecommerce_orders import ECOMMERCE_DIR, build_daily_demand
 from src.feature_engineering import add_time_series_features
-from src.ml_model import train_ghost_model
+from src.ml_model import (
+    MODEL_PATH, atomic_dump, export_flat_model, extend_ghost_model,
+    load_ghost_model, recent_window, train_ghost_model, training_metadata
+)
+from src.model_registry import REGISTRY_DIR, ModelRegistry
+from src.segments import product_categories
+
+parser = argparse.ArgumentParser(description="Train the ghost demand model")
+parser.add_argument(
+    "--extend", action="store_true",
+    help="grow the current model with trees fit on recent data (warm_start)"
+)
+parser.add_argument("--new-trees", type=int, default=50)
+parser.add_argument("--window-days", type=int, default=30)
+parser.add_argument("--jobs", type=int, default=-1, help="cores used to fit trees")
+parser.add_argument("--registry", default=REGISTRY_DIR)
+parser.add_argument(
+    "--detector", choices=sorted(DETECTORS), default="forest",
+    help="detector to fit; only the forest is published to the registry"
+)
+parser.add_argument(
+    "--ecommerce", nargs="?", const=ECOMMERCE_DIR, default=None, metavar="DIR",
+    help="train on the multi-table Ecommerce Order Dataset"
+)
+parser.add_argument(
+    "--segment-by", choices=["prefix", "category"], default="prefix",
+    help="with --detector segmented: SKU prefix or product_category_name "
+         "(needs --ecommerce)"
+)
+parser.add_argument("--segment-detector", choices=["forest", "mad"], default="forest")
+parser.add_argument("--min-segment-rows", type=int, default=2_000)
+parser.add_argument("--segment-workers", type=int, default=None,
+                    help="processes fitting segment models (default: all cores)")
+args = parser.parse_args()
 
-df = load_data()
+registry = ModelRegistry(args.registry)
+
+df = build_daily_demand(args.ecommerce) if args.ecommerce else load_data()
 df = add_time_series_features(df)
 
-train_ghost_model(df)
+if args.detector != "forest":
+    params = {}
+    if args.detector == "segmented":
+        params = {
+            "by": args.segment_by,
+            "detector": args.segment_detector,
+            "min_rows": args.min_segment_rows,
+            "workers": args.segment_workers,
+        }
+        if args.segment_by == "category":
+            params["categories"] = product_categories(args.ecommerce or ECOMMERCE_DIR)
+
+    start = time.perf_counter()
+    detector = make_detector(args.detector, **params).fit(df)
+    detector.save(DETECTOR_PATHS[args.detector])
+    print(f"Ghost demand {args.detector} detector trained "
+          f"({time.perf_counter() - start:.1f}s) and saved to "
+          f"{DETECTOR_PATHS[args.detector]}.")
+    raise SystemExit
+
+start = time.perf_counter()
+if args.extend:
+    parent = registry.current()
+    base = registry.load(parent, mmap=False) if parent else load_ghost_model()
+    model = extend_ghost_model(
+        base, df, args.new_trees, args.window_days, n_jobs=args.jobs
+    )
+    train_df, mode = recent_window(df, args.window_days), "warm_start"
+else:
+    parent = None
+    model = train_ghost_model(df, n_jobs=args.jobs, path=None)
+    train_df, mode = df, "full"
+fit_seconds = time.perf_counter() - start
+
+version = registry.publish(
+    model,
+    training_metadata(train_df, model, fit_seconds, mode=mode, parent=parent),
+)
+
+# Legacy single-file copies read by src.main and the scoring service
+atomic_dump(model, MODEL_PATH)
+export_flat_model(model)
 
-print("Ghost demand model trained and saved.")
+print(f"Ghost demand model trained ({mode}, {fit_seconds:.1f}s) "
+      f"and published as {version}.")